@@ -0,0 +1,75 @@
+"""
+Ağa giden araçların eş zamanlı çağrılarda birbirini beklemediğini sahte bir IZTEK
+sunucusuyla ölçer.
+
+Yerelde her isteğe sabit bir gecikmeyle yanıt veren bir HTTP sunucusu açılır. Farklı
+duraklar için N adet `duraga_yaklasan_otobusleri_getir` çağrısı `mcp.call_tool` üzerinden
+(MCP istemcisinin yaptığı gibi) aynı anda gönderilir. Araçlar olay döngüsünü
+bloklamıyorsa toplam süre tek bir çağrının süresine (en uzun gecikme) yakın, çağrı
+sürelerinin toplamından çok daha kısa olmalıdır. N, `HTTP_HAVUZ_BOYUTU`nu aşarsa istekler
+bağlantı havuzunda sıraya girer ve toplam süre kademeli olarak artar.
+
+Kullanım:
+    IZMIR_ULASIM_VERI_YUKLEME_MODU=yok python benchmarks/async_benchmark.py [N]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IZMIR_ULASIM_VERI_YUKLEME_MODU", "yok")
+
+import izmir_ulasim_main as m  # noqa: E402
+
+GECIKME_S = 0.3
+
+
+def sahte_sunucuyu_baslat() -> ThreadingHTTPServer:
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            time.sleep(GECIKME_S)
+            govde = json.dumps([{"HatNumarasi": 5, "OtobusId": 1, "KalanDurakSayisi": 3}]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    return sunucu
+
+
+async def zamanla(durak_id: int) -> float:
+    baslangic = time.perf_counter()
+    await m.mcp.call_tool("duraga_yaklasan_otobusleri_getir", {"stop_id": durak_id})
+    return time.perf_counter() - baslangic
+
+
+async def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    sunucu = sahte_sunucuyu_baslat()
+    m.IZTEK_BASE_URL = f"http://127.0.0.1:{sunucu.server_port}"
+    await zamanla(0)  # Bağlantı havuzunu ısıtır.
+
+    baslangic = time.perf_counter()
+    sureler = await asyncio.gather(*(zamanla(durak_id) for durak_id in range(1, n + 1)))
+    toplam = time.perf_counter() - baslangic
+    sunucu.shutdown()
+
+    print(f"{n} eş zamanlı çağrı, kaynak gecikmesi {GECIKME_S * 1000:.0f} ms")
+    print(f"Toplam süre: {toplam:.2f} sn")
+    print(f"En uzun çağrı: {max(sureler):.2f} sn, çağrı sürelerinin toplamı: {sum(sureler):.2f} sn")
+    assert toplam < sum(sureler) / 2, "Çağrılar sırayla çalışmış görünüyor"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Canlı konum takibinin kaynağa giden istek sayısını sahte bir IZTEK sunucusuyla ölçer.
+
+Yerelde `/hatotobuskonumlari/{hat}` uç noktasını taklit eden bir HTTP sunucusu açılır;
+her istekte araçlar güzergah boyunca ilerler, ara sıra bir araç hattan ayrılır veya
+hatta katılır. Ardından çok sayıda istemci aynı hatları `hat_konum_takibini_baslat` ve
+`hat_konum_degisikliklerini_getir` ile sık aralıklarla izler. Her istemcinin yalnızca
+değişikliklerden kurduğu görüntünün sunucudakiyle aynı olduğu doğrulanır.
+
+Kullanım:
+    IZMIR_ULASIM_VERI_YUKLEME_MODU=yok python benchmarks/canli_takip_benchmark.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IZMIR_ULASIM_VERI_YUKLEME_MODU", "yok")
+
+import izmir_ulasim_main as m  # noqa: E402
+
+HATLAR = [5, 35, 302]
+IZLEYICI_SAYISI = 20
+ARAC_SAYISI = 12
+SURE_S = 6.0
+YOKLAMA_ARALIGI_S = 1.0
+ISTEMCI_ARALIGI_S = 0.2
+
+
+class SahteIztek:
+    """Her istekte araçlarını ilerleten, sayaçlı sahte konum kaynağı."""
+
+    def __init__(self) -> None:
+        self.istekler = 0
+        self._adim = {hat: 0 for hat in HATLAR}
+        self._kilit = threading.Lock()
+
+    def konumlar(self, hat: int) -> dict:
+        with self._kilit:
+            self.istekler += 1
+            adim = self._adim[hat] = self._adim[hat] + 1
+        otobusler = []
+        for i in range(ARAC_SAYISI):
+            if (i + adim) % 7 == 0:
+                continue  # Ara sıra hattan ayrılan araç
+            # Duran araçlar değişiklik üretmez.
+            ilerleme = 0 if i % 3 == 0 else adim * 0.0004
+            otobusler.append({
+                "OtobusId": hat * 100 + i,
+                "Yon": 1 + i % 2,
+                "KoorX": f"{38.40 + i * 0.003 + ilerleme:.6f}".replace(".", ","),
+                "KoorY": f"{27.10 + i * 0.002:.6f}".replace(".", ","),
+            })
+        return {"HatOtobusKonumlari": otobusler, "HataMesaj": None}
+
+
+def sahte_sunucuyu_baslat(kaynak: SahteIztek) -> ThreadingHTTPServer:
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            eslesme = re.fullmatch(r"/hatotobuskonumlari/(\d+)", self.path)
+            if not eslesme or int(eslesme.group(1)) not in HATLAR:
+                self.send_response(204)
+                self.end_headers()
+                return
+            govde = json.dumps(kaynak.konumlar(int(eslesme.group(1)))).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    return sunucu
+
+
+async def izleyici(hat: int, bitis: float) -> int:
+    baslangic = await m.hat_konum_takibini_baslat(hat)
+    abone_id, surum = baslangic["abone_id"], baslangic["surum"]
+    gorunum = {o["otobus_id"]: o for o in baslangic["otobusler"]}
+    cagri = 1
+    while time.monotonic() < bitis:
+        await asyncio.sleep(ISTEMCI_ARALIGI_S)
+        degisiklik = m.hat_konum_degisikliklerini_getir(hat, abone_id, surum)
+        cagri += 1
+        if degisiklik["tam_goruntu"]:
+            gorunum = {o["otobus_id"]: o for o in degisiklik["otobusler"]}
+        else:
+            for o in degisiklik["eklenen"] + degisiklik["guncellenen"]:
+                gorunum[o["otobus_id"]] = o
+            for otobus_id in degisiklik["kaldirilan"]:
+                gorunum.pop(otobus_id, None)
+        surum = degisiklik["surum"]
+
+    beklenen = {o["otobus_id"]: o for o in m._canli_takipci.anlik_goruntu(hat)["otobusler"]}
+    assert gorunum == beklenen, f"{hat} hattında değişikliklerden kurulan görüntü tutarsız"
+    m.hat_konum_takibini_birak(hat, abone_id)
+    return cagri
+
+
+async def main() -> None:
+    kaynak = SahteIztek()
+    sunucu = sahte_sunucuyu_baslat(kaynak)
+    m.IZTEK_BASE_URL = f"http://127.0.0.1:{sunucu.server_port}"
+    m.CANLI_TAKIP_ARALIGI_S = YOKLAMA_ARALIGI_S
+    m._anlik_veri_onbellegi.ttl_s = YOKLAMA_ARALIGI_S
+
+    bitis = time.monotonic() + SURE_S
+    cagrilar = await asyncio.gather(*(izleyici(hat, bitis) for hat in HATLAR for _ in range(IZLEYICI_SAYISI)))
+    sunucu.shutdown()
+
+    print(f"{len(HATLAR)} hat x {IZLEYICI_SAYISI} izleyici, {SURE_S:.0f} sn")
+    print(f"İstemci çağrıları: {sum(cagrilar)}")
+    print(f"Kaynağa giden istekler: {kaynak.istekler} "
+          f"(hat başına yaklaşık {SURE_S / YOKLAMA_ARALIGI_S:.0f} + ilk yoklama)")
+    print("Tüm izleyicilerin değişikliklerden kurduğu görüntü sunucuyla tutarlı.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
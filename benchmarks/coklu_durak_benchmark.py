@@ -0,0 +1,142 @@
+"""
+duraklara_yaklasan_otobusleri_getir aracının eş zamanlılık sınırını ve zaman aşımı
+davranışını sahte bir IZTEK sunucusuyla ölçer.
+
+Yerelde `/duragayaklasanotobusler/{durak}` uç noktasını taklit eden bir HTTP sunucusu
+açılır; her yanıt sabit bir gecikmeyle döner, bazı duraklar zaman aşımına uğrayacak
+kadar yavaştır, biri de hata döndürür. Aynı duraklar tek tek (sırayla) ve tek bir
+çoklu çağrıyla sorgulanır; sunucuda aynı anda işlenen istek sayısının sınırı (süresi
+dolup arka planda tamamlanan istekler dışında) aşmadığı ve yavaş duraklar dışındaki
+sonuçların döndürüldüğü doğrulanır. Son olarak tüm duraklar yavaşken aracın toplam
+süresinin zaman aşımıyla sınırlı kaldığı ölçülür.
+
+Kullanım:
+    IZMIR_ULASIM_VERI_YUKLEME_MODU=yok python benchmarks/coklu_durak_benchmark.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IZMIR_ULASIM_VERI_YUKLEME_MODU", "yok")
+
+import izmir_ulasim_main as m  # noqa: E402
+
+DURAKLAR = list(range(10000, 10024))
+YAVAS_DURAKLAR = {10005, 10017}
+HATALI_DURAK = 10011
+GECIKME_S = 0.3
+YAVAS_GECIKME_S = 5.0
+ES_ZAMANLI = 8
+ZAMAN_ASIMI_S = 2.0
+
+
+class SahteIztek:
+    """Aynı anda işlenen istek sayısını ölçen sahte yaklaşan otobüs kaynağı."""
+
+    def __init__(self) -> None:
+        self.istekler = 0
+        self.suren = 0
+        self.en_fazla_suren = 0
+        self.hepsi_yavas = False
+        self._kilit = threading.Lock()
+
+    def yaklasanlar(self, durak: int) -> dict:
+        with self._kilit:
+            self.istekler += 1
+            self.suren += 1
+            self.en_fazla_suren = max(self.en_fazla_suren, self.suren)
+        try:
+            time.sleep(YAVAS_GECIKME_S if self.hepsi_yavas or durak in YAVAS_DURAKLAR else GECIKME_S)
+        finally:
+            with self._kilit:
+                self.suren -= 1
+        return [
+            {"HatNumarasi": 100 + (durak + i) % 40, "HatAdi": "Test", "OtobusId": durak * 10 + i,
+             "KalanDurakSayisi": (durak * 7 + i * 3) % 12, "HattinYonu": 1}
+            for i in range(durak % 4)
+        ]
+
+
+def sahte_sunucuyu_baslat(kaynak: SahteIztek) -> ThreadingHTTPServer:
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            eslesme = re.fullmatch(r"/duragayaklasanotobusler/(\d+)", self.path)
+            if not eslesme:
+                self.send_response(404)
+                self.end_headers()
+                return
+            durak = int(eslesme.group(1))
+            if durak == HATALI_DURAK:
+                self.send_response(404)
+                self.end_headers()
+                return
+            otobusler = kaynak.yaklasanlar(durak)
+            if not otobusler:
+                self.send_response(204)
+                self.end_headers()
+                return
+            govde = json.dumps(otobusler).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    return sunucu
+
+
+async def main() -> None:
+    kaynak = SahteIztek()
+    sunucu = sahte_sunucuyu_baslat(kaynak)
+    m.IZTEK_BASE_URL = f"http://127.0.0.1:{sunucu.server_port}"
+    hizli_duraklar = [d for d in DURAKLAR if d not in YAVAS_DURAKLAR]
+
+    baslangic = time.perf_counter()
+    for durak in hizli_duraklar:
+        await m.duraga_yaklasan_otobusleri_getir(durak)
+    sirali_sure = time.perf_counter() - baslangic
+    m._anlik_veri_onbellegi.temizle()
+    kaynak.en_fazla_suren = 0
+
+    baslangic = time.perf_counter()
+    sonuc = await m.duraklara_yaklasan_otobusleri_getir(DURAKLAR, ES_ZAMANLI, ZAMAN_ASIMI_S)
+    coklu_sure = time.perf_counter() - baslangic
+
+    assert kaynak.en_fazla_suren <= ES_ZAMANLI + len(YAVAS_DURAKLAR), f"Eş zamanlılık sınırı aşıldı: {kaynak.en_fazla_suren}"
+    assert coklu_sure < ZAMAN_ASIMI_S + 0.5, f"Araç zaman aşımından uzun sürdü: {coklu_sure:.2f} sn"
+    assert set(sonuc["eksik_duraklar"]) == YAVAS_DURAKLAR | {HATALI_DURAK}, sonuc["eksik_duraklar"]
+    kalanlar = [o["KalanDurakSayisi"] for o in sonuc["pano"]]
+    assert kalanlar == sorted(kalanlar), "Pano kalan durak sayısına göre sıralı değil"
+
+    print(f"{len(hizli_duraklar)} durak tek tek: {sirali_sure:.2f} sn")
+    print(f"{len(DURAKLAR)} durak tek çağrıda ({ES_ZAMANLI} eş zamanlı, {ZAMAN_ASIMI_S:.0f} sn zaman aşımı): "
+          f"{coklu_sure:.2f} sn")
+    print(f"Sunucuda aynı anda işlenen en fazla istek: {kaynak.en_fazla_suren}")
+    print(f"Panodaki otobüs: {len(sonuc['pano'])}, eksik duraklar: {sonuc['eksik_duraklar']}")
+
+    m._anlik_veri_onbellegi.temizle()
+    kaynak.hepsi_yavas = True
+    tum_duraklar = list(range(20000, 20000 + m.COKLU_DURAK_MAX_DURAK))
+    baslangic = time.perf_counter()
+    sonuc = await m.duraklara_yaklasan_otobusleri_getir(tum_duraklar, ES_ZAMANLI, ZAMAN_ASIMI_S)
+    takili_sure = time.perf_counter() - baslangic
+    assert takili_sure < ZAMAN_ASIMI_S + 0.5, f"Araç zaman aşımından uzun sürdü: {takili_sure:.2f} sn"
+    print(f"{len(tum_duraklar)} durağın hepsi yavaşken ({YAVAS_GECIKME_S:.0f} sn): {takili_sure:.2f} sn, "
+          f"eksik durak: {len(sonuc['eksik_duraklar'])}")
+    sunucu.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+İZBAN ücret tablosunun doldurulmasını, yerel sorgu süresini ve tarife değişikliğinin
+algılanmasını sahte bir ücret hesaplama sunucusuyla ölçer.
+
+Yerelde `/api/izban/tutarhesaplama/{binis}/{inis}/{aktarma}/{halk}` uç noktasını taklit
+eden bir HTTP sunucusu açılır ve tablo bu sunucudan, beklemesiz olarak doldurulur.
+Ardından tablodan ve API'den alınan ücretlerin aynı olduğu, sunucuya istek gitmediği ve
+tarife değiştiğinde tablonun yeniden oluşturulduğu doğrulanır. Gerçek `data/` klasörüne
+dokunmamak için tablo geçici bir klasöre yazılır.
+
+Kullanım:
+    IZMIR_ULASIM_VERI_YUKLEME_MODU=yok python benchmarks/izban_ucret_tablosu_benchmark.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IZMIR_ULASIM_VERI_YUKLEME_MODU", "yok")
+
+import izmir_ulasim_main as m  # noqa: E402
+
+
+class SahteUcretSunucusu:
+    """İstasyon sıraları arasındaki farka göre ücret hesaplayan, istek sayaçlı sahte kaynak."""
+
+    def __init__(self, siralar: dict) -> None:
+        self.siralar = siralar
+        self.istekler = 0
+        self.taban_ucret = 15.18
+        self._kilit = threading.Lock()
+
+    def ucret(self, binis: int, inis: int, aktarma: int, halk: bool):
+        with self._kilit:
+            self.istekler += 1
+        if binis not in self.siralar or inis not in self.siralar or binis == inis:
+            return None
+        mesafe = abs(self.siralar[binis] - self.siralar[inis])
+        tam = round(self.taban_ucret + mesafe * 0.9 - aktarma * 2.5, 2)
+        if halk:
+            tam = round(tam * 0.5, 2)
+        return {"BinisIstasyonId": binis, "InisIstasyonId": inis, "TamBiletUcreti": tam,
+                "OgrenciBiletUcreti": round(tam * 0.4, 2), "MesafeKm": mesafe * 2}
+
+
+def sahte_sunucuyu_baslat(kaynak: SahteUcretSunucusu) -> ThreadingHTTPServer:
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            eslesme = re.fullmatch(r"/api/izban/tutarhesaplama/(\d+)/(\d+)/(\d+)/(true|false)", self.path)
+            yanit = kaynak.ucret(int(eslesme.group(1)), int(eslesme.group(2)), int(eslesme.group(3)),
+                                 eslesme.group(4) == "true") if eslesme else None
+            if yanit is None:
+                self.send_response(204)
+                self.end_headers()
+                return
+            govde = json.dumps(yanit).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    return sunucu
+
+
+def tablonun_dolmasini_bekle(tablo) -> None:
+    while m._izban_ucret_tablosu is not tablo or len(tablo.eksik_hucreler()):
+        time.sleep(0.2)
+        tablo = m._izban_ucret_tablosu
+    while tablo.son_kontrol == 0:
+        time.sleep(0.05)
+
+
+async def main() -> None:
+    istasyonlar = m.izban_stations_df
+    kaynak = SahteUcretSunucusu(dict(zip(istasyonlar['ISTASYON_ID'], istasyonlar['ISTASYON_SIRASI'])))
+    sunucu = sahte_sunucuyu_baslat(kaynak)
+    taban_url = f"http://127.0.0.1:{sunucu.server_port}/api/izban/tutarhesaplama"
+    m._izban_tutar_url = lambda b, i, a, h: f"{taban_url}/{b}/{i}/{a}/{str(h).lower()}"
+    gecici = tempfile.mkdtemp()
+    m._izban_ucret_tablosu_yolu = lambda: os.path.join(gecici, "processed_izban_ucretleri.parquet")
+    m.IZBAN_UCRET_ISTEK_ARALIGI_S = 0
+    m._izban_ucret_tablosu = None
+    m._izban_ucret_tablosunu_yukle(istasyonlar)
+    tablo = m._izban_ucret_tablosu
+
+    baslangic = time.perf_counter()
+    m.izban_ucret_tablosu_olusturmayi_baslat()
+    tablonun_dolmasini_bekle(tablo)
+    hucre_sayisi = int(m.np.prod(tablo.sekil))
+    print(f"{hucre_sayisi} hücre {time.perf_counter() - baslangic:.1f} sn'de dolduruldu "
+          f"({kaynak.istekler} istek), dosya {os.path.getsize(m._izban_ucret_tablosu_yolu()) / 1024:.0f} KB")
+
+    idler = istasyonlar['ISTASYON_ID'].tolist()
+    ornekler = [(idler[i % len(idler)], idler[(i * 7 + 3) % len(idler)], i % 4) for i in range(200)]
+    istekler = kaynak.istekler
+    sureler = []
+    for binis, inis, aktarma in ornekler:
+        t0 = time.perf_counter()
+        sonuc = await m.izban_tutar_hesapla(binis, inis, aktarma)
+        sureler.append((time.perf_counter() - t0) * 1e6)
+        beklenen = kaynak.ucret(binis, inis, aktarma, sonuc.get("HalkTasitSaatiUygulandiMi", False))
+        assert (beklenen is None and "hata" in sonuc) or all(sonuc[k] == v for k, v in beklenen.items()), (sonuc, beklenen)
+    kaynak.istekler -= len(ornekler)
+    assert kaynak.istekler == istekler, "Tablodaki ücretler için API'ye istek gönderildi"
+    print(f"{len(ornekler)} yerel sorgu: medyan {statistics.median(sureler):.0f} µs, API isteği yok")
+
+    # Yeniden yükleme diskteki tabloyu kullanır.
+    m._izban_ucret_tablosu = None
+    m._izban_ucret_tablosunu_yukle(istasyonlar)
+    assert len(m._izban_ucret_tablosu.eksik_hucreler()) == 0
+    tablo = m._izban_ucret_tablosu
+    print("Diskteki tablo yeniden başlatmada eksiksiz yüklendi.")
+
+    kaynak.taban_ucret = 17.5
+    tablo.son_kontrol = 0
+    m._izban_ucret_tablosu_uyandir.set()
+    baslangic = time.perf_counter()
+    while m._izban_ucret_tablosu is tablo:
+        time.sleep(0.1)
+    tablonun_dolmasini_bekle(m._izban_ucret_tablosu)
+    binis, inis, aktarma = ornekler[1]
+    sonuc = await m.izban_tutar_hesapla(binis, inis, aktarma)
+    assert sonuc["TamBiletUcreti"] == kaynak.ucret(binis, inis, aktarma, sonuc["HalkTasitSaatiUygulandiMi"])["TamBiletUcreti"]
+    print(f"Tarife değişikliği algılandı, tablo {time.perf_counter() - baslangic:.1f} sn'de yeniden oluşturuldu.")
+    sunucu.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+rota_planla aracının sabit kalkış/varış çiftleri üzerindeki çalışma süresini ölçer.
+
+Kullanım:
+    IZMIR_ULASIM_VERI_YUKLEME_MODU=yok python benchmarks/rota_planla_benchmark.py [SS:DD] [YYYY-AA-GG]
+
+Veriler yalnızca data/ altındaki parquet anlık görüntülerinden okunur ('yok' veri yükleme
+modu); ağ erişimi gerekmez. Anlık görüntüsü bulunmayan veri setleri (ör. güzergah
+koordinatları, metro/tramvay istasyonları) planlayıcıya katılmaz; sonuçlar data/
+içeriğine göre değişir.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IZMIR_ULASIM_VERI_YUKLEME_MODU", "yok")
+
+import izmir_ulasim_main as m  # noqa: E402
+
+NOKTALAR = {
+    "Konak": (38.4189, 27.1287),
+    "Alsancak": (38.4380, 27.1430),
+    "Bornova": (38.4622, 27.2167),
+    "Karşıyaka": (38.4555, 27.1099),
+    "Buca": (38.3885, 27.1750),
+    "Çiğli": (38.4950, 27.0700),
+    "Gaziemir": (38.3240, 27.1300),
+    "Narlıdere": (38.3950, 26.9980),
+}
+
+
+def main() -> None:
+    kalkis_saati = sys.argv[1] if len(sys.argv) > 1 else "08:00"
+    tarih = sys.argv[2] if len(sys.argv) > 2 else "2026-10-19"
+
+    if m.walking_transfers_df is None:
+        m._veri_setini_degistir("walking_transfers_df", m.load_or_process_walking_transfers_data(), "benchmark")
+
+    baslangic = time.perf_counter()
+    m._yolculuk_planlayicisi(m._tarife_id(m.datetime.strptime(tarih, "%Y-%m-%d")))
+    print(f"Planlayıcı derleme: {time.perf_counter() - baslangic:.2f} sn")
+
+    sureler = []
+    for kalkis, (k_enlem, k_boylam) in NOKTALAR.items():
+        for varis, (v_enlem, v_boylam) in NOKTALAR.items():
+            if kalkis == varis:
+                continue
+            baslangic = time.perf_counter()
+            sonuc = m.rota_planla.__wrapped__(k_enlem, k_boylam, v_enlem, v_boylam, kalkis_saati, tarih, 2)
+            sureler.append((time.perf_counter() - baslangic) * 1000)
+            secenekler = sonuc.get("secenekler") or []
+            en_erken = min((s["varis_saati"] for s in secenekler), default="-")
+            print(f"{kalkis:>10} -> {varis:<10} {len(secenekler)} seçenek, en erken varış {en_erken}")
+
+    sureler.sort()
+    print(f"{len(sureler)} sorgu: medyan {statistics.median(sureler):.1f} ms, "
+          f"p95 {sureler[int(len(sureler) * 0.95)]:.1f} ms, en uzun {sureler[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
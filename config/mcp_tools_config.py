@@ -4,10 +4,122 @@ METRO_BASE_URL = "https://openapi.izmir.bel.tr/api/metro"
 TRAMVAY_BASE_URL = "https://openapi.izmir.bel.tr/api/tramvay" 
 ACIKVERI_BASE_URL = "https://acikveri.bizizmir.com/tr/api/3/action"
 
+# HTTP İstemcisi
+# Sunucu başına (bağlantı, okuma) zaman aşımları, saniye cinsinden.
+HTTP_ZAMAN_ASIMLARI = {
+    "openapi.izmir.bel.tr": (3.05, 10),
+    "acikveri.bizizmir.com": (3.05, 20),
+}
+HTTP_VARSAYILAN_ZAMAN_ASIMI = (3.05, 15)
+HTTP_HAVUZ_BOYUTU = 10
+HTTP_MAX_DENEME = 3
+HTTP_BEKLEME_TABANI_S = 0.5
+HTTP_MAX_BEKLEME_S = 4.0
+HTTP_DEVRE_KESICI_ESIK = 5
+HTTP_DEVRE_KESICI_BEKLEME_S = 30.0
+
+# CPU yoğun veya bloklayan araçların çalıştırıldığı thread havuzunun boyutu.
+HESAPLAMA_HAVUZU_BOYUTU = 4
+
+# Anlık veri önbelleği (durağa yaklaşan otobüsler, otobüs konumları), saniye cinsinden.
+ANLIK_VERI_ONBELLEK_TTL_S = 15
+ANLIK_VERI_ONBELLEK_MAX_KAYIT = 2048
+
+# Nadiren değişen metro/tramvay verileri için diskte tutulan önbellek, saniye cinsinden.
+# Süresi dolan kayıtlar MAX_BAYAT süresi boyunca hemen döndürülür ve arka planda yenilenir.
+STATIK_VERI_ONBELLEK_TTL_S = 6 * 60 * 60
+STATIK_VERI_ONBELLEK_MAX_BAYAT_S = 7 * 24 * 60 * 60
+
 # Kaynak ID'leri
 HAT_ARAMA_RESOURCE_ID = "bd6c84f8-49ba-4cf4-81f8-81a0fbb5caa3"
 HAT_DETAYLARI_RESOURCE_ID = "81138188-9e50-476d-a1d0-d069e3ec3878"
 
+# ACIKVERI datastore kaynaklarının toplu indirilmesinde sayfa başına kayıt sayısı
+ACIKVERI_SAYFA_BOYUTU = 1000
+
+# Durak/istasyon adı aramasında bulanık eşleşmeler için asgari benzerlik puanı (0-100)
+ISIM_ARAMA_MIN_BENZERLIK = 70
+
+# Aktarma için yürünebilecek en fazla durak/istasyon arası mesafe (km)
+AKTARMA_YURUME_YARICAPI_KM = 0.4
+# Yürüme sürelerinin hesaplanmasında kullanılan ortalama yürüme hızı (km/sa)
+YURUME_HIZI_KM_SA = 4.8
+
+# Yolculuk planlayıcı (rota_planla)
+# Başlangıç ve varış noktalarından durak/istasyonlara en fazla yürüme mesafesi (km)
+ROTA_ERISIM_YARICAPI_KM = 0.8
+# Kalkış saatinden itibaren dikkate alınan en uzun süre (dakika)
+ROTA_PLANLAMA_UFKU_DK = 240
+# Otobüslerin ara durak saatlerinin tahmininde kullanılan ortalama hız (km/sa)
+OTOBUS_ORT_HIZ_KM_SA = 18
+# Sefer saatleri tabloları bulunmayan raylı sistemler için (sefer aralığı dk, ortalama hız km/sa)
+RAYLI_SISTEM_SEFERLERI = {
+    'metro': (6, 32),
+    'tramvay': (10, 20),
+    'izban': (15, 45),
+}
+RAYLI_SISTEM_CALISMA_SAATLERI = ("06:00", "24:00")
+
+# Erişilebilirlik analizi (erisilebilir_duraklari_getir)
+# Kalkış saatinin yuvarlandığı zaman dilimi (dakika); önbellek anahtarının parçasıdır
+ERISIM_ALANI_ZAMAN_DILIMI_DK = 5
+# Ulaşılabilen bölgenin çiziminde kullanılan ızgara hücresi boyutu (km)
+ERISIM_ALANI_IZGARA_KM = 0.25
+# Hesaplanan erişilebilirlik sonuçlarının önbellekte tutulma süresi (saniye) ve kayıt sınırı
+ERISIM_ALANI_ONBELLEK_TTL_S = 30 * 60
+ERISIM_ALANI_ONBELLEK_MAX_KAYIT = 256
+
+# Anlık konumlardan varış tahmini (otobus_varis_tahmini_getir)
+# Bir aracın veya durağın güzergaha atanabilmesi için en fazla uzaklığı (metre)
+ETA_MAX_GUZERGAH_UZAKLIGI_M = 150
+# Hız ölçümü için iki gözlem arasındaki en kısa süre (saniye); daha sık gözlemler (önbellekten
+# gelen aynı yanıt gibi) hız hesabına katılmaz
+ETA_MIN_GOZLEM_ARALIGI_S = 20
+# Bu süreden eski gözlemler hız hesabında kullanılmaz (saniye)
+ETA_GOZLEM_ZAMAN_ASIMI_S = 600
+# Yeni hız ölçümünün üstel ortalamadaki ağırlığı (0-1)
+ETA_HIZ_YUMUSATMA = 0.3
+# Tahminde kullanılan hızın alt ve üst sınırları (km/sa)
+ETA_HIZ_SINIRLARI_KM_SA = (5, 60)
+
+# Canlı konum takibi (hat_konum_takibini_baslat ve kaynak abonelikleri)
+# Abonesi olan her hattın konumlarının yoklanma aralığı (saniye); anlık veri önbelleği süresinden kısa olmamalı
+CANLI_TAKIP_ARALIGI_S = 15
+# Bir yoklama turunda kaynağa aynı anda gönderilecek en fazla istek
+CANLI_TAKIP_ES_ZAMANLI_ISTEK = 8
+# Hat başına saklanan değişiklik kaydı sayısı; daha eski sürümler tam görüntü alır
+CANLI_TAKIP_GECMIS_UZUNLUGU = 50
+# Araçlar üzerinden abone olan bir istemcinin yoklama yapmadan abone kalabileceği süre (saniye)
+CANLI_TAKIP_ABONE_ZAMAN_ASIMI_S = 120
+
+# Konum geçmişi (hat_gozlenen_hizini_getir, hat_yigilmalarini_getir, hat_gercek_sefer_araliklarini_getir)
+# Analizlerde geriye bakılabilecek en uzun süre (dakika)
+KONUM_GECMISI_DK = 60
+# Hat başına dairesel tamponun satır kapasitesi ve geçmişi tutulan en fazla hat sayısı;
+# toplam bellek yaklaşık KAPASITE x MAX_HAT x 25 bayt ile sınırlıdır
+KONUM_GECMISI_HAT_KAPASITESI = 8192
+KONUM_GECMISI_MAX_HAT = 200
+# Aynı aracın iki gözlemi bu süreden (saniye) uzun arayla gelmişse aralarında hız/geçiş hesaplanmaz
+KONUM_GECMISI_MAX_BOSLUK_S = 180
+
+# Çoklu durak panosu (duraklara_yaklasan_otobusleri_getir)
+# Tek çağrıda sorgulanabilecek en fazla durak sayısı
+COKLU_DURAK_MAX_DURAK = 30
+# Varsayılan eş zamanlı istek sınırı ve durak başına bekleme süresi (saniye)
+COKLU_DURAK_ES_ZAMANLI_ISTEK = 8
+COKLU_DURAK_ZAMAN_ASIMI_S = 4.0
+
+# İZBAN ücret tablosu (izban_tutar_hesapla)
+# Tabloda tutulan en fazla aktarma sayısı (0..IZBAN_MAX_AKTARMA)
+IZBAN_MAX_AKTARMA = 3
+# Tablo doldurulurken API'ye gönderilen iki istek arasındaki bekleme (saniye);
+# 41 istasyon için ~13.500 hücre yaklaşık 45 dakikada dolar
+IZBAN_UCRET_ISTEK_ARALIGI_S = 0.2
+# Tamamlanan tablonun tarife değişikliğine karşı kontrol aralığı (saniye) ve kontrolde
+# yeniden sorgulanan rastgele hücre sayısı
+IZBAN_UCRET_KONTROL_ARALIGI_S = 6 * 60 * 60
+IZBAN_UCRET_KONTROL_ORNEGI = 4
+
 # CSV Veri Kaynakları
 SEFER_SAATLERI_CSV_URL = "https://openfiles.izmir.bel.tr/211488/docs/eshot-otobus-hareketsaatleri.csv"
 DURAKLAR_CSV_URL = "https://openfiles.izmir.bel.tr/211488/docs/eshot-otobus-duraklari.csv"
@@ -19,6 +131,18 @@ TRAMVAY_KONAK_KARA_DURAK_MESAFELERI_CSV_URL = "https://acikveri.bizizmir.com/dat
 TRAMVAY_KONAK_DENIZ_DURAK_MESAFELERI_CSV_URL = "https://acikveri.bizizmir.com/dataset/b43d973e-8b98-4572-a944-dc39373ab7cb/resource/33480acc-873b-43e5-aa3d-2bd6d5fb2134/download/tramvay-konak-durak-mesafeleri-sol.csv"
 TRAMVAY_CIGLI_DURAK_MESAFELERI_CSV_URL = "https://acikveri.bizizmir.com/dataset/b43d973e-8b98-4572-a944-dc39373ab7cb/resource/b29426e4-39ae-4b89-8bbd-be6104161fb7/download/tramvay-cigili-durak-mesafeleri.csv"
 
+# Veri Yükleme
+# "arka_plan": sunucu yerel Parquet anlık görüntüleriyle hemen başlar, güncel veriler arka planda indirilir.
+# "senkron": tüm veriler indirilip işlenmeden sunucu başlamaz.
+# "yok": yalnızca yerel Parquet anlık görüntüleri yüklenir, hiçbir kaynak indirilmez (çevrimdışı kullanım ve ölçümler).
+VERI_YUKLEME_MODU = "arka_plan"
+
+# Mekansal İndeks
+MEKANSAL_INDEKS_HUCRE_KM = 0.5
+# Güzergah segmentlerinin kaydedildiği ızgara hücresi boyutu (km)
+GUZERGAH_INDEKS_HUCRE_KM = 0.2
+TOPLU_SORGU_MAX_NOKTA = 1000
+
 HTML_TEMPLATE_FOR_LOCATION = """
 <!DOCTYPE html>
 <html lang="tr">
@@ -1,21 +1,37 @@
 import logging
+import asyncio
+import functools
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 import pandas as pd
 import os
 import urllib.request
+import urllib.error
+import urllib.parse
+import hashlib
+import bisect
+import re
+import random
+import secrets
 import ssl
 import numpy as np
+from thefuzz import fuzz
 from flask import Flask, render_template_string, request, jsonify
 import webbrowser
-from threading import Timer, Event, Thread
+from threading import Timer, Event, Thread, Lock
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import redirect_stdout, redirect_stderr
-from datetime import datetime, time
+from collections import OrderedDict, deque
+from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
+from time import monotonic, sleep, time as zaman_damgasi
 
 
 from mcp.server.fastmcp import FastMCP
+from pydantic import AnyUrl
 
 from config.mcp_tools_config import (
     IZTEK_BASE_URL,
@@ -33,7 +49,57 @@ from config.mcp_tools_config import (
     TRAMVAY_CIGLI_DURAK_MESAFELERI_CSV_URL,
     HTML_TEMPLATE_FOR_LOCATION,
     METRO_BASE_URL,
-    TRAMVAY_BASE_URL
+    TRAMVAY_BASE_URL,
+    VERI_YUKLEME_MODU,
+    MEKANSAL_INDEKS_HUCRE_KM,
+    GUZERGAH_INDEKS_HUCRE_KM,
+    TOPLU_SORGU_MAX_NOKTA,
+    HTTP_ZAMAN_ASIMLARI,
+    HTTP_VARSAYILAN_ZAMAN_ASIMI,
+    HTTP_HAVUZ_BOYUTU,
+    HTTP_MAX_DENEME,
+    HTTP_BEKLEME_TABANI_S,
+    HTTP_MAX_BEKLEME_S,
+    HTTP_DEVRE_KESICI_ESIK,
+    HTTP_DEVRE_KESICI_BEKLEME_S,
+    HESAPLAMA_HAVUZU_BOYUTU,
+    ANLIK_VERI_ONBELLEK_TTL_S,
+    ANLIK_VERI_ONBELLEK_MAX_KAYIT,
+    STATIK_VERI_ONBELLEK_TTL_S,
+    STATIK_VERI_ONBELLEK_MAX_BAYAT_S,
+    ACIKVERI_SAYFA_BOYUTU,
+    ISIM_ARAMA_MIN_BENZERLIK,
+    AKTARMA_YURUME_YARICAPI_KM,
+    YURUME_HIZI_KM_SA,
+    ROTA_ERISIM_YARICAPI_KM,
+    ROTA_PLANLAMA_UFKU_DK,
+    ERISIM_ALANI_ZAMAN_DILIMI_DK,
+    ERISIM_ALANI_IZGARA_KM,
+    ERISIM_ALANI_ONBELLEK_TTL_S,
+    ERISIM_ALANI_ONBELLEK_MAX_KAYIT,
+    OTOBUS_ORT_HIZ_KM_SA,
+    ETA_MAX_GUZERGAH_UZAKLIGI_M,
+    ETA_MIN_GOZLEM_ARALIGI_S,
+    ETA_GOZLEM_ZAMAN_ASIMI_S,
+    ETA_HIZ_YUMUSATMA,
+    ETA_HIZ_SINIRLARI_KM_SA,
+    CANLI_TAKIP_ARALIGI_S,
+    CANLI_TAKIP_ES_ZAMANLI_ISTEK,
+    CANLI_TAKIP_GECMIS_UZUNLUGU,
+    CANLI_TAKIP_ABONE_ZAMAN_ASIMI_S,
+    KONUM_GECMISI_DK,
+    KONUM_GECMISI_HAT_KAPASITESI,
+    KONUM_GECMISI_MAX_HAT,
+    KONUM_GECMISI_MAX_BOSLUK_S,
+    COKLU_DURAK_MAX_DURAK,
+    COKLU_DURAK_ES_ZAMANLI_ISTEK,
+    COKLU_DURAK_ZAMAN_ASIMI_S,
+    IZBAN_MAX_AKTARMA,
+    IZBAN_UCRET_ISTEK_ARALIGI_S,
+    IZBAN_UCRET_KONTROL_ARALIGI_S,
+    IZBAN_UCRET_KONTROL_ORNEGI,
+    RAYLI_SISTEM_SEFERLERI,
+    RAYLI_SISTEM_CALISMA_SAATLERI
 )
 
 logging.basicConfig(
@@ -47,12 +113,42 @@ logger = logging.getLogger(__name__)
 
 mcp = FastMCP("izmir_ulasim")
 
-def _download_csv(url: str, file_path: str) -> bool:
+def _read_download_meta(file_path: str) -> Dict[str, Any]:
+    """
+    Bir CSV dosyasının yanında tutulan indirme bilgisini (ETag, Last-Modified,
+    içerik özeti) okur. Dosya yoksa veya bozuksa boş sözlük döndürür.
+    """
+    try:
+        with open(f"{file_path}.meta.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_download_meta(file_path: str, meta: Dict[str, Any]) -> None:
+    """
+    İndirme bilgisini CSV dosyasının yanına `<dosya>.meta.json` olarak yazar.
+    """
+    meta_path = f"{file_path}.meta.json"
+    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+def _download_csv(url: str, file_path: str) -> Optional[bool]:
     """
     Verilen URL'den bir CSV dosyasını indirir ve belirtilen yola kaydeder.
-    Mevcut dosyanın üzerine yazar. SSL doğrulaması atlanır.
+    SSL doğrulaması atlanır.
+
+    Yerel dosya mevcutsa önceki yanıtın ETag ve Last-Modified değerleri ile
+    koşullu istek (If-None-Match / If-Modified-Since) gönderilir. Sunucu 304
+    döndürürse veya indirilen içeriğin SHA-256 özeti öncekiyle aynıysa dosyaya
+    dokunulmaz.
+
+    Returns:
+        İçerik değiştiyse True, değişmediyse False, indirme başarısızsa None.
     """
     logger.info(f"'{os.path.basename(file_path)}' için '{url}' adresinden güncel veri indiriliyor...")
+    tmp_path = f"{file_path}.tmp"
+    meta = _read_download_meta(file_path) if os.path.exists(file_path) else {}
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
@@ -60,14 +156,91 @@ def _download_csv(url: str, file_path: str) -> bool:
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
 
-        with urllib.request.urlopen(url, context=ssl_context) as response, \
-             open(file_path, 'wb') as out_file:
-            out_file.write(response.read())
-        logger.info(f"'{os.path.basename(file_path)}' başarıyla indirildi ve güncellendi.")
-        return True
+        headers = {}
+        if meta.get('url') == url:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        sha256 = hashlib.sha256()
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, context=ssl_context) as response, \
+             open(tmp_path, 'wb') as out_file:
+            while chunk := response.read(64 * 1024):
+                sha256.update(chunk)
+                out_file.write(chunk)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        content_hash = sha256.hexdigest()
+        degisti = content_hash != meta.get('sha256')
+        if degisti:
+            os.replace(tmp_path, file_path)
+        else:
+            os.remove(tmp_path)
+
+        _write_download_meta(file_path, {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'sha256': content_hash
+        })
+        if degisti:
+            logger.info(f"'{os.path.basename(file_path)}' başarıyla indirildi ve güncellendi.")
+        else:
+            logger.info(f"'{os.path.basename(file_path)}' indirildi ancak içerik değişmemiş.")
+        return degisti
+    except urllib.error.HTTPError as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if e.code == 304:
+            logger.info(f"'{os.path.basename(file_path)}' sunucuda değişmemiş (304), yerel kopya kullanılacak.")
+            return False
+        logger.error(f"'{os.path.basename(file_path)}' indirilirken hata oluştu: {e}")
+        return None
     except Exception as e:
         logger.error(f"'{os.path.basename(file_path)}' indirilirken hata oluştu: {e}")
-        return False
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+def _write_parquet_atomic(df: pd.DataFrame, file_path: str, raw_csv_path: Optional[str] = None) -> None:
+    """
+    DataFrame'i önce geçici bir dosyaya yazar, ardından hedefin üzerine taşır.
+    Böylece aynı anda okunan anlık görüntü (snapshot) hiçbir zaman yarım kalmaz.
+    `raw_csv_path` verilirse Parquet'in hangi CSV içeriğinden (SHA-256) üretildiği
+    Parquet'in yanına kaydedilir.
+    """
+    tmp_path = f"{file_path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, file_path)
+    if raw_csv_path is not None:
+        _write_download_meta(file_path, {'kaynak_sha256': _read_download_meta(raw_csv_path).get('sha256')})
+
+def _load_unchanged_parquet(processed_parquet_path: str, raw_csv_path: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Kaynak CSV değişmediğinde CSV'yi yeniden işlemek yerine mevcut Parquet
+    dosyasını okur. Dönen DataFrame `attrs['kaynak_degismedi']` ile işaretlenir.
+    `raw_csv_path` verilirse Parquet yalnızca bu CSV'nin güncel içeriğinden
+    üretilmişse kullanılır; önceki bir indirmenin işlenmesi yarıda kaldıysa CSV
+    yeniden işlenir. Parquet dosyası yoksa veya okunamazsa None döndürür.
+    """
+    if not os.path.exists(processed_parquet_path):
+        return None
+    if raw_csv_path is not None:
+        kaynak_sha256 = _read_download_meta(processed_parquet_path).get('kaynak_sha256')
+        if kaynak_sha256 is None or kaynak_sha256 != _read_download_meta(raw_csv_path).get('sha256'):
+            logger.info(f"'{os.path.basename(processed_parquet_path)}' güncel CSV'den üretilmemiş, CSV yeniden işlenecek.")
+            return None
+    try:
+        df = pd.read_parquet(processed_parquet_path)
+    except Exception as e:
+        logger.warning(f"'{processed_parquet_path}' okunamadı, ham veri yeniden işlenecek: {e}")
+        return None
+    df.attrs['kaynak_degismedi'] = True
+    logger.info(f"Kaynak veri değişmediği için '{os.path.basename(processed_parquet_path)}' yeniden işlenmeden kullanılıyor.")
+    return df
 
 def load_or_process_stops_data(
     raw_csv_filename='eshot-otobus-duraklari.csv',
@@ -81,9 +254,14 @@ def load_or_process_stops_data(
     raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(DURAKLAR_CSV_URL, raw_csv_path):
+    degisti = _download_csv(DURAKLAR_CSV_URL, raw_csv_path)
+    if degisti is None:
         logger.error(f"Durak CSV dosyası indirilemediği için durak verisi yüklenemedi.")
         return None
+    if not degisti:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path, raw_csv_path)
+        if onceki_df is not None:
+            return onceki_df
 
     try:
         logger.info(f"İndirilen ham durak verisi '{raw_csv_path}' işleniyor...")
@@ -95,7 +273,7 @@ def load_or_process_stops_data(
 
         df = df.dropna(subset=['ENLEM', 'BOYLAM'])
 
-        df.to_parquet(processed_parquet_path, index=False)
+        _write_parquet_atomic(df, processed_parquet_path, raw_csv_path)
         logger.info(f"Temizlenmiş durak verisi '{processed_parquet_path}' olarak başarıyla kaydedildi.")
 
         return df
@@ -119,9 +297,14 @@ def load_or_process_route_coords_data(
     raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(HAT_GUZERGAH_KOORDINATLARI_CSV_URL, raw_csv_path):
+    degisti = _download_csv(HAT_GUZERGAH_KOORDINATLARI_CSV_URL, raw_csv_path)
+    if degisti is None:
         logger.error(f"Güzergah koordinatları CSV dosyası indirilemediği için veri yüklenemedi.")
         return None
+    if not degisti:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path, raw_csv_path)
+        if onceki_df is not None:
+            return onceki_df
 
     try:
         logger.info(f"İndirilen ham güzergah koordinat verisi '{raw_csv_path}' işleniyor...")
@@ -147,7 +330,7 @@ def load_or_process_route_coords_data(
         df['HAT_NO'] = df['HAT_NO'].astype(int)
         df['SIRA'] = df['SIRA'].astype(int)
 
-        df.to_parquet(processed_parquet_path, index=False)
+        _write_parquet_atomic(df, processed_parquet_path, raw_csv_path)
         logger.info(f"Temizlenmiş güzergah koordinat verisi '{processed_parquet_path}' olarak başarıyla kaydedildi.")
 
         return df
@@ -171,9 +354,14 @@ def load_or_process_izban_stations_data(
     raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(IZBAN_ISTASYONLAR_CSV_URL, raw_csv_path):
+    degisti = _download_csv(IZBAN_ISTASYONLAR_CSV_URL, raw_csv_path)
+    if degisti is None:
         logger.error(f"İZBAN istasyon CSV dosyası indirilemediği için veri yüklenemedi.")
         return None
+    if not degisti:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path, raw_csv_path)
+        if onceki_df is not None:
+            return onceki_df
 
     try:
         logger.info(f"İndirilen ham İZBAN istasyon verisi '{raw_csv_path}' işleniyor...")
@@ -185,7 +373,7 @@ def load_or_process_izban_stations_data(
 
         df = df.dropna(subset=['ENLEM', 'BOYLAM'])
 
-        df.to_parquet(processed_parquet_path, index=False)
+        _write_parquet_atomic(df, processed_parquet_path, raw_csv_path)
         logger.info(f"Temizlenmiş İZBAN istasyon verisi '{processed_parquet_path}' olarak başarıyla kaydedildi.")
 
         return df
@@ -197,213 +385,961 @@ def load_or_process_izban_stations_data(
         logger.error(f"Ham İZBAN istasyon dosyası ('{raw_csv_path}') işlenirken genel bir hata oluştu: {e}")
         return None
 
-def load_or_process_metro_distances_data(
-    raw_csv_filename='metro-durak-mesafeleri.csv',
-    processed_parquet_filename='processed_metro_distances.parquet'
-) -> Optional[pd.DataFrame]:
+# Raylı sistem hatlarının istasyon arası mesafe kaynakları. Yeni bir hat eklemek için
+# buraya bir kayıt eklemek yeterlidir; yükleyicisi, veri seti ve mesafe araçları bu tablodan oluşur.
+_RAYLI_HATLAR: Dict[str, Dict[str, Any]] = {
+    'metro': {
+        'ad': "Metro", 'birim': 'istasyon', 'mod': 'metro',
+        'url': METRO_DURAK_MESAFELERI_CSV_URL, 'ham_csv': 'metro-durak-mesafeleri.csv', 'ayrac': ',',
+        'degisken': 'metro_distances_df', 'parquet': 'processed_metro_distances.parquet',
+    },
+    'karsiyaka_tram': {
+        'ad': "Karşıyaka tramvay", 'birim': 'istasyon', 'mod': 'tramvay',
+        'url': TRAMVAY_KARSIYAKA_DURAK_MESAFELERI_CSV_URL, 'ham_csv': 'tramvay-karsiyaka-durak-mesafeleri.csv', 'ayrac': ';',
+        'degisken': 'karsiyaka_tram_distances_df', 'parquet': 'processed_karsiyaka_tram_distances.parquet',
+    },
+    'konak_tram_kara': {
+        'ad': "Konak tramvay", 'birim': 'durak', 'mod': 'tramvay',
+        'url': TRAMVAY_KONAK_KARA_DURAK_MESAFELERI_CSV_URL, 'ham_csv': 'tramvay-konak-durak-mesafeleri-sag.csv', 'ayrac': ';',
+        'degisken': 'konak_tram_distances_df', 'parquet': 'processed_konak_tram_distances.parquet',
+    },
+    'konak_tram_deniz': {
+        'ad': "Konak tramvay (deniz)", 'birim': 'durak', 'mod': 'tramvay',
+        'url': TRAMVAY_KONAK_DENIZ_DURAK_MESAFELERI_CSV_URL, 'ham_csv': 'tramvay-konak-durak-mesafeleri-sol.csv', 'ayrac': ';',
+        'degisken': 'konak_tram_deniz_distances_df', 'parquet': 'processed_konak_tram_deniz_distances.parquet',
+    },
+    'cigli_tram': {
+        'ad': "Çiğli tramvay", 'birim': 'durak', 'mod': 'tramvay',
+        'url': TRAMVAY_CIGLI_DURAK_MESAFELERI_CSV_URL, 'ham_csv': 'tramvay-cigili-durak-mesafeleri.csv', 'ayrac': ',',
+        'degisken': 'cigli_tram_distances_df', 'parquet': 'processed_cigli_tram_distances.parquet',
+    },
+}
+
+def load_or_process_rail_distances_data(hat: str) -> Optional[pd.DataFrame]:
     """
-    Metro istasyonları arası mesafe verilerini CSV'den indirir,
-    kümülatif mesafeyi hesaplar, Parquet olarak kaydeder ve sonucu döndürür.
+    `_RAYLI_HATLAR` tablosundaki bir raylı sistem hattının istasyonlar arası mesafe
+    verilerini CSV'den indirir, kümülatif mesafeyi hesaplar, Parquet olarak kaydeder
+    ve sonucu döndürür.
     """
+    tanim = _RAYLI_HATLAR[hat]
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
-    processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
+    raw_csv_path = os.path.join(script_dir, 'data', tanim['ham_csv'])
+    processed_parquet_path = os.path.join(script_dir, 'data', tanim['parquet'])
 
-    if not _download_csv(METRO_DURAK_MESAFELERI_CSV_URL, raw_csv_path):
-        logger.error("Metro mesafe CSV'si indirilemediği için veri yüklenemedi.")
+    degisti = _download_csv(tanim['url'], raw_csv_path)
+    if degisti is None:
+        logger.error(f"{tanim['ad']} mesafe CSV'si indirilemediği için veri yüklenemedi.")
         return None
+    if not degisti:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path, raw_csv_path)
+        if onceki_df is not None:
+            return onceki_df
 
     try:
-        logger.info(f"İndirilen ham metro mesafe verisi '{raw_csv_path}' işleniyor...")
-        
-        df = pd.read_csv(raw_csv_path)
-        
+        logger.info(f"İndirilen ham {tanim['ad']} mesafe verisi '{raw_csv_path}' işleniyor...")
+
+        df = pd.read_csv(raw_csv_path, delimiter=tanim['ayrac'])
+
         df['MESAFE'] = pd.to_numeric(df['MESAFE'], errors='coerce')
         df = df.dropna(subset=['MESAFE'])
         df = df.sort_values('ISTASYON_SIRASI').reset_index(drop=True)
-        
+
         df['KUMULATIF_MESAFE'] = df['MESAFE'].cumsum()
 
-        df.to_parquet(processed_parquet_path, index=False)
-        logger.info(f"İşlenmiş metro mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
+        _write_parquet_atomic(df, processed_parquet_path, raw_csv_path)
+        logger.info(f"İşlenmiş {tanim['ad']} mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
 
         return df
-        
+
     except FileNotFoundError:
         logger.error(f"HATA: Ham veri dosyası '{raw_csv_path}' bulunamadı!")
         return None
     except Exception as e:
-        logger.error(f"Ham metro mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
+        logger.error(f"Ham {tanim['ad']} mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
         return None
 
-def load_or_process_karsiyaka_tram_distances_data(
-    raw_csv_filename='tramvay-karsiyaka-durak-mesafeleri.csv',
-    processed_parquet_filename='processed_karsiyaka_tram_distances.parquet'
+def load_or_process_schedules_data(
+    raw_csv_filename='eshot-otobus-hareketsaatleri.csv',
+    processed_parquet_filename='processed_schedules.parquet'
 ) -> Optional[pd.DataFrame]:
     """
-    Karşıyaka tramvay istasyonları arası mesafe verilerini CSV'den indirir,
-    kümülatif mesafeyi hesaplar, Parquet olarak kaydeder ve sonucu döndürür.
+    Otobüs sefer saatlerini CSV'den indirir, hat numarasına göre sıralar,
+    Parquet olarak kaydeder ve sonucu döndürür. Sıralama, hat bazlı
+    sorguların ikili arama ile yapılabilmesini sağlar.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(TRAMVAY_KARSIYAKA_DURAK_MESAFELERI_CSV_URL, raw_csv_path):
-        logger.error("Karşıyaka tramvay mesafe CSV'si indirilemediği için veri yüklenemedi.")
+    degisti = _download_csv(SEFER_SAATLERI_CSV_URL, raw_csv_path)
+    if degisti is None:
+        logger.error("Sefer saatleri CSV'si indirilemediği için veri yüklenemedi.")
         return None
+    if not degisti:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path, raw_csv_path)
+        if onceki_df is not None:
+            return onceki_df
 
     try:
-        logger.info(f"İndirilen ham Karşıyaka tramvay mesafe verisi '{raw_csv_path}' işleniyor...")
+        logger.info(f"İndirilen ham sefer saatleri verisi '{raw_csv_path}' işleniyor...")
 
-        df = pd.read_csv(raw_csv_path, delimiter=';')
-        
-        df['MESAFE'] = pd.to_numeric(df['MESAFE'], errors='coerce')
-        df = df.dropna(subset=['MESAFE'])
-        df = df.sort_values('ISTASYON_SIRASI').reset_index(drop=True)
-        
-        df['KUMULATIF_MESAFE'] = df['MESAFE'].cumsum()
+        df = pd.read_csv(raw_csv_path, sep=';')
 
-        df.to_parquet(processed_parquet_path, index=False)
-        logger.info(f"İşlenmiş Karşıyaka tramvay mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
+        df['HAT_NO'] = pd.to_numeric(df['HAT_NO'], errors='coerce')
+        df = df.dropna(subset=['HAT_NO'])
+        df['HAT_NO'] = df['HAT_NO'].astype(int)
+        df = df.sort_values('HAT_NO', kind='stable').reset_index(drop=True)
+
+        _write_parquet_atomic(df, processed_parquet_path, raw_csv_path)
+        logger.info(f"İşlenmiş sefer saatleri verisi '{processed_parquet_path}' olarak kaydedildi.")
 
         return df
-        
+
     except FileNotFoundError:
         logger.error(f"HATA: Ham veri dosyası '{raw_csv_path}' bulunamadı!")
         return None
     except Exception as e:
-        logger.error(f"Ham Karşıyaka tramvay mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
+        logger.error(f"Ham sefer saatleri dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
         return None
 
-def load_or_process_konak_tram_distances_data(
-    raw_csv_filename='tramvay-konak-durak-mesafeleri-sag.csv',
-    processed_parquet_filename='processed_konak_tram_distances.parquet'
+def _load_or_process_acikveri_resource(
+    resource_id: str,
+    processed_parquet_filename: str,
+    aciklama: str
 ) -> Optional[pd.DataFrame]:
     """
-    Konak tramvay istasyonları arası mesafe verilerini CSV'den indirir,
-    kümülatif mesafeyi hesaplar, Parquet olarak kaydeder ve sonucu döndürür.
+    ACIKVERI (CKAN) datastore kaynağının tüm kayıtlarını sayfalı `datastore_search`
+    istekleriyle indirir ve Parquet olarak kaydeder. Kaynağın `last_modified`
+    değeri son indirmedekiyle aynıysa indirme yapılmaz, mevcut Parquet kullanılır.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(TRAMVAY_KONAK_KARA_DURAK_MESAFELERI_CSV_URL, raw_csv_path):
-        logger.error("Konak tramvay mesafe CSV'si indirilemediği için veri yüklenemedi.")
+    try:
+        response = _http_get(f"{ACIKVERI_BASE_URL}/resource_show", params={'id': resource_id})
+        response.raise_for_status()
+        kaynak = response.json().get('result', {})
+        son_degisiklik = kaynak.get('last_modified') or kaynak.get('metadata_modified')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"{aciklama} kaynak bilgisi alınamadığı için veri yüklenemedi: {e}")
         return None
 
+    meta = _read_download_meta(processed_parquet_path)
+    if son_degisiklik and meta.get('resource_id') == resource_id and meta.get('last_modified') == son_degisiklik:
+        onceki_df = _load_unchanged_parquet(processed_parquet_path)
+        if onceki_df is not None:
+            return onceki_df
+
     try:
-        logger.info(f"İndirilen ham Konak tramvay mesafe verisi '{raw_csv_path}' işleniyor...")
+        logger.info(f"{aciklama} kayıtları ACIKVERI'den indiriliyor...")
+        kayitlar: List[Dict[str, Any]] = []
+        while True:
+            response = _http_get(f"{ACIKVERI_BASE_URL}/datastore_search", params={
+                'resource_id': resource_id,
+                'limit': ACIKVERI_SAYFA_BOYUTU,
+                'offset': len(kayitlar)
+            })
+            response.raise_for_status()
+            data = response.json()
+            if not data.get('success'):
+                logger.error(f"ACIKVERI API hatası: {data.get('error')}")
+                return None
+            sayfa = data.get('result', {}).get('records', [])
+            kayitlar.extend(sayfa)
+            if len(sayfa) < ACIKVERI_SAYFA_BOYUTU or len(kayitlar) >= data['result'].get('total', 0):
+                break
 
-        df = pd.read_csv(raw_csv_path, delimiter=';')
-        
-        df['MESAFE'] = pd.to_numeric(df['MESAFE'], errors='coerce')
-        df = df.dropna(subset=['MESAFE'])
-        df = df.sort_values('ISTASYON_SIRASI').reset_index(drop=True)
-        
-        df['KUMULATIF_MESAFE'] = df['MESAFE'].cumsum()
+        df = pd.DataFrame.from_records(kayitlar)
 
-        df.to_parquet(processed_parquet_path, index=False)
-        logger.info(f"İşlenmiş Konak tramvay mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
+        _write_parquet_atomic(df, processed_parquet_path)
+        _write_download_meta(processed_parquet_path, {'resource_id': resource_id, 'last_modified': son_degisiklik})
+        logger.info(f"{len(df)} {aciklama} kaydı '{processed_parquet_path}' olarak kaydedildi.")
 
         return df
-        
-    except FileNotFoundError:
-        logger.error(f"HATA: Ham veri dosyası '{raw_csv_path}' bulunamadı!")
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"{aciklama} kayıtları indirilirken hata oluştu: {e}")
         return None
     except Exception as e:
-        logger.error(f"Ham Konak tramvay mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
+        logger.error(f"{aciklama} kayıtları işlenirken hata oluştu: {e}", exc_info=True)
         return None
 
-def load_or_process_konak_tram_deniz_distances_data(
-    raw_csv_filename='tramvay-konak-durak-mesafeleri-sol.csv',
-    processed_parquet_filename='processed_konak_tram_deniz_distances.parquet'
+def load_or_process_line_search_data(
+    processed_parquet_filename='processed_hat_arama.parquet'
+) -> Optional[pd.DataFrame]:
+    """
+    Hat arama kaynağının (hat no, adı, güzergahı) tüm kayıtlarını yükler.
+    """
+    return _load_or_process_acikveri_resource(HAT_ARAMA_RESOURCE_ID, processed_parquet_filename, "Hat arama")
+
+def load_or_process_line_details_data(
+    processed_parquet_filename='processed_hat_detaylari.parquet'
+) -> Optional[pd.DataFrame]:
+    """
+    Hat detayları kaynağının (çalışma saatleri vb.) tüm kayıtlarını yükler.
+    """
+    return _load_or_process_acikveri_resource(HAT_DETAYLARI_RESOURCE_ID, processed_parquet_filename, "Hat detayları")
+
+RAYLI_ISTASYON_TURLERI = ['Metro İstasyonu', 'Tramvay İstasyonu']
+
+def _alan(kayit: Dict[str, Any], *adaylar: str) -> Any:
+    """API kaydında, aday alan adlarından ilk bulunanın değerini büyük/küçük harf gözetmeden döndürür."""
+    kucuk_harfli = {str(k).lower(): v for k, v in kayit.items()}
+    for aday in adaylar:
+        if aday.lower() in kucuk_harfli:
+            return kucuk_harfli[aday.lower()]
+    return None
+
+def _rayli_istasyon_kaydi(istasyon: Dict[str, Any], tur: str, hat: Any) -> Dict[str, Any]:
+    return {
+        'TUR': tur,
+        'ID': _alan(istasyon, 'IstasyonId', 'Id'),
+        'ADI': _alan(istasyon, 'IstasyonAdi', 'Adi', 'Ad', 'Name'),
+        'HAT': hat,
+        'ENLEM': _alan(istasyon, 'Enlem', 'Latitude', 'Lat'),
+        'BOYLAM': _alan(istasyon, 'Boylam', 'Longitude', 'Lng', 'Lon'),
+    }
+
+def load_or_process_rail_stations_data(
+    processed_parquet_filename='processed_rail_stations.parquet'
 ) -> Optional[pd.DataFrame]:
     """
-    Konak tramvay (deniz tarafı) durakları arası mesafe verilerini indirir,
-    kümülatif mesafeyi hesaplar, Parquet olarak kaydeder ve sonucu döndürür.
+    Metro ve tramvay istasyonlarının adlarını ve konumlarını API'den alır,
+    tek bir tabloda birleştirip Parquet olarak kaydeder ve sonucu döndürür.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(TRAMVAY_KONAK_DENIZ_DURAK_MESAFELERI_CSV_URL, raw_csv_path):
-        logger.error("Konak tramvay (deniz) mesafe CSV'si indirilemediği için veri yüklenemedi.")
-        return None
-
     try:
-        logger.info(f"İndirilen ham Konak tramvay (deniz) mesafe verisi '{raw_csv_path}' işleniyor...")
+        logger.info("Metro ve tramvay istasyon konumları API'den alınıyor...")
+        kayitlar: List[Dict[str, Any]] = []
 
-        df = pd.read_csv(raw_csv_path, delimiter=';')
-        
-        df['MESAFE'] = pd.to_numeric(df['MESAFE'], errors='coerce')
-        df = df.dropna(subset=['MESAFE'])
-        df = df.sort_values('ISTASYON_SIRASI').reset_index(drop=True)
-        
-        df['KUMULATIF_MESAFE'] = df['MESAFE'].cumsum()
+        response = _http_get(f"{METRO_BASE_URL}/istasyonlar")
+        response.raise_for_status()
+        if response.status_code != 204:
+            kayitlar.extend(_rayli_istasyon_kaydi(ist, RAYLI_ISTASYON_TURLERI[0], "Metro") for ist in response.json())
 
-        df.to_parquet(processed_parquet_path, index=False)
-        logger.info(f"İşlenmiş Konak tramvay (deniz) mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
+        response = _http_get(f"{TRAMVAY_BASE_URL}/hatlar")
+        response.raise_for_status()
+        hatlar = response.json() if response.status_code != 204 else []
+        for hat in hatlar:
+            hat_id = _alan(hat, 'HatId', 'Id')
+            response = _http_get(f"{TRAMVAY_BASE_URL}/istasyonlar/{hat_id}")
+            response.raise_for_status()
+            if response.status_code == 204:
+                continue
+            hat_adi = _alan(hat, 'HatAdi', 'Adi', 'Ad') or hat_id
+            kayitlar.extend(_rayli_istasyon_kaydi(ist, RAYLI_ISTASYON_TURLERI[1], hat_adi) for ist in response.json())
+
+        df = pd.DataFrame.from_records(kayitlar, columns=['TUR', 'ID', 'ADI', 'HAT', 'ENLEM', 'BOYLAM'])
+        df['ID'] = pd.to_numeric(df['ID'], errors='coerce')
+        df['ENLEM'] = pd.to_numeric(df['ENLEM'], errors='coerce')
+        df['BOYLAM'] = pd.to_numeric(df['BOYLAM'], errors='coerce')
+        df['HAT'] = df['HAT'].astype(str)
+        df = df.dropna(subset=['ID', 'ENLEM', 'BOYLAM']).astype({'ID': 'int64'}).reset_index(drop=True)
+
+        _write_parquet_atomic(df, processed_parquet_path)
+        logger.info(f"{len(df)} metro/tramvay istasyonu '{processed_parquet_path}' olarak kaydedildi.")
 
         return df
-        
-    except FileNotFoundError:
-        logger.error(f"HATA: Ham veri dosyası '{raw_csv_path}' bulunamadı!")
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Metro/tramvay istasyon konumları alınırken hata oluştu: {e}")
         return None
     except Exception as e:
-        logger.error(f"Ham Konak tramvay (deniz) mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
+        logger.error(f"Metro/tramvay istasyon konumları işlenirken hata oluştu: {e}", exc_info=True)
         return None
 
-def load_or_process_cigli_tram_distances_data(
-    raw_csv_filename='tramvay-cigili-durak-mesafeleri.csv',
-    processed_parquet_filename='processed_cigli_tram_distances.parquet'
+def _aktarma_dugumleri() -> pd.DataFrame:
+    """
+    Otobüs durakları, İZBAN, metro ve tramvay istasyonlarını (TUR, ID, ADI, ENLEM, BOYLAM)
+    sütunlarına sahip tek bir tabloda birleştirir. Yüklenmemiş veri setleri atlanır.
+    """
+    parcalar = []
+    if stops_df is not None:
+        parcalar.append(pd.DataFrame({
+            'TUR': KONUM_TURLERI[0], 'ID': stops_df['DURAK_ID'], 'ADI': stops_df['DURAK_ADI'],
+            'ENLEM': stops_df['ENLEM'], 'BOYLAM': stops_df['BOYLAM']
+        }))
+    if izban_stations_df is not None:
+        parcalar.append(pd.DataFrame({
+            'TUR': KONUM_TURLERI[1], 'ID': izban_stations_df['ISTASYON_ID'], 'ADI': izban_stations_df['ISTASYON_ADI'],
+            'ENLEM': izban_stations_df['ENLEM'], 'BOYLAM': izban_stations_df['BOYLAM']
+        }))
+    if rail_stations_df is not None:
+        # Aynı istasyon birden çok tramvay hattında listelenebilir.
+        parcalar.append(rail_stations_df.drop_duplicates(['TUR', 'ID'])[['TUR', 'ID', 'ADI', 'ENLEM', 'BOYLAM']])
+    if not parcalar:
+        return pd.DataFrame(columns=['TUR', 'ID', 'ADI', 'ENLEM', 'BOYLAM'])
+    return pd.concat(parcalar, ignore_index=True).dropna(subset=['ENLEM', 'BOYLAM']).reset_index(drop=True)
+
+def load_or_process_walking_transfers_data(
+    processed_parquet_filename='processed_yurume_aktarmalari.parquet'
 ) -> Optional[pd.DataFrame]:
     """
-    Çiğli tramvay durakları arası mesafe verilerini CSV'den indirir,
-    kümülatif mesafeyi hesaplar, Parquet olarak kaydeder ve sonucu döndürür.
+    Otobüs durakları, İZBAN, metro ve tramvay istasyonları arasında
+    `AKTARMA_YURUME_YARICAPI_KM` içinde kalan tüm (yönlü) çiftleri mekansal
+    birleştirme ile bulur ve mesafe/yürüme süresiyle birlikte Parquet olarak kaydeder.
+    Girdi veri setleri son hesaplamadakiyle aynıysa mevcut Parquet kullanılır.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    raw_csv_path = os.path.join(script_dir, 'data', raw_csv_filename)
     processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
 
-    if not _download_csv(TRAMVAY_CIGLI_DURAK_MESAFELERI_CSV_URL, raw_csv_path):
-        logger.error("Çiğli tramvay mesafe CSV'si indirilemediği için veri yüklenemedi.")
-        return None
-
     try:
-        logger.info(f"İndirilen ham Çiğli tramvay mesafe verisi '{raw_csv_path}' işleniyor...")
-
-        df = pd.read_csv(raw_csv_path)
-        
-        df['MESAFE'] = pd.to_numeric(df['MESAFE'], errors='coerce')
-        df = df.dropna(subset=['MESAFE'])
-        df = df.sort_values('ISTASYON_SIRASI').reset_index(drop=True)
-        
-        df['KUMULATIF_MESAFE'] = df['MESAFE'].cumsum()
+        dugumler = _aktarma_dugumleri()
+        if dugumler.empty:
+            logger.error("Durak/istasyon verileri yüklenemediği için yürüme aktarmaları hesaplanamadı.")
+            return None
 
-        df.to_parquet(processed_parquet_path, index=False)
-        logger.info(f"İşlenmiş Çiğli tramvay mesafe verisi '{processed_parquet_path}' olarak kaydedildi.")
+        imza = hashlib.sha256(
+            pd.util.hash_pandas_object(dugumler[['TUR', 'ID', 'ENLEM', 'BOYLAM']], index=False).to_numpy().tobytes()
+            + f"{AKTARMA_YURUME_YARICAPI_KM}:{YURUME_HIZI_KM_SA}".encode()
+        ).hexdigest()
+        if _read_download_meta(processed_parquet_path).get('imza') == imza:
+            onceki_df = _load_unchanged_parquet(processed_parquet_path)
+            if onceki_df is not None:
+                return onceki_df
+
+        logger.info(f"{len(dugumler)} durak/istasyon arasındaki yürüme aktarmaları hesaplanıyor...")
+        indeks = _MekansalIndeks(dugumler.assign(SATIR=np.arange(len(dugumler))))
+        kaynak, hedef, mesafe_km = indeks.yaricap_icindekiler_toplu(indeks.enlem, indeks.boylam, AKTARMA_YURUME_YARICAPI_KM)
+        satirlar = indeks.kayitlar['SATIR'].to_numpy()
+        kaynak, hedef = satirlar[kaynak], satirlar[hedef]
+        farkli = kaynak != hedef
+        kaynak, hedef, mesafe_km = kaynak[farkli], hedef[farkli], mesafe_km[farkli]
+
+        df = pd.DataFrame({
+            'KAYNAK_TUR': dugumler['TUR'].to_numpy()[kaynak],
+            'KAYNAK_ID': dugumler['ID'].to_numpy()[kaynak],
+            'HEDEF_TUR': dugumler['TUR'].to_numpy()[hedef],
+            'HEDEF_ID': dugumler['ID'].to_numpy()[hedef],
+            'HEDEF_ADI': dugumler['ADI'].to_numpy()[hedef],
+            'HEDEF_ENLEM': dugumler['ENLEM'].to_numpy()[hedef],
+            'HEDEF_BOYLAM': dugumler['BOYLAM'].to_numpy()[hedef],
+            'MESAFE_M': np.rint(mesafe_km * 1000).astype(np.int32),
+            'YURUME_DK': np.round(mesafe_km / YURUME_HIZI_KM_SA * 60, 1),
+        })
+        df = df.sort_values(['KAYNAK_TUR', 'KAYNAK_ID', 'MESAFE_M'], kind='stable').reset_index(drop=True)
+
+        _write_parquet_atomic(df, processed_parquet_path)
+        _write_download_meta(processed_parquet_path, {'imza': imza})
+        logger.info(f"{len(df)} yürüme aktarması '{processed_parquet_path}' olarak kaydedildi.")
 
         return df
-        
-    except FileNotFoundError:
-        logger.error(f"HATA: Ham veri dosyası '{raw_csv_path}' bulunamadı!")
+
+    except Exception as e:
+        logger.error(f"Yürüme aktarmaları hesaplanırken hata oluştu: {e}", exc_info=True)
+        return None
+
+# --- Veri Setlerinin Yüklenmesi: Anlık Görüntüler ve Arka Planda Yenileme ---
+stops_df: Optional[pd.DataFrame] = None
+route_coords_df: Optional[pd.DataFrame] = None
+izban_stations_df: Optional[pd.DataFrame] = None
+metro_distances_df: Optional[pd.DataFrame] = None
+karsiyaka_tram_distances_df: Optional[pd.DataFrame] = None
+konak_tram_distances_df: Optional[pd.DataFrame] = None
+konak_tram_deniz_distances_df: Optional[pd.DataFrame] = None
+cigli_tram_distances_df: Optional[pd.DataFrame] = None
+schedules_df: Optional[pd.DataFrame] = None
+line_search_df: Optional[pd.DataFrame] = None
+line_details_df: Optional[pd.DataFrame] = None
+rail_stations_df: Optional[pd.DataFrame] = None
+walking_transfers_df: Optional[pd.DataFrame] = None
+
+# (modül değişkeni, yükleyici fonksiyon, işlenmiş Parquet anlık görüntüsü)
+_VERI_SETLERI: List[Tuple[str, Callable[[], Optional[pd.DataFrame]], str]] = [
+    ('stops_df', load_or_process_stops_data, 'processed_stops.parquet'),
+    ('route_coords_df', load_or_process_route_coords_data, 'processed_route_coords.parquet'),
+    ('izban_stations_df', load_or_process_izban_stations_data, 'processed_izban_stations.parquet'),
+    *(
+        (tanim['degisken'], functools.partial(load_or_process_rail_distances_data, hat), tanim['parquet'])
+        for hat, tanim in _RAYLI_HATLAR.items()
+    ),
+    ('schedules_df', load_or_process_schedules_data, 'processed_schedules.parquet'),
+    ('line_search_df', load_or_process_line_search_data, 'processed_hat_arama.parquet'),
+    ('line_details_df', load_or_process_line_details_data, 'processed_hat_detaylari.parquet'),
+    ('rail_stations_df', load_or_process_rail_stations_data, 'processed_rail_stations.parquet'),
+    # Diğer konum veri setlerinden türetildiği için onlardan sonra yüklenmelidir.
+    ('walking_transfers_df', load_or_process_walking_transfers_data, 'processed_yurume_aktarmalari.parquet'),
+]
+
+veriler_hazir = Event()
+_veri_kilidi = Lock()
+_veri_durumu: Dict[str, Dict[str, Any]] = {}
+_veri_dinleyicileri: Dict[str, List[Callable[[pd.DataFrame], None]]] = {}
+
+def _load_parquet_snapshot(processed_parquet_filename: str) -> Optional[pd.DataFrame]:
+    """
+    `data/` klasöründeki son başarılı işlenmiş Parquet anlık görüntüsünü okur.
+    Dosya yoksa veya okunamazsa None döndürür.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    processed_parquet_path = os.path.join(script_dir, 'data', processed_parquet_filename)
+
+    if not os.path.exists(processed_parquet_path):
+        logger.warning(f"'{processed_parquet_filename}' anlık görüntüsü bulunamadı, güncel veri beklenecek.")
         return None
+    try:
+        return pd.read_parquet(processed_parquet_path)
     except Exception as e:
-        logger.error(f"Ham Çiğli tramvay mesafe dosyası ('{raw_csv_path}') işlenirken hata oluştu: {e}", exc_info=True)
+        logger.error(f"'{processed_parquet_filename}' anlık görüntüsü okunurken hata oluştu: {e}")
         return None
 
-stops_df = load_or_process_stops_data()
-route_coords_df = load_or_process_route_coords_data()
-izban_stations_df = load_or_process_izban_stations_data()
-metro_distances_df = load_or_process_metro_distances_data()
-karsiyaka_tram_distances_df = load_or_process_karsiyaka_tram_distances_data()
-konak_tram_distances_df = load_or_process_konak_tram_distances_data()
-konak_tram_deniz_distances_df = load_or_process_konak_tram_deniz_distances_data()
-cigli_tram_distances_df = load_or_process_cigli_tram_distances_data()
+def _veri_dinleyicisi_ekle(ad: str, dinleyici: Callable[[pd.DataFrame], None]) -> None:
+    """
+    Belirtilen veri seti her değiştiğinde çağrılacak bir fonksiyon kaydeder.
+    Veri seti zaten yüklüyse dinleyici hemen bir kez çalıştırılır.
+    """
+    with _veri_kilidi:
+        _veri_dinleyicileri.setdefault(ad, []).append(dinleyici)
+        df = globals().get(ad)
+        if df is not None:
+            dinleyici(df)
+
+def _veri_setini_degistir(ad: str, df: pd.DataFrame, kaynak: str) -> None:
+    """
+    Modül seviyesindeki veri setini tek bir atama ile yenisiyle değiştirir ve
+    bu veri setine bağlı dinleyicileri (indeksler vb.) çalıştırır.
+    """
+    with _veri_kilidi:
+        globals()[ad] = df
+        _veri_durumu[ad] = {
+            "kaynak": kaynak,
+            "satir_sayisi": len(df),
+            "guncellenme_zamani": datetime.now(ZoneInfo("Europe/Istanbul")).isoformat(timespec='seconds')
+        }
+        for dinleyici in _veri_dinleyicileri.get(ad, []):
+            try:
+                dinleyici(df)
+            except Exception as e:
+                logger.error(f"'{ad}' veri seti için dinleyici çalıştırılırken hata oluştu: {e}", exc_info=True)
+
+def _veri_setlerini_yenile() -> None:
+    """
+    Tüm veri setlerini kaynaklarından indirip yeniden işler. Başarısız olan
+    veri setleri için mevcut (anlık görüntüden yüklenmiş) veri korunur.
+    """
+    try:
+        for ad, yukleyici, _ in _VERI_SETLERI:
+            df = yukleyici()
+            if df is not None and df.attrs.get('kaynak_degismedi') and globals().get(ad) is not None:
+                logger.info(f"'{ad}' kaynağı değişmemiş, bellekteki veri korunuyor.")
+                with _veri_kilidi:
+                    _veri_durumu[ad]["kaynak"] = "guncel"
+            elif df is not None:
+                _veri_setini_degistir(ad, df, kaynak="guncel")
+            elif globals().get(ad) is not None:
+                logger.warning(f"'{ad}' güncellenemedi, son başarılı anlık görüntü kullanılmaya devam edilecek.")
+    finally:
+        veriler_hazir.set()
+        logger.info("Veri setlerinin güncellenmesi tamamlandı.")
+
+def veri_setlerini_baslat(mod: str = VERI_YUKLEME_MODU) -> None:
+    """
+    Veri setlerini önce yerel Parquet anlık görüntülerinden yükler.
+    `mod` 'arka_plan' ise güncel verileri ayrı bir thread'de indirir, böylece
+    MCP sunucusu indirmelerin bitmesini beklemeden yanıt vermeye başlar.
+    'senkron' modda indirmeler tamamlanmadan fonksiyon geri dönmez. 'yok' modda
+    yalnızca anlık görüntüler kullanılır, hiçbir kaynak indirilmez.
+    """
+    for ad, _, parquet_dosyasi in _VERI_SETLERI:
+        df = _load_parquet_snapshot(parquet_dosyasi)
+        if df is not None:
+            _veri_setini_degistir(ad, df, kaynak="anlik_goruntu")
+
+    if mod == "yok":
+        logger.info("Veri yükleme modu 'yok': yalnızca yerel anlık görüntüler kullanılacak.")
+        veriler_hazir.set()
+    elif mod == "arka_plan":
+        logger.info("Güncel veriler arka planda indirilecek.")
+        Thread(target=_veri_setlerini_yenile, name="veri-yenileme", daemon=True).start()
+    else:
+        _veri_setlerini_yenile()
+
+def _hazir_degil_mesaji(mesaj: str) -> str:
+    """
+    Veri hazır olmadığında döndürülecek hata mesajına, yükleme sürüyorsa
+    bunu belirten bir ek yapar.
+    """
+    if not veriler_hazir.is_set():
+        return f"{mesaj} Veriler arka planda güncelleniyor, lütfen kısa bir süre sonra tekrar deneyin."
+    return mesaj
+
+# --- Ortak HTTP İstemcisi: Bağlantı Havuzu, Zaman Aşımı, Yeniden Deneme ve Devre Kesici ---
+class _DevreAcikHatasi(requests.exceptions.ConnectionError):
+    """Bir sunucunun devre kesicisi açıkken istek yapılmaya çalışıldığında fırlatılır."""
+
+class _DevreKesici:
+    """
+    Bir sunucuya art arda `esik` kez başarısız istek yapıldığında devreyi açar ve
+    `bekleme_s` saniye boyunca istekleri hiç göndermeden reddeder. Süre dolunca
+    tek bir deneme isteğine izin verir; başarılı olursa devre tekrar kapanır.
+    """
+
+    def __init__(self, esik: int, bekleme_s: float):
+        self.esik = esik
+        self.bekleme_s = bekleme_s
+        self._ardisik_hata = 0
+        self._acilma_zamani: Optional[float] = None
+        self._deneme_suruyor = False
+        self._kilit = Lock()
+
+    def izin_ver(self) -> bool:
+        with self._kilit:
+            if self._acilma_zamani is None:
+                return True
+            if self._deneme_suruyor or monotonic() - self._acilma_zamani < self.bekleme_s:
+                return False
+            self._deneme_suruyor = True
+            return True
+
+    def basarili(self) -> None:
+        with self._kilit:
+            self._ardisik_hata = 0
+            self._acilma_zamani = None
+            self._deneme_suruyor = False
+
+    def denemeyi_birak(self) -> None:
+        """Sonuçlanmadan yarıda kalan (ör. iptal edilen) deneme isteğinin hakkını geri verir."""
+        with self._kilit:
+            self._deneme_suruyor = False
+
+    def basarisiz(self) -> None:
+        with self._kilit:
+            self._ardisik_hata += 1
+            self._deneme_suruyor = False
+            if self._ardisik_hata >= self.esik:
+                if self._acilma_zamani is None:
+                    logger.warning(f"Art arda {self._ardisik_hata} hata sonrası devre kesici açıldı.")
+                self._acilma_zamani = monotonic()
+
+_http_oturumu = requests.Session()
+_http_adaptoru = HTTPAdapter(pool_connections=len(HTTP_ZAMAN_ASIMLARI) or 1, pool_maxsize=HTTP_HAVUZ_BOYUTU, max_retries=0)
+_http_oturumu.mount("https://", _http_adaptoru)
+_http_oturumu.mount("http://", _http_adaptoru)
+_devre_kesiciler: Dict[str, _DevreKesici] = {}
+_devre_kesici_kilidi = Lock()
+
+def _devre_kesici(sunucu: str) -> _DevreKesici:
+    with _devre_kesici_kilidi:
+        if sunucu not in _devre_kesiciler:
+            _devre_kesiciler[sunucu] = _DevreKesici(HTTP_DEVRE_KESICI_ESIK, HTTP_DEVRE_KESICI_BEKLEME_S)
+        return _devre_kesiciler[sunucu]
+
+def _http_get(url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    """
+    Ortak oturum üzerinden GET isteği yapar. Bağlantılar sunucu başına havuzda
+    açık tutulur; bağlantı/okuma zaman aşımları `HTTP_ZAMAN_ASIMLARI` tablosundan
+    sunucuya göre seçilir. Ağ hataları ve 5xx yanıtlarında en fazla
+    `HTTP_MAX_DENEME` kez, rastgele dağıtılmış üstel bekleme ile tekrar denenir.
+
+    Raises:
+        requests.exceptions.RequestException: Tüm denemeler başarısız olursa veya
+        sunucunun devre kesicisi açıksa.
+    """
+    sunucu = urllib.parse.urlsplit(url).netloc
+    zaman_asimi = HTTP_ZAMAN_ASIMLARI.get(sunucu, HTTP_VARSAYILAN_ZAMAN_ASIMI)
+    devre_kesici = _devre_kesici(sunucu)
+
+    for deneme in range(1, HTTP_MAX_DENEME + 1):
+        if not devre_kesici.izin_ver():
+            raise _DevreAcikHatasi(f"'{sunucu}' için devre kesici açık, istek gönderilmedi.")
+        try:
+            response = _http_oturumu.get(url, params=params, timeout=zaman_asimi)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            devre_kesici.basarisiz()
+            if deneme == HTTP_MAX_DENEME:
+                raise
+            logger.warning(f"'{sunucu}' isteği başarısız ({e}), tekrar denenecek ({deneme}/{HTTP_MAX_DENEME}).")
+        except Exception:
+            # Tekrar denenmeyen hatalar da devre kesicinin deneme isteğini sonuçlandırmalıdır.
+            devre_kesici.basarisiz()
+            raise
+        except BaseException:
+            # Yarıda kesilen istek sunucu hatası sayılmaz, yalnızca deneme hakkı geri verilir.
+            devre_kesici.denemeyi_birak()
+            raise
+        else:
+            if response.status_code < 500:
+                devre_kesici.basarili()
+                return response
+            devre_kesici.basarisiz()
+            if deneme == HTTP_MAX_DENEME:
+                return response
+            logger.warning(f"'{sunucu}' {response.status_code} döndürdü, tekrar denenecek ({deneme}/{HTTP_MAX_DENEME}).")
+        sleep(_yeniden_deneme_beklemesi(deneme))
+
+    raise requests.exceptions.RetryError(f"'{url}' için tüm denemeler başarısız oldu.")
+
+def _yeniden_deneme_beklemesi(deneme: int) -> float:
+    """
+    `deneme`. başarısız denemeden sonra beklenecek süre: üstel olarak büyüyen
+    üst sınır içinde rastgele ("full jitter") bir değer.
+    """
+    return random.uniform(0, min(HTTP_MAX_BEKLEME_S, HTTP_BEKLEME_TABANI_S * 2 ** (deneme - 1)))
+
+# Araçlarda yakalanan HTTP hataları: senkron (requests) ve asenkron (httpx) istemciler.
+# httpx, çözülemeyen JSON gövdesinde (requests'in aksine) düz bir ValueError fırlatır.
+_HTTP_HATALARI = (requests.exceptions.RequestException, httpx.HTTPError, ValueError)
+
+_async_http_istemcisi: Optional[httpx.AsyncClient] = None
+_async_http_dongusu: Optional[asyncio.AbstractEventLoop] = None
+
+def _async_istemci() -> httpx.AsyncClient:
+    """
+    Çalışan olay döngüsüne ait ortak `httpx.AsyncClient` nesnesini döndürür.
+    İstemci ilk kullanımda oluşturulur; olay döngüsü değişirse yenisi açılır.
+    """
+    global _async_http_istemcisi, _async_http_dongusu
+    dongu = asyncio.get_running_loop()
+    if _async_http_istemcisi is None or _async_http_dongusu is not dongu:
+        _async_http_istemcisi = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_HAVUZ_BOYUTU * 4, max_keepalive_connections=HTTP_HAVUZ_BOYUTU),
+            follow_redirects=True
+        )
+        _async_http_dongusu = dongu
+    return _async_http_istemcisi
+
+async def _http_get_async(url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+    """
+    `_http_get` fonksiyonunun asenkron karşılığı. Aynı zaman aşımı tablosunu,
+    yeniden deneme politikasını ve devre kesicileri kullanır; beklerken olay
+    döngüsünü bloklamaz, böylece eş zamanlı araç çağrıları birbirini beklemez.
+
+    Raises:
+        httpx.HTTPError: Tüm denemeler başarısız olursa.
+        requests.exceptions.RequestException: Sunucunun devre kesicisi açıksa.
+    """
+    sunucu = urllib.parse.urlsplit(url).netloc
+    baglanti_zaman_asimi, okuma_zaman_asimi = HTTP_ZAMAN_ASIMLARI.get(sunucu, HTTP_VARSAYILAN_ZAMAN_ASIMI)
+    zaman_asimi = httpx.Timeout(okuma_zaman_asimi, connect=baglanti_zaman_asimi)
+    devre_kesici = _devre_kesici(sunucu)
+
+    for deneme in range(1, HTTP_MAX_DENEME + 1):
+        if not devre_kesici.izin_ver():
+            raise _DevreAcikHatasi(f"'{sunucu}' için devre kesici açık, istek gönderilmedi.")
+        try:
+            response = await _async_istemci().get(url, params=params, timeout=zaman_asimi)
+        except httpx.TransportError as e:
+            devre_kesici.basarisiz()
+            if deneme == HTTP_MAX_DENEME:
+                raise
+            logger.warning(f"'{sunucu}' isteği başarısız ({e!r}), tekrar denenecek ({deneme}/{HTTP_MAX_DENEME}).")
+        except Exception:
+            # Tekrar denenmeyen hatalar da devre kesicinin deneme isteğini sonuçlandırmalıdır.
+            devre_kesici.basarisiz()
+            raise
+        except BaseException:
+            # İptal edilen istek sunucu hatası sayılmaz, yalnızca deneme hakkı geri verilir.
+            devre_kesici.denemeyi_birak()
+            raise
+        else:
+            if response.status_code < 500:
+                devre_kesici.basarili()
+                return response
+            devre_kesici.basarisiz()
+            if deneme == HTTP_MAX_DENEME:
+                return response
+            logger.warning(f"'{sunucu}' {response.status_code} döndürdü, tekrar denenecek ({deneme}/{HTTP_MAX_DENEME}).")
+        await asyncio.sleep(_yeniden_deneme_beklemesi(deneme))
+
+    raise httpx.TransportError(f"'{url}' için tüm denemeler başarısız oldu.")
+
+# --- Yanıt Önbelleği: Kısa Ömürlü Kayıtlar ve İstek Birleştirme ---
+class _TekSeferYukleyici:
+    """
+    Aynı anahtar için eş zamanlı yüklemeleri birleştirir (single-flight): ilk
+    çağrı yükleyiciyi çalıştırır, o sürerken gelenler aynı sonucu bekler.
+    """
+
+    def __init__(self):
+        self._bekleyenler: Dict[Any, asyncio.Future] = {}
+
+    def suruyor_mu(self, anahtar: Any) -> bool:
+        return anahtar in self._bekleyenler
+
+    async def calistir(self, anahtar: Any, yukleyici: Callable[[], Awaitable[Any]]) -> Any:
+        bekleyen = self._bekleyenler.get(anahtar)
+        if bekleyen is not None:
+            return await asyncio.shield(bekleyen)
+
+        gelecek = asyncio.get_running_loop().create_future()
+        self._bekleyenler[anahtar] = gelecek
+        try:
+            deger = await yukleyici()
+        except asyncio.CancelledError:
+            gelecek.cancel()
+            raise
+        except Exception as e:
+            gelecek.set_exception(e)
+            gelecek.exception()  # Bekleyen yoksa "hiç okunmadı" uyarısını önler.
+            raise
+        finally:
+            self._bekleyenler.pop(anahtar, None)
+
+        gelecek.set_result(deger)
+        return deger
+
+class _TTLOnbellek:
+    """
+    Her kaydı `ttl_s` saniye boyunca tutan asenkron bir önbellek.
+
+    Aynı anahtar için eş zamanlı gelen ıskalar tek bir yükleme ile karşılanır
+    (single-flight): ilk çağrı kaynağa gider, diğerleri onun sonucunu bekler.
+    İsabet, ıska ve birleştirilen istek sayıları `istatistikler()` ile okunur.
+    """
+
+    def __init__(self, ad: str, ttl_s: float, max_kayit: int):
+        self.ad = ad
+        self.ttl_s = ttl_s
+        self.max_kayit = max_kayit
+        self._kayitlar: Dict[Any, Tuple[float, Any]] = {}
+        self._tek_sefer = _TekSeferYukleyici()
+        self.isabet = 0
+        self.iska = 0
+        self.birlestirilen = 0
+
+    async def getir(
+        self,
+        anahtar: Any,
+        yukleyici: Callable[[], Awaitable[Any]],
+        onbellege_al: Callable[[Any], bool] = lambda deger: True
+    ) -> Any:
+        """
+        Anahtar için geçerli bir kayıt varsa onu, yoksa `yukleyici()` sonucunu döndürür.
+        Sonuç yalnızca `onbellege_al(sonuc)` doğruysa saklanır.
+        """
+        kayit = self._kayitlar.get(anahtar)
+        if kayit is not None and kayit[0] > monotonic():
+            self.isabet += 1
+            return kayit[1]
+
+        if self._tek_sefer.suruyor_mu(anahtar):
+            self.birlestirilen += 1
+            return await self._tek_sefer.calistir(anahtar, yukleyici)
+
+        self.iska += 1
+        deger = await self._tek_sefer.calistir(anahtar, yukleyici)
+        if onbellege_al(deger):
+            self._ekle(anahtar, deger)
+        return deger
+
+    def _ekle(self, anahtar: Any, deger: Any) -> None:
+        simdi = monotonic()
+        self._kayitlar.pop(anahtar, None)
+        if len(self._kayitlar) >= self.max_kayit:
+            self._kayitlar = {a: k for a, k in self._kayitlar.items() if k[0] > simdi}
+            while len(self._kayitlar) >= self.max_kayit:
+                del self._kayitlar[next(iter(self._kayitlar))]
+        self._kayitlar[anahtar] = (simdi + self.ttl_s, deger)
+
+    def temizle(self) -> None:
+        self._kayitlar.clear()
+
+    def istatistikler(self) -> Dict[str, Any]:
+        toplam = self.isabet + self.iska + self.birlestirilen
+        return {
+            "ad": self.ad,
+            "ttl_s": self.ttl_s,
+            "kayit_sayisi": len(self._kayitlar),
+            "isabet": self.isabet,
+            "iska": self.iska,
+            "birlestirilen": self.birlestirilen,
+            "isabet_orani": round((self.isabet + self.birlestirilen) / toplam, 4) if toplam else None
+        }
+
+class _KaliciOnbellek:
+    """
+    Nadiren değişen API yanıtlarını `data/api_onbellek/<ad>/` altında JSON olarak
+    saklayan, sunucu yeniden başlasa da korunan bir önbellek.
+
+    `ttl_s` süresi içindeki kayıtlar doğrudan döndürülür. Süresi geçmiş ancak
+    `max_bayat_s` sınırını aşmamış kayıtlar da hemen döndürülür ve arka planda
+    yenilenir (stale-while-revalidate). Kaynağa ulaşılamazsa, ne kadar eski olursa
+    olsun mevcut kayıt hata yerine kullanılır.
+    """
+
+    def __init__(self, ad: str, ttl_s: float, max_bayat_s: float):
+        self.ad = ad
+        self.ttl_s = ttl_s
+        self.max_bayat_s = max_bayat_s
+        self.klasor = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'api_onbellek', ad)
+        self._kayitlar: Dict[str, Dict[str, Any]] = {}
+        self._tek_sefer = _TekSeferYukleyici()
+        self._arka_plan_gorevleri: set = set()
+        self.isabet = 0
+        self.bayat_isabet = 0
+        self.iska = 0
+        self.birlestirilen = 0
+        self.hata_sonrasi_bayat = 0
+
+    def _dosya_yolu(self, url: str) -> str:
+        return os.path.join(self.klasor, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json")
+
+    def _oku(self, url: str) -> Optional[Dict[str, Any]]:
+        kayit = self._kayitlar.get(url)
+        if kayit is not None:
+            return kayit
+        try:
+            with open(self._dosya_yolu(url), 'r', encoding='utf-8') as f:
+                kayit = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if kayit.get('url') != url:
+            return None
+        self._kayitlar[url] = kayit
+        return kayit
+
+    def _yaz(self, kayit: Dict[str, Any]) -> None:
+        self._kayitlar[kayit['url']] = kayit
+        try:
+            os.makedirs(self.klasor, exist_ok=True)
+            dosya_yolu = self._dosya_yolu(kayit['url'])
+            with open(f"{dosya_yolu}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(kayit, f, ensure_ascii=False)
+            os.replace(f"{dosya_yolu}.tmp", dosya_yolu)
+        except OSError as e:
+            logger.warning(f"'{self.ad}' önbellek kaydı diske yazılamadı: {e}")
+
+    async def _yukle(self, url: str) -> Dict[str, Any]:
+        response = await _http_get_async(url)
+        if response.status_code not in (200, 204):
+            response.raise_for_status()
+            raise httpx.HTTPStatusError(
+                f"Beklenmedik durum kodu: {response.status_code}", request=response.request, response=response
+            )
+        kayit = {
+            'url': url,
+            'kayit_zamani': zaman_damgasi(),
+            'durum_kodu': response.status_code,
+            'veri': response.json() if response.status_code == 200 else None
+        }
+        self._yaz(kayit)
+        return kayit
+
+    async def _arka_planda_yenile(self, url: str) -> None:
+        try:
+            await self._tek_sefer.calistir(url, lambda: self._yukle(url))
+        except _HTTP_HATALARI as e:
+            logger.warning(f"'{url}' arka planda yenilenemedi, bayat kayıt kullanılmaya devam edecek: {e}")
+
+    async def getir(self, url: str) -> Tuple[int, Any]:
+        """
+        URL'nin (durum kodu, JSON verisi) ikilisini önbellekten veya kaynaktan döndürür.
+
+        Raises:
+            httpx.HTTPError veya requests.exceptions.RequestException: Kaynağa
+            ulaşılamadıysa ve önbellekte hiç kayıt yoksa.
+        """
+        kayit = self._oku(url)
+        yas = zaman_damgasi() - kayit['kayit_zamani'] if kayit is not None else None
+
+        if yas is not None and yas < self.ttl_s:
+            self.isabet += 1
+            return kayit['durum_kodu'], kayit['veri']
+
+        if yas is not None and yas < self.ttl_s + self.max_bayat_s:
+            self.bayat_isabet += 1
+            if not self._tek_sefer.suruyor_mu(url):
+                gorev = asyncio.create_task(self._arka_planda_yenile(url))
+                self._arka_plan_gorevleri.add(gorev)
+                gorev.add_done_callback(self._arka_plan_gorevleri.discard)
+            return kayit['durum_kodu'], kayit['veri']
+
+        if self._tek_sefer.suruyor_mu(url):
+            self.birlestirilen += 1
+        else:
+            self.iska += 1
+        try:
+            kayit = await self._tek_sefer.calistir(url, lambda: self._yukle(url))
+        except _HTTP_HATALARI as e:
+            if kayit is None:
+                raise
+            self.hata_sonrasi_bayat += 1
+            logger.warning(f"'{url}' kaynağına ulaşılamadı, {int(yas)} sn önceki kayıt kullanılıyor: {e}")
+        return kayit['durum_kodu'], kayit['veri']
+
+    def temizle(self) -> None:
+        """Bellekteki ve diskteki tüm kayıtları siler."""
+        self._kayitlar.clear()
+        if os.path.isdir(self.klasor):
+            for dosya in os.listdir(self.klasor):
+                if dosya.endswith('.json'):
+                    os.remove(os.path.join(self.klasor, dosya))
+
+    def istatistikler(self) -> Dict[str, Any]:
+        toplam = self.isabet + self.bayat_isabet + self.iska + self.birlestirilen
+        kayit_sayisi = len([d for d in os.listdir(self.klasor) if d.endswith('.json')]) if os.path.isdir(self.klasor) else 0
+        return {
+            "ad": self.ad,
+            "ttl_s": self.ttl_s,
+            "max_bayat_s": self.max_bayat_s,
+            "kayit_sayisi": kayit_sayisi,
+            "isabet": self.isabet,
+            "bayat_isabet": self.bayat_isabet,
+            "iska": self.iska,
+            "birlestirilen": self.birlestirilen,
+            "hata_sonrasi_bayat": self.hata_sonrasi_bayat,
+            "isabet_orani": round((self.isabet + self.bayat_isabet + self.birlestirilen) / toplam, 4) if toplam else None
+        }
+
+_anlik_veri_onbellegi = _TTLOnbellek("anlik_veri", ANLIK_VERI_ONBELLEK_TTL_S, ANLIK_VERI_ONBELLEK_MAX_KAYIT)
+_statik_veri_onbellegi = _KaliciOnbellek("statik_veri", STATIK_VERI_ONBELLEK_TTL_S, STATIK_VERI_ONBELLEK_MAX_BAYAT_S)
+_ONBELLEKLER: List[Any] = [_anlik_veri_onbellegi, _statik_veri_onbellegi]
+
+async def _onbellekli_http_get(onbellek: _TTLOnbellek, url: str) -> httpx.Response:
+    """
+    `_http_get_async` yanıtını verilen önbellek üzerinden döndürür. Sunucu
+    hatası (5xx) içeren yanıtlar önbelleğe alınmaz.
+    """
+    return await onbellek.getir(
+        url,
+        lambda: _http_get_async(url),
+        onbellege_al=lambda response: response.status_code < 500
+    )
+
+# --- Hesaplama Havuzu: CPU Yoğun veya Bloklayan Araçlar ---
+_hesaplama_havuzu = ThreadPoolExecutor(max_workers=HESAPLAMA_HAVUZU_BOYUTU, thread_name_prefix="hesaplama")
+
+def _havuzda_calistir(fonksiyon: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Senkron bir aracı, çağrıldığında hesaplama havuzundaki bir thread'de çalışan
+    asenkron bir araca dönüştürür. Böylece DataFrame/NumPy işleri veya bloklayan
+    beklemeler sunucunun olay döngüsünü durdurmaz.
+    """
+    @functools.wraps(fonksiyon)
+    async def sarmalayici(*args: Any, **kwargs: Any) -> Any:
+        dongu = asyncio.get_running_loop()
+        return await dongu.run_in_executor(_hesaplama_havuzu, functools.partial(fonksiyon, *args, **kwargs))
+    return sarmalayici
+
+def _ayri_threadde_calistir(fonksiyon: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Kullanıcı etkileşimi gibi uzun süre bekleyebilen senkron bir aracı, hesaplama havuzunu
+    meşgul etmeden varsayılan thread havuzunda (`asyncio.to_thread`) çalıştırır. Böylece
+    bekleyen çağrılar havuzdaki hesaplama araçlarının önünü tıkamaz.
+    """
+    @functools.wraps(fonksiyon)
+    async def sarmalayici(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(fonksiyon, *args, **kwargs)
+    return sarmalayici
 
 # --- Tool 1: Durağa Yaklaşan Tüm Otobüsler ---
+async def _duraga_yaklasan_otobusler(stop_id: int) -> List[Dict[str, Any]]:
+    """
+    Raises:
+        httpx.HTTPError veya requests.exceptions.RequestException: İstek başarısız olursa.
+        ValueError: Yanıt gövdesi JSON olarak çözülemezse.
+    """
+    url = f"{IZTEK_BASE_URL}/duragayaklasanotobusler/{stop_id}"
+    response = await _onbellekli_http_get(_anlik_veri_onbellegi, url)
+    if response.status_code == 204:
+        return []
+    response.raise_for_status()
+    return response.json()
+
 @mcp.tool()
-def duraga_yaklasan_otobusleri_getir(stop_id: int) -> Optional[List[Dict[str, Any]]]:
+async def duraga_yaklasan_otobusleri_getir(stop_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen bir durak ID'sine yaklaşmakta olan tüm otobüslerin
     bilgilerini getirir.
@@ -414,34 +1350,17 @@ def duraga_yaklasan_otobusleri_getir(stop_id: int) -> Optional[List[Dict[str, An
     Returns:
         Otobüs bilgilerini içeren bir liste veya hata durumunda None.
     """
-    url = f"{IZTEK_BASE_URL}/duragayaklasanotobusler/{stop_id}"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
-            return [] 
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return await _duraga_yaklasan_otobusler(stop_id)
+    except _HTTP_HATALARI as e:
         logger.error(f"API isteği sırasında hata (duraga_yaklasan_otobusler): {e}")
         return None
-    return None
 
 # --- Tool 2: Belirli Bir Hattın Anlık Otobüs Konumları ---
-@mcp.tool()
-def hattin_anlik_otobus_konumlarini_getir(line_id: int) -> Optional[List[Dict[str, Any]]]:
-    """
-    ID'si girilen bir hatta ait tüm otobüslerin anlık konum bilgilerini getirir.
-
-    Args:
-        line_id (int): Hat numarası (ID'si).
-
-    Returns:
-        Otobüs konum bilgilerini içeren bir liste veya hata durumunda None.
-    """
+async def _hat_otobus_konumlari(line_id: int) -> Optional[List[Dict[str, Any]]]:
     url = f"{IZTEK_BASE_URL}/hatotobuskonumlari/{line_id}"
     try:
-        response = requests.get(url)
+        response = await _onbellekli_http_get(_anlik_veri_onbellegi, url)
         if response.status_code == 200:
             data = response.json()
             if data.get("HataMesaj"):
@@ -451,21 +1370,37 @@ def hattin_anlik_otobus_konumlarini_getir(line_id: int) -> Optional[List[Dict[st
         elif response.status_code == 204:
             return []
         response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+    except _HTTP_HATALARI as e:
         logger.error(f"API isteği sırasında hata (hatotobuskonumlari): {e}")
         return None
     return None
 
+@mcp.tool()
+async def hattin_anlik_otobus_konumlarini_getir(line_id: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    ID'si girilen bir hatta ait tüm otobüslerin anlık konum bilgilerini getirir.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+
+    Returns:
+        Otobüs konum bilgilerini içeren bir liste veya hata durumunda None.
+    """
+    konumlar = await _hat_otobus_konumlari(line_id)
+    if konumlar:
+        _konumlari_isle(line_id, konumlar)
+    return konumlar
+
 # --- Tool 3: Hattın Durağa Yaklaşan Otobüsleri ---
 @mcp.tool()
-def hattin_duraga_yaklasan_otobuslerini_getir(line_id: int, stop_id: int) -> Optional[List[Dict[str, Any]]]:
+async def hattin_duraga_yaklasan_otobuslerini_getir(line_id: int, stop_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen bir hattın, belirtilen durağa yaklaşmakta olan otobüslerini getirir.
     Hata durumunda açıklayıcı bir JSON mesajı döner.
     """
     url = f"{IZTEK_BASE_URL}/hattinyaklasanotobusleri/{line_id}/{stop_id}"
     try:
-        response = requests.get(url)
+        response = await _onbellekli_http_get(_anlik_veri_onbellegi, url)
         
         if response.status_code == 200:
             return response.json()
@@ -485,7 +1420,7 @@ def hattin_duraga_yaklasan_otobuslerini_getir(line_id: int, stop_id: int) -> Opt
                 "mesaj": f"API'den beklenmedik bir durum kodu ({response.status_code}) alındı."
             }
             
-    except requests.exceptions.RequestException as e:
+    except _HTTP_HATALARI as e:
         logger.error(f"API isteği sırasında hata (hattinyaklasanotobusleri): {e}")
         return {
             "hata": "AĞ_HATASI",
@@ -493,7 +1428,7 @@ def hattin_duraga_yaklasan_otobuslerini_getir(line_id: int, stop_id: int) -> Opt
         }
 
 # --- ACIKVERI API için Genel Arama Fonksiyonu ---
-def _search_acikveri(
+async def _search_acikveri(
     resource_id: str,
     query: Optional[str] = None,
     filters: Optional[Dict[str, Any]] = None,
@@ -511,7 +1446,7 @@ def _search_acikveri(
         params['filters'] = json.dumps(filters)
 
     try:
-        response = requests.get(url, params=params)
+        response = await _http_get_async(url, params=params)
         response.raise_for_status()
         data = response.json()
         if data.get('success'):
@@ -519,17 +1454,213 @@ def _search_acikveri(
         else:
             logger.error(f"ACIKVERI API hatası: {data.get('error')}")
             return None
-    except requests.exceptions.RequestException as e:
+    except _HTTP_HATALARI as e:
         logger.error(f"ACIKVERI API isteği sırasında hata: {e}")
         return None
     return None
 
 
+# --- Türkçe Metin Normalizasyonu ve Yerel Tam Metin İndeksi ---
+_TURKCE_ASCII = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+def _turkce_normalize(metin: Any) -> str:
+    """
+    Metni Türkçe büyük/küçük harf kurallarına göre küçültür ('I' -> 'ı', 'İ' -> 'i')
+    ve Türkçe karakterleri ASCII karşılıklarına indirger. Böylece "İZMİR",
+    "izmir" ve "Izmır" aynı anahtara dönüşür.
+    """
+    metin = str(metin).replace('I', 'ı').replace('İ', 'i').lower()
+    return metin.replace('\u0307', '').translate(_TURKCE_ASCII)
+
+def _kelimelere_ayir(metin: Any) -> List[str]:
+    """Metni normalize eder ve harf/rakam dizilerinden oluşan kelimelere böler."""
+    if metin is None or (isinstance(metin, float) and np.isnan(metin)):
+        return []
+    return re.findall(r'[0-9a-z]+', _turkce_normalize(metin))
+
+class _MetinIndeksi:
+    """
+    Bir tablonun seçili sütunları üzerinde kelime -> satır listesi biçiminde
+    ters indeks (inverted index).
+
+    Sorgudaki her kelime, indeksteki o kelimeyle başlayan terimlerle eşleşir
+    (yazarken arama için önek eşleşmesi) ve tüm kelimeleri içeren satırlar döner.
+    Sıralamada tam kelime eşleşmeleri ve hat numarasının birebir eşleşmesi öne alınır.
+    """
+
+    def __init__(self, kayitlar: pd.DataFrame, sutunlar: List[str], numara_sutunu: Optional[str] = None):
+        self._kayit_listesi = kayitlar.to_dict('records')
+        ters_indeks: Dict[str, List[int]] = {}
+        for sutun in sutunlar:
+            for satir, deger in enumerate(kayitlar[sutun].tolist()):
+                for kelime in _kelimelere_ayir(deger):
+                    ters_indeks.setdefault(kelime, []).append(satir)
+
+        self._terimler = sorted(ters_indeks)
+        self._satirlar = [np.unique(np.asarray(ters_indeks[t], dtype=np.int32)) for t in self._terimler]
+        self._numaralar = (
+            np.array([_turkce_normalize(v).strip() for v in kayitlar[numara_sutunu].tolist()])
+            if numara_sutunu else None
+        )
+
+    def _terim_satirlari(self, kelime: str, onek: bool) -> np.ndarray:
+        baslangic = bisect.bisect_left(self._terimler, kelime)
+        bitis = bisect.bisect_left(self._terimler, kelime + '{') if onek else baslangic + (
+            baslangic < len(self._terimler) and self._terimler[baslangic] == kelime)
+        if bitis - baslangic == 1:
+            return self._satirlar[baslangic]
+        if bitis == baslangic:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(self._satirlar[baslangic:bitis]))
+
+    def ara(self, sorgu: str, limit: int) -> List[Dict[str, Any]]:
+        kelimeler = _kelimelere_ayir(sorgu)
+        if not kelimeler or limit <= 0:
+            return []
+
+        adaylar: Optional[np.ndarray] = None
+        for kelime in kelimeler:
+            eslesen = self._terim_satirlari(kelime, onek=True)
+            adaylar = eslesen if adaylar is None else np.intersect1d(adaylar, eslesen, assume_unique=True)
+            if len(adaylar) == 0:
+                return []
+
+        puanlar = np.zeros(len(adaylar))
+        for kelime in kelimeler:
+            puanlar += np.isin(adaylar, self._terim_satirlari(kelime, onek=False), assume_unique=True)
+        if self._numaralar is not None:
+            puanlar += 10 * (self._numaralar[adaylar] == _turkce_normalize(sorgu).strip())
+
+        sira = np.lexsort((adaylar, -puanlar))[:limit]
+        return [self._kayit_listesi[i] for i in adaylar[sira].tolist()]
+
+def _metin_indeksi_olustur(df: pd.DataFrame) -> Optional[_MetinIndeksi]:
+    """
+    ACIKVERI hat kayıtları için HAT_NO, ADI ve GUZERGAH sütunlarını (hangileri
+    varsa) indeksler; bu sütunlar yoksa tüm metin sütunlarını kullanır.
+    """
+    sutunlar = [s for s in ('HAT_NO', 'ADI', 'GUZERGAH') if s in df.columns]
+    if not sutunlar:
+        sutunlar = [s for s in df.columns if s != '_id' and df[s].dtype == object]
+    return _MetinIndeksi(df, sutunlar, numara_sutunu='HAT_NO' if 'HAT_NO' in df.columns else None)
+
+_hat_arama_indeksi: Optional[_MetinIndeksi] = None
+_hat_detay_indeksi: Optional[_MetinIndeksi] = None
+
+def _hat_arama_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _hat_arama_indeksi
+    _hat_arama_indeksi = _metin_indeksi_olustur(df)
+
+def _hat_detay_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _hat_detay_indeksi
+    _hat_detay_indeksi = _metin_indeksi_olustur(df)
+
+_veri_dinleyicisi_ekle('line_search_df', _hat_arama_indeksini_olustur)
+_veri_dinleyicisi_ekle('line_details_df', _hat_detay_indeksini_olustur)
+
+# --- Durak ve İstasyon Adları için Bulanık (Fuzzy) İsim İndeksi ---
+def _trigramlar(metin: str) -> set:
+    return {metin[i:i + 3] for i in range(len(metin) - 2)}
+
+class _IsimIndeksi:
+    """
+    Durak/istasyon adları üzerinde Türkçe normalize edilmiş trigram indeksi.
+
+    Sorgunun trigramlarını içeren satırlar aday kümesini oluşturur; adı sorguyu
+    içeren adaylar (birebir, önek, kelime başı, içerme sırasıyla) önce döner,
+    kalan yerler yazım hatalarını tolere eden bulanık benzerlik puanıyla doldurulur.
+    Arama maliyeti tablo boyutuna değil, aday sayısına bağlıdır.
+    """
+
+    def __init__(self, kayitlar: pd.DataFrame, ad_sutunu: str):
+        self._kayitlar = kayitlar
+        self._adlar = [' '.join(_kelimelere_ayir(ad)) for ad in kayitlar[ad_sutunu].tolist()]
+
+        trigram_satirlari: Dict[str, List[int]] = {}
+        kelimeler: List[Tuple[str, int]] = []
+        for satir, ad in enumerate(self._adlar):
+            for trigram in _trigramlar(f" {ad} "):
+                trigram_satirlari.setdefault(trigram, []).append(satir)
+            kelimeler.extend((kelime, satir) for kelime in ad.split())
+        self._trigram_satirlari = {t: np.asarray(r, dtype=np.int32) for t, r in trigram_satirlari.items()}
+
+        kelimeler.sort()
+        self._kelimeler = [k for k, _ in kelimeler]
+        self._kelime_satirlari = np.asarray([r for _, r in kelimeler], dtype=np.int32)
+
+    def _kisa_sorgu_adaylari(self, sorgu: str) -> np.ndarray:
+        """Trigram oluşturamayacak kadar kısa sorgular için kelime başı eşleşmeleri."""
+        baslangic = bisect.bisect_left(self._kelimeler, sorgu)
+        bitis = bisect.bisect_left(self._kelimeler, sorgu + '{')
+        return np.unique(self._kelime_satirlari[baslangic:bitis])
+
+    def _icerme_sirasi(self, satir: int, sorgu: str) -> Tuple[int, int, int]:
+        ad = self._adlar[satir]
+        if ad == sorgu:
+            derece = 0
+        elif ad.startswith(sorgu):
+            derece = 1
+        elif f" {sorgu}" in ad:
+            derece = 2
+        else:
+            derece = 3
+        return derece, len(ad), satir
+
+    def ara(self, sorgu: str, limit: int) -> pd.DataFrame:
+        sorgu = ' '.join(_kelimelere_ayir(sorgu))
+        if not sorgu or limit <= 0:
+            return self._kayitlar.iloc[0:0]
+
+        if len(sorgu) < 3:
+            adaylar = self._kisa_sorgu_adaylari(sorgu)
+            sira = sorted(adaylar.tolist(), key=lambda r: self._icerme_sirasi(r, sorgu))[:limit]
+            return self._kayitlar.iloc[sira]
+
+        eslesmeler = [self._trigram_satirlari[t] for t in _trigramlar(f" {sorgu} ") if t in self._trigram_satirlari]
+        if not eslesmeler:
+            return self._kayitlar.iloc[0:0]
+        adaylar, ortak_trigram = np.unique(np.concatenate(eslesmeler), return_counts=True)
+
+        # Adı sorguyu içeren satırlar, sorgunun iç trigramlarının tamamını taşır.
+        ic_trigram_sayisi = sum(t in self._trigram_satirlari for t in _trigramlar(sorgu))
+        icerenler = [r for r in adaylar[ortak_trigram >= ic_trigram_sayisi].tolist() if sorgu in self._adlar[r]]
+        sira = sorted(icerenler, key=lambda r: self._icerme_sirasi(r, sorgu))[:limit]
+
+        if len(sira) < limit:
+            secilenler = set(sira)
+            en_cok_ortak = np.argsort(-ortak_trigram, kind='stable')[:max(limit * 10, 50)]
+            puanlar = []
+            for r, ortak in zip(adaylar[en_cok_ortak].tolist(), ortak_trigram[en_cok_ortak].tolist()):
+                if r in secilenler:
+                    continue
+                benzerlik = fuzz.WRatio(sorgu, self._adlar[r])
+                if benzerlik >= ISIM_ARAMA_MIN_BENZERLIK:
+                    puanlar.append((-ortak, -benzerlik, len(self._adlar[r]), r))
+            puanlar.sort()
+            sira.extend(p[-1] for p in puanlar[:limit - len(sira)])
+
+        return self._kayitlar.iloc[sira]
+
+_durak_isim_indeksi: Optional[_IsimIndeksi] = None
+_istasyon_isim_indeksi: Optional[_IsimIndeksi] = None
+
+def _durak_isim_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _durak_isim_indeksi
+    _durak_isim_indeksi = _IsimIndeksi(df, 'DURAK_ADI')
+
+def _istasyon_isim_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _istasyon_isim_indeksi
+    _istasyon_isim_indeksi = _IsimIndeksi(df, 'ISTASYON_ADI')
+
+_veri_dinleyicisi_ekle('stops_df', _durak_isim_indeksini_olustur)
+_veri_dinleyicisi_ekle('izban_stations_df', _istasyon_isim_indeksini_olustur)
+
 # --- Tool 4: Akıllı Durak Arama ---
 @mcp.tool()
 def durak_ara(durak_adi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
-    Adında belirtilen metin geçen otobüs duraklarını arar.
+    Adında belirtilen metin geçen otobüs duraklarını arar. Arama Türkçe karakterlere
+    ve büyük/küçük harfe duyarsızdır; tam eşleşme yoksa yazım hatalarını tolere eder.
 
     Args:
         durak_adi (str): Aranacak durak adı veya bir kısmı.
@@ -538,11 +1669,12 @@ def durak_ara(durak_adi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     Returns:
         Durak bilgilerini içeren kayıtların listesi.
     """
-    if stops_df is None:
+    indeks = _durak_isim_indeksi
+    if indeks is None:
         logger.error("Durak verileri yüklenemediği için durak araması yapılamıyor.")
-        return [{"hata": "Durak veritabanı hazır değil."}]
+        return [{"hata": _hazir_degil_mesaji("Durak veritabanı hazır değil.")}]
 
-    results_df = stops_df[stops_df['DURAK_ADI'].str.contains(durak_adi, case=False, na=False)].head(limit)
+    results_df = indeks.ara(durak_adi, limit)
 
     return results_df.to_dict('records')
 
@@ -551,7 +1683,8 @@ def durak_ara(durak_adi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
 @mcp.tool()
 def izban_istasyon_ara(istasyon_adi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
-    Adında belirtilen metin geçen İZBAN istasyonlarını arar.
+    Adında belirtilen metin geçen İZBAN istasyonlarını arar. Arama Türkçe karakterlere
+    ve büyük/küçük harfe duyarsızdır; tam eşleşme yoksa yazım hatalarını tolere eder.
 
     Args:
         istasyon_adi (str): Aranacak istasyon adı veya bir kısmı.
@@ -560,18 +1693,19 @@ def izban_istasyon_ara(istasyon_adi: str, limit: int = 5) -> Optional[List[Dict[
     Returns:
         İstasyon bilgilerini içeren kayıtların listesi.
     """
-    if izban_stations_df is None:
+    indeks = _istasyon_isim_indeksi
+    if indeks is None:
         logger.error("İZBAN istasyon verileri yüklenemediği için istasyon araması yapılamıyor.")
-        return [{"hata": "İZBAN istasyon veritabanı hazır değil."}]
+        return [{"hata": _hazir_degil_mesaji("İZBAN istasyon veritabanı hazır değil.")}]
 
-    results_df = izban_stations_df[izban_stations_df['ISTASYON_ADI'].str.contains(istasyon_adi, case=False, na=False)].head(limit)
+    results_df = indeks.ara(istasyon_adi, limit)
 
     return results_df.to_dict('records')
 
 
 # --- Tool 6: İZBAN Sefer Saatlerini Getir ---
 @mcp.tool()
-def izban_sefer_saatlerini_getir(kalkis_istasyon_id: int, varis_istasyon_id: int) -> Optional[List[Dict[str, Any]]]:
+async def izban_sefer_saatlerini_getir(kalkis_istasyon_id: int, varis_istasyon_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen iki İZBAN istasyonu arasındaki sefer saatlerini getirir.
     İstasyon ID'lerini bulmak için `izban_istasyon_ara` aracı kullanılabilir.
@@ -585,25 +1719,270 @@ def izban_sefer_saatlerini_getir(kalkis_istasyon_id: int, varis_istasyon_id: int
     """
     url = f"https://openapi.izmir.bel.tr/api/izban/sefersaatleri/{kalkis_istasyon_id}/{varis_istasyon_id}"
     try:
-        response = requests.get(url)
+        response = await _http_get_async(url)
         if response.status_code == 200:
             return response.json()
         elif response.status_code == 204:
             logger.info(f"'{kalkis_istasyon_id}' ve '{varis_istasyon_id}' arasında sefer bulunamadı.")
             return [] 
         response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+    except _HTTP_HATALARI as e:
         logger.error(f"İZBAN sefer saatleri API isteği sırasında hata: {e}")
         return None
     return None
 
 
+# --- İZBAN Ücret Tablosu ---
+def _izban_tutar_url(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_sayisi: int, halk_tasit: bool) -> str:
+    return (f"https://openapi.izmir.bel.tr/api/izban/tutarhesaplama/"
+            f"{binis_istasyon_id}/{inis_istasyon_id}/{aktarma_sayisi}/{str(halk_tasit).lower()}")
+
+class _IzbanUcretTablosu:
+    """
+    İZBAN ücret hesaplama yanıtlarını (biniş x iniş x aktarma x Halk Taşıt) yoğun bir hücre
+    dizisi üzerinden tutar. Her hücre, yanıt alanlarının sütun dizilerinde bir satırı gösterir
+    (-1: henüz sorgulanmadı). İstasyon ID'si doğrudan bir konum dizisiyle hücre indeksine
+    çevrildiği için sorgu O(1)'dir. Sonuç bulunamayan (204) hücreler de saklanır.
+    """
+
+    ANAHTAR_SUTUNLARI = ['BINIS_ID', 'INIS_ID', 'AKTARMA', 'HALK_TASIT', 'SONUC_VAR']
+
+    def __init__(self, istasyon_idleri: np.ndarray, imza: str, df: Optional[pd.DataFrame] = None, son_kontrol: float = 0.0):
+        self.imza = imza
+        self.son_kontrol = son_kontrol
+        self.istasyon_idleri = np.unique(np.asarray(istasyon_idleri, dtype=np.int64))
+        self._konum = np.full(int(self.istasyon_idleri.max()) + 1, -1, dtype=np.int32)
+        self._konum[self.istasyon_idleri] = np.arange(len(self.istasyon_idleri))
+        n = len(self.istasyon_idleri)
+        self.sekil = (n, n, IZBAN_MAX_AKTARMA + 1, 2)
+        self._kilit = Lock()
+        self._yukle(df if df is not None else pd.DataFrame(columns=self.ANAHTAR_SUTUNLARI))
+
+    def _yukle(self, df: pd.DataFrame) -> None:
+        satir = np.full(int(np.prod(self.sekil)), -1, dtype=np.int32)
+        if len(df):
+            hucreler = self.hucreler(df['BINIS_ID'].to_numpy(), df['INIS_ID'].to_numpy(),
+                                     df['AKTARMA'].to_numpy(), df['HALK_TASIT'].to_numpy())
+            gecerli = hucreler >= 0
+            satir[hucreler[gecerli]] = np.flatnonzero(gecerli)
+        self._satir = satir
+        self._sonuc_var = df['SONUC_VAR'].to_numpy(dtype=bool)
+        self._sutunlar = {alan: df[alan].to_numpy(dtype=object) for alan in df.columns if alan not in self.ANAHTAR_SUTUNLARI}
+        self._ek_kayitlar: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    def hucreler(self, binis: Any, inis: Any, aktarma: Any, halk_tasit: Any) -> np.ndarray:
+        """Anahtarların hücre indekslerini döndürür; tabloda olmayan istasyon veya aktarma için -1."""
+        binis, inis = np.asarray(binis, dtype=np.int64), np.asarray(inis, dtype=np.int64)
+        aktarma, halk_tasit = np.asarray(aktarma, dtype=np.int64), np.asarray(halk_tasit, dtype=bool)
+        sinirda = (binis >= 0) & (binis < len(self._konum)) & (inis >= 0) & (inis < len(self._konum))
+        i = np.where(sinirda, self._konum[np.where(sinirda, binis, 0)], -1)
+        j = np.where(sinirda, self._konum[np.where(sinirda, inis, 0)], -1)
+        gecerli = (i >= 0) & (j >= 0) & (aktarma >= 0) & (aktarma <= IZBAN_MAX_AKTARMA)
+        hucre = np.ravel_multi_index((np.where(gecerli, i, 0), np.where(gecerli, j, 0),
+                                      np.where(gecerli, aktarma, 0), halk_tasit.astype(np.int64)), self.sekil)
+        return np.where(gecerli, hucre, -1)
+
+    def anahtar(self, hucre: int) -> Tuple[int, int, int, bool]:
+        i, j, aktarma, halk_tasit = np.unravel_index(hucre, self.sekil)
+        return int(self.istasyon_idleri[i]), int(self.istasyon_idleri[j]), int(aktarma), bool(halk_tasit)
+
+    def getir(self, hucre: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(hücre dolu mu, yanıt) döndürür; yanıt None ise API sonuç bulamamıştır."""
+        with self._kilit:
+            if hucre in self._ek_kayitlar:
+                return True, self._ek_kayitlar[hucre]
+            satir = int(self._satir[hucre])
+            if satir < 0:
+                return False, None
+            if not self._sonuc_var[satir]:
+                return True, None
+            # Boş (null) alanlar API yanıtındaki gibi None olarak döner.
+            return True, {alan: None if pd.isna(dizi[satir]) else _sayiya_cevir(dizi[satir]) for alan, dizi in self._sutunlar.items()}
+
+    def kaydet(self, hucre: int, yanit: Optional[Dict[str, Any]]) -> None:
+        with self._kilit:
+            self._ek_kayitlar[hucre] = yanit
+
+    def eksik_hucreler(self) -> np.ndarray:
+        with self._kilit:
+            eksik = self._satir < 0
+            eksik[list(self._ek_kayitlar)] = False
+        return np.flatnonzero(eksik)
+
+    def dolu_hucre_sayisi(self) -> int:
+        return int(np.prod(self.sekil)) - len(self.eksik_hucreler())
+
+    def veri_cercevesi(self) -> pd.DataFrame:
+        with self._kilit:
+            dolu = np.flatnonzero(self._satir >= 0)
+            satirlar = self._satir[dolu]
+            kayitlar = {alan: dizi[satirlar] for alan, dizi in self._sutunlar.items()}
+            kayitlar['SONUC_VAR'] = self._sonuc_var[satirlar]
+            df = pd.DataFrame({**dict(zip(['BINIS_ID', 'INIS_ID', 'AKTARMA', 'HALK_TASIT'], self._anahtar_dizileri(dolu))), **kayitlar})
+            ekler = list(self._ek_kayitlar.items())
+        if ekler:
+            hucreler = np.array([hucre for hucre, _ in ekler])
+            ek_df = pd.DataFrame([yanit or {} for _, yanit in ekler])
+            ek_df = pd.concat([pd.DataFrame(dict(zip(['BINIS_ID', 'INIS_ID', 'AKTARMA', 'HALK_TASIT'], self._anahtar_dizileri(hucreler)))),
+                               ek_df.reset_index(drop=True)], axis=1)
+            ek_df['SONUC_VAR'] = [yanit is not None for _, yanit in ekler]
+            df = pd.concat([df[~np.isin(self._hucre_dizisi(df), hucreler)], ek_df], ignore_index=True)
+        return df.sort_values(['BINIS_ID', 'INIS_ID', 'AKTARMA', 'HALK_TASIT'], kind='stable').reset_index(drop=True)
+
+    def _anahtar_dizileri(self, hucreler: np.ndarray) -> List[np.ndarray]:
+        i, j, aktarma, halk_tasit = np.unravel_index(hucreler, self.sekil)
+        return [self.istasyon_idleri[i].astype(np.int16), self.istasyon_idleri[j].astype(np.int16),
+                aktarma.astype(np.int8), halk_tasit.astype(bool)]
+
+    def _hucre_dizisi(self, df: pd.DataFrame) -> np.ndarray:
+        return self.hucreler(df['BINIS_ID'].to_numpy(), df['INIS_ID'].to_numpy(), df['AKTARMA'].to_numpy(), df['HALK_TASIT'].to_numpy())
+
+    def diske_yaz(self, dosya_yolu: str) -> None:
+        """Tabloyu Parquet olarak kaydeder ve sonradan eklenen kayıtları sütun dizilerine katar."""
+        with self._kilit:
+            yazilanlar = dict(self._ek_kayitlar)
+        df = self.veri_cercevesi().convert_dtypes()
+        _write_parquet_atomic(df, dosya_yolu)
+        _write_download_meta(dosya_yolu, {'imza': self.imza, 'son_kontrol': self.son_kontrol})
+        with self._kilit:
+            ekler = self._ek_kayitlar
+            self._yukle(df)
+            # Yazma sırasında gelen veya değişen kayıtlar korunur.
+            self._ek_kayitlar = {h: y for h, y in ekler.items() if h not in yazilanlar or yazilanlar[h] != y}
+
+_izban_ucret_tablosu: Optional[_IzbanUcretTablosu] = None
+# Tablo değiştiğinde veya kontrol istendiğinde bekleyen doldurma işini uyandırır.
+_izban_ucret_tablosu_uyandir = Event()
+
+def _izban_ucret_tablosu_yolu() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'processed_izban_ucretleri.parquet')
+
+def _izban_ucret_tablosunu_yukle(df: pd.DataFrame) -> None:
+    """
+    İstasyon listesi değiştiğinde ücret tablosunu kurar. `data/` altındaki tablo aynı
+    istasyonlar için oluşturulmuşsa yüklenir; değilse boş bir tablo ile başlanır.
+    """
+    global _izban_ucret_tablosu
+    idler = df['ISTASYON_ID'].dropna().astype(np.int64).unique()
+    if len(idler) == 0:
+        return
+    imza = hashlib.sha256(np.sort(idler).tobytes() + f"{IZBAN_MAX_AKTARMA}".encode()).hexdigest()
+    if _izban_ucret_tablosu is not None and _izban_ucret_tablosu.imza == imza:
+        return
+
+    dosya_yolu = _izban_ucret_tablosu_yolu()
+    meta = _read_download_meta(dosya_yolu)
+    kayitli = None
+    if meta.get('imza') == imza and os.path.exists(dosya_yolu):
+        try:
+            kayitli = pd.read_parquet(dosya_yolu)
+        except Exception as e:
+            logger.warning(f"İZBAN ücret tablosu okunamadı, yeniden oluşturulacak: {e}")
+    _izban_ucret_tablosu = _IzbanUcretTablosu(idler, imza, kayitli, meta.get('son_kontrol', 0.0) if kayitli is not None else 0.0)
+    _izban_ucret_tablosu_uyandir.set()
+    logger.info(f"İZBAN ücret tablosu hazır: {_izban_ucret_tablosu.dolu_hucre_sayisi()}/{int(np.prod(_izban_ucret_tablosu.sekil))} hücre dolu.")
+
+_veri_dinleyicisi_ekle('izban_stations_df', _izban_ucret_tablosunu_yukle)
+
+def _izban_ucretini_sorgula(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_sayisi: int, halk_tasit: bool) -> Optional[Dict[str, Any]]:
+    """
+    Ücret hesaplama API'sini senkron olarak çağırır; sonuç yoksa (204) None döndürür.
+
+    Raises:
+        requests.exceptions.RequestException: İstek başarısız olursa.
+    """
+    response = _http_get(_izban_tutar_url(binis_istasyon_id, inis_istasyon_id, aktarma_sayisi, halk_tasit))
+    if response.status_code == 204:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def _bos_alanlari_at(yanit: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Yanıtları, tabloda sütunu olmayan alanlar ile boş alanlar ayrımı gözetmeden karşılaştırmak için."""
+    return None if yanit is None else {alan: deger for alan, deger in yanit.items() if deger is not None}
+
+def _izban_tarifesi_degisti_mi(tablo: _IzbanUcretTablosu) -> bool:
+    """Tablodan rastgele seçilen birkaç dolu hücreyi API'den yeniden sorgulayıp kayıtlı yanıtla karşılaştırır."""
+    doluluk = np.ones(int(np.prod(tablo.sekil)), dtype=bool)
+    doluluk[tablo.eksik_hucreler()] = False
+    adaylar = np.flatnonzero(doluluk)
+    for hucre in random.sample(adaylar.tolist(), min(IZBAN_UCRET_KONTROL_ORNEGI, len(adaylar))):
+        _, kayitli = tablo.getir(hucre)
+        guncel = _izban_ucretini_sorgula(*tablo.anahtar(hucre))
+        if _bos_alanlari_at(guncel) != _bos_alanlari_at(kayitli):
+            logger.info(f"İZBAN ücreti değişmiş ({tablo.anahtar(hucre)}): {kayitli} -> {guncel}")
+            return True
+        sleep(IZBAN_UCRET_ISTEK_ARALIGI_S)
+    return False
+
+def _izban_ucret_tablosunu_doldur() -> None:
+    """
+    Ücret tablosunun eksik hücrelerini API'ye `IZBAN_UCRET_ISTEK_ARALIGI_S` aralıklarla tek
+    tek sorgulayarak doldurur ve ara ara diske yazar; yeniden başlatıldığında kaldığı yerden
+    devam eder. Tablo tamamlandıktan sonra `IZBAN_UCRET_KONTROL_ARALIGI_S` saniyede bir
+    tarifenin değişip değişmediğini kontrol eder; değiştiyse tablo baştan doldurulur.
+    """
+    global _izban_ucret_tablosu
+    dosya_yolu = _izban_ucret_tablosu_yolu()
+    while True:
+        tablo = _izban_ucret_tablosu
+        if tablo is None:
+            _izban_ucret_tablosu_uyandir.wait(60)
+            _izban_ucret_tablosu_uyandir.clear()
+            continue
+
+        eksikler = tablo.eksik_hucreler()
+        if len(eksikler):
+            logger.info(f"İZBAN ücret tablosunun {len(eksikler)} eksik hücresi dolduruluyor...")
+            for sira, hucre in enumerate(eksikler.tolist(), start=1):
+                if _izban_ucret_tablosu is not tablo:
+                    break
+                if tablo.getir(hucre)[0]:
+                    continue  # Bu arada bir araç çağrısıyla doldurulmuş.
+                try:
+                    tablo.kaydet(hucre, _izban_ucretini_sorgula(*tablo.anahtar(hucre)))
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.warning(f"İZBAN ücreti alınamadı {tablo.anahtar(hucre)}, daha sonra tekrar denenecek: {e}")
+                    sleep(HTTP_DEVRE_KESICI_BEKLEME_S)
+                if sira % 500 == 0:
+                    tablo.diske_yaz(dosya_yolu)
+                sleep(IZBAN_UCRET_ISTEK_ARALIGI_S)
+            tablo.diske_yaz(dosya_yolu)
+            if len(tablo.eksik_hucreler()) == 0:
+                tablo.son_kontrol = zaman_damgasi()
+                tablo.diske_yaz(dosya_yolu)
+                logger.info("İZBAN ücret tablosu tamamlandı.")
+            continue
+
+        bekleme = tablo.son_kontrol + IZBAN_UCRET_KONTROL_ARALIGI_S - zaman_damgasi()
+        if bekleme > 0:
+            _izban_ucret_tablosu_uyandir.wait(bekleme)
+            _izban_ucret_tablosu_uyandir.clear()
+            continue
+        try:
+            degisti = _izban_tarifesi_degisti_mi(tablo)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"İZBAN tarifesi kontrol edilemedi: {e}")
+            sleep(HTTP_DEVRE_KESICI_BEKLEME_S)
+            continue
+        if degisti and _izban_ucret_tablosu is tablo:
+            logger.info("İZBAN tarifesi değişmiş, ücret tablosu yeniden oluşturulacak.")
+            _izban_ucret_tablosu = _IzbanUcretTablosu(tablo.istasyon_idleri, tablo.imza)
+        else:
+            tablo.son_kontrol = zaman_damgasi()
+            tablo.diske_yaz(dosya_yolu)
+
+def izban_ucret_tablosu_olusturmayi_baslat() -> None:
+    """Ücret tablosunu dolduran ve güncel tutan işi arka planda bir thread'de başlatır."""
+    Thread(target=_izban_ucret_tablosunu_doldur, name="izban-ucret-tablosu", daemon=True).start()
+
 # --- Tool 7: İZBAN Tutar Hesaplama ---
 @mcp.tool()
-def izban_tutar_hesapla(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_sayisi: int) -> Optional[Dict[str, Any]]:
+async def izban_tutar_hesapla(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_sayisi: int) -> Optional[Dict[str, Any]]:
     """
     'Gittiğin Kadar Öde' sistemine göre İZBAN yolculuk ücretini hesaplar.
     Halk Taşıt saat dilimlerini (her gün 05:00-07:00 ve 19:00-20:00) otomatik olarak kontrol eder.
+    Ücretler önceden hesaplanmış yerel tablodan okunur; tabloda olmayanlar API'den alınır.
 
     Args:
         binis_istasyon_id (int): Biniş yapılacak istasyonun ID'si.
@@ -629,18 +2008,31 @@ def izban_tutar_hesapla(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_s
         logger.warning(f"Saat dilimi bilgisi alınamadı, 'halk_tasit_saati_mi' false varsayılıyor. Hata: {e}")
         is_halk_tasit_saati = False
 
-    url = f"https://openapi.izmir.bel.tr/api/izban/tutarhesaplama/{binis_istasyon_id}/{inis_istasyon_id}/{aktarma_sayisi}/{str(is_halk_tasit_saati).lower()}"
+    tablo = _izban_ucret_tablosu
+    hucre = int(tablo.hucreler(binis_istasyon_id, inis_istasyon_id, aktarma_sayisi, is_halk_tasit_saati)) if tablo is not None else -1
+    if hucre >= 0:
+        bulundu, data = tablo.getir(hucre)
+        if bulundu:
+            if data is None:
+                return {"hata": "Hesaplama yapılamadı, sonuç bulunamadı."}
+            return {**data, 'HalkTasitSaatiUygulandiMi': is_halk_tasit_saati}
+
+    url = _izban_tutar_url(binis_istasyon_id, inis_istasyon_id, aktarma_sayisi, is_halk_tasit_saati)
     try:
-        response = requests.get(url)
+        response = await _http_get_async(url)
         if response.status_code == 200:
             data = response.json()
+            if hucre >= 0:
+                tablo.kaydet(hucre, dict(data))
             data['HalkTasitSaatiUygulandiMi'] = is_halk_tasit_saati
             return data
         elif response.status_code == 204:
             logger.info(f"'{binis_istasyon_id}' ve '{inis_istasyon_id}' arasında ücret hesaplama için sonuç bulunamadı.")
+            if hucre >= 0:
+                tablo.kaydet(hucre, None)
             return {"hata": "Hesaplama yapılamadı, sonuç bulunamadı."}
         response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+    except _HTTP_HATALARI as e:
         logger.error(f"İZBAN tutar hesaplama API isteği sırasında hata: {e}")
         return None
     return None
@@ -648,7 +2040,7 @@ def izban_tutar_hesapla(binis_istasyon_id: int, inis_istasyon_id: int, aktarma_s
 
 # --- Tool 8: Otobüs Hattı Arama ---
 @mcp.tool()
-def hat_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+async def hat_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
     Adında veya güzergahında belirtilen metin geçen otobüs hatlarını arar.
     Sonuç olarak, diğer araçlarda 'line_id' olarak kullanılabilecek 'hat_id' bilgisini de döndürür.
@@ -660,11 +2052,15 @@ def hat_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     Returns:
         Hat bilgilerini ve 'hat_id' içeren kayıtların listesi.
     """
-    raw_results = _search_acikveri(
-        resource_id=HAT_ARAMA_RESOURCE_ID,
-        query=hat_bilgisi,
-        limit=limit
-    )
+    indeks = _hat_arama_indeksi
+    if indeks is not None:
+        raw_results = indeks.ara(hat_bilgisi, limit)
+    else:
+        raw_results = await _search_acikveri(
+            resource_id=HAT_ARAMA_RESOURCE_ID,
+            query=hat_bilgisi,
+            limit=limit
+        )
 
     if not raw_results:
         return [] 
@@ -682,25 +2078,126 @@ def hat_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     
     return processed_results
 
+# --- Sefer Saati Yardımcıları ---
+# Sefer saatleri tablosundaki TARIFE_ID değerlerinin karşılık geldiği gün türleri
+TARIFE_GUN_TURLERI = {1: "Hafta içi", 2: "Cumartesi", 3: "Pazar"}
+
+def _tarife_id(tarih: datetime) -> int:
+    gun = tarih.weekday()
+    return 1 if gun < 5 else (2 if gun == 5 else 3)
+
+def _saatten_dakikaya(saatler: pd.Series) -> np.ndarray:
+    """'SS:DD' biçimindeki saatleri gece yarısından itibaren dakikaya çevirir; geçersiz değerler NaN olur."""
+    parcalar = saatler.astype(str).str.extract(r'^\s*(\d{1,2})[:.](\d{2})')
+    return (pd.to_numeric(parcalar[0], errors='coerce') * 60 + pd.to_numeric(parcalar[1], errors='coerce')).to_numpy(dtype=float)
+
+def _saat_dakikasi(saat: str) -> Optional[int]:
+    """Tek bir 'SS:DD' saatini gece yarısından itibaren dakikaya çevirir; geçersizse None döner."""
+    eslesme = re.match(r'^\s*(\d{1,2})[:.](\d{2})\s*$', str(saat))
+    if not eslesme or int(eslesme.group(1)) >= 24 or int(eslesme.group(2)) >= 60:
+        return None
+    return int(eslesme.group(1)) * 60 + int(eslesme.group(2))
+
+def _dakikadan_saate(dakika: float) -> str:
+    dakika = int(round(dakika)) % (24 * 60)
+    return f"{dakika // 60:02d}:{dakika % 60:02d}"
+
+def _gece_yarisini_duzelt(kalkislar: np.ndarray) -> np.ndarray:
+    """Sıra numarasına göre dizilmiş kalkışlarda ilk seferden önceki saatleri (00:30 gibi) ertesi güne taşır."""
+    kalkislar = kalkislar[~np.isnan(kalkislar)]
+    if len(kalkislar):
+        kalkislar = np.where(kalkislar < kalkislar[0], kalkislar + 24 * 60, kalkislar)
+    return np.sort(kalkislar)
+
+class _KalkisTablosu:
+    """
+    Hat başı kalkış saatlerinin (hat, gün türü, yön) başına sıralı tamsayı dakika dizileri.
+
+    Tüm gruplar tek bir `dakikalar` dizisinde art arda tutulur (CSR): grubun dilimi sıralı
+    anahtar dizisinde, verilen bir saatten sonraki ilk kalkış da bu dilim içinde ikili
+    aramayla bulunur. Gece yarısından sonraki seferler (23:40'ın ardından 00:30 gibi)
+    24*60 eklenerek ait oldukları günün tarifesinde kalır.
+    """
+
+    YONLER = ("Gidiş", "Dönüş")
+    _SUTUNLAR = (
+        ('GIDIS_SAATI', 'GIDIS_ENGELLI_DESTEGI', 'BISIKLETLI_GIDIS', 'GIDIS_ELEKTRIKLI_OTOBUS'),
+        ('DONUS_SAATI', 'DONUS_ENGELLI_DESTEGI', 'BISIKLETLI_DONUS', 'DONUS_ELEKTRIKLI_OTOBUS'),
+    )
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.sort_values(['HAT_NO', 'TARIFE_ID', 'SIRA'], kind='stable')
+        anahtarlar, dakikalar, ozellikler = [], [], []
+        for yon, (saat, *ozellik_sutunlari) in enumerate(self._SUTUNLAR):
+            dakika = _saatten_dakikaya(df[saat])
+            gecerli = ~np.isnan(dakika)
+            anahtar = self._anahtar(df['HAT_NO'].to_numpy()[gecerli], df['TARIFE_ID'].to_numpy()[gecerli], yon)
+            dakika = dakika[gecerli]
+            yeni_grup = np.ones(len(anahtar), dtype=bool)
+            yeni_grup[1:] = anahtar[1:] != anahtar[:-1]
+            ilk_kalkis = dakika[np.flatnonzero(yeni_grup)][np.cumsum(yeni_grup) - 1]
+            anahtarlar.append(anahtar)
+            dakikalar.append(np.where(dakika < ilk_kalkis, dakika + 24 * 60, dakika))
+            ozellikler.append(np.column_stack([
+                df[sutun].to_numpy()[gecerli] if sutun in df.columns else np.zeros(gecerli.sum(), dtype=bool)
+                for sutun in ozellik_sutunlari
+            ]).astype(bool))
+
+        anahtar = np.concatenate(anahtarlar)
+        dakika = np.concatenate(dakikalar)
+        sira = np.lexsort((dakika, anahtar))
+        # Tabloda aynı seferin birden çok kez yer aldığı satırlar tek kalkışa indirgenir.
+        farkli = np.ones(len(sira), dtype=bool)
+        farkli[1:] = (anahtar[sira][1:] != anahtar[sira][:-1]) | (dakika[sira][1:] != dakika[sira][:-1])
+        sira = sira[farkli]
+        anahtar = anahtar[sira]
+        self.dakikalar = dakika[sira].astype(np.int32)
+        self.ozellikler = np.concatenate(ozellikler)[sira]
+        self._anahtarlar, self._baslangiclar = np.unique(anahtar, return_index=True)
+        self._baslangiclar = np.append(self._baslangiclar, len(anahtar))
+
+    @staticmethod
+    def _anahtar(hat_no: Any, tarife_id: Any, yon: int) -> Any:
+        return (np.asarray(hat_no, dtype=np.int64) * 4 + tarife_id) * 2 + yon
+
+    def kalkislar(self, hat_no: int, tarife_id: int, yon: int, dakika: int, adet: int) -> range:
+        """`dakika` ve sonrasındaki en fazla `adet` kalkışın `dakikalar` içindeki konumları."""
+        anahtar = self._anahtar(hat_no, tarife_id, yon)
+        i = int(np.searchsorted(self._anahtarlar, anahtar))
+        if i == len(self._anahtarlar) or self._anahtarlar[i] != anahtar:
+            return range(0)
+        bas, bit = int(self._baslangiclar[i]), int(self._baslangiclar[i + 1])
+        ilk = bas + int(np.searchsorted(self.dakikalar[bas:bit], dakika))
+        return range(ilk, min(ilk + adet, bit))
+
+_kalkis_tablosu: Optional[_KalkisTablosu] = None
+
+def _kalkis_tablosunu_olustur(df: pd.DataFrame) -> None:
+    global _kalkis_tablosu
+    _kalkis_tablosu = _KalkisTablosu(df)
+
+_veri_dinleyicisi_ekle('schedules_df', _kalkis_tablosunu_olustur)
+
 # --- Tool 9: Hat Sefer Saati Arama ---
-def _indir_ve_cache_le_sefer_saatleri_csv() -> Optional[str]:
+# (HAT_NO'ya göre sıralı hat numarası dizisi, aynı sırada sefer saatleri tablosu)
+_sefer_indeksi: Optional[Tuple[np.ndarray, pd.DataFrame]] = None
+
+def _sefer_indeksini_olustur(df: pd.DataFrame) -> None:
     """
-    Sefer saatleri CSV dosyasını indirir ve yerel bir kopyasını oluşturur.
-    Dosya zaten varsa tekrar indirmez.
+    Sefer saatleri tablosunu HAT_NO'ya göre sıralı tutar; bir hattın seferleri
+    böylece `np.searchsorted` ile bulunan tek bir dilim olarak okunabilir.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dosya_yolu = os.path.join(script_dir, "data", "eshot-otobus-hareketsaatleri.csv")
+    global _sefer_indeksi
+    if not df['HAT_NO'].is_monotonic_increasing:
+        df = df.sort_values('HAT_NO', kind='stable').reset_index(drop=True)
+    _sefer_indeksi = (df['HAT_NO'].to_numpy(), df)
 
-    if _download_csv(SEFER_SAATLERI_CSV_URL, dosya_yolu):
-        return dosya_yolu
-    else:
-        logger.warning(f"Sefer saatleri CSV'si indirilemedi. Mevcut dosya (varsa) kullanılacak: '{dosya_yolu}'")
-        return dosya_yolu if os.path.exists(dosya_yolu) else None
+_veri_dinleyicisi_ekle('schedules_df', _sefer_indeksini_olustur)
 
 @mcp.tool()
 def hat_sefer_saatlerini_ara(hat_no: int, limit: int = 50) -> Optional[List[Dict[str, Any]]]:
     """
-    Belirtilen hat numarasına göre otobüs sefer saatlerini CSV dosyasından arar.
+    Belirtilen hat numarasına göre otobüs sefer saatlerini yerel sefer tablosundan arar.
 
     Args:
         hat_no (int): Sefer saatleri aranacak hat numarası.
@@ -709,47 +2206,262 @@ def hat_sefer_saatlerini_ara(hat_no: int, limit: int = 50) -> Optional[List[Dict
     Returns:
         Sefer saati bilgilerini içeren kayıtların listesi.
     """
-    dosya_yolu = _indir_ve_cache_le_sefer_saatleri_csv()
-    if not dosya_yolu:
-        return [{"hata": "Sefer saatleri verisi indirilemediği için işlem yapılamıyor."}]
+    indeks = _sefer_indeksi
+    if indeks is None:
+        logger.error("Sefer saatleri verisi yüklenemediği için arama yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Sefer saatleri veritabanı hazır değil.")}]
 
-    try:
-        df = pd.read_csv(dosya_yolu, sep=';')
-        hat_verileri = df[df['HAT_NO'] == hat_no].head(limit)
+    hat_no_dizisi, df = indeks
+    baslangic = np.searchsorted(hat_no_dizisi, hat_no, side='left')
+    bitis = np.searchsorted(hat_no_dizisi, hat_no, side='right')
+    hat_verileri = df.iloc[baslangic:min(bitis, baslangic + limit)]
+
+    return hat_verileri.to_dict('records')
+
+# --- Güzergah Geometrisi ---
+def _douglas_peucker(enlemler: np.ndarray, boylamlar: np.ndarray, tolerans_metre: float) -> np.ndarray:
+    """
+    Douglas-Peucker ile sadeleştirir: uçlar korunur, her parçada doğruya en uzak nokta
+    `tolerans_metre`den uzaksa tutulup parça ikiye bölünür. Tutulan noktaların maskesini döndürür.
+    Mesafeler yerel eşdikdörtgen izdüşümde metre cinsinden hesaplanır.
+    """
+    n = len(enlemler)
+    tut = np.zeros(n, dtype=bool)
+    if n == 0:
+        return tut
+    tut[[0, n - 1]] = True
+    y = enlemler * 110540.0
+    x = boylamlar * 111320.0 * np.cos(np.radians(float(enlemler.mean())))
+
+    yigin = [(0, n - 1)]
+    while yigin:
+        bas, bit = yigin.pop()
+        if bit - bas < 2:
+            continue
+        dx, dy = x[bit] - x[bas], y[bit] - y[bas]
+        px, py = x[bas + 1:bit] - x[bas], y[bas + 1:bit] - y[bas]
+        uzunluk2 = dx * dx + dy * dy
+        if uzunluk2 == 0:
+            uzaklik = np.hypot(px, py)
+        else:
+            t = np.clip((px * dx + py * dy) / uzunluk2, 0.0, 1.0)
+            uzaklik = np.hypot(px - t * dx, py - t * dy)
+        i = int(uzaklik.argmax())
+        if uzaklik[i] > tolerans_metre:
+            orta = bas + 1 + i
+            tut[orta] = True
+            yigin.append((bas, orta))
+            yigin.append((orta, bit))
+    return tut
+
+def _polyline_kodla(enlemler: np.ndarray, boylamlar: np.ndarray, hassasiyet: int = 5) -> str:
+    """Koordinatları Google "Encoded Polyline" biçiminde (varsayılan 1e-5 derece hassasiyet) kodlar."""
+    tamsayilar = np.round(np.column_stack([enlemler, boylamlar]) * 10 ** hassasiyet).astype(np.int64)
+    farklar = np.diff(tamsayilar, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    karakterler = []
+    for deger in ((farklar << 1) ^ (farklar >> 63)).tolist():
+        while deger >= 0x20:
+            karakterler.append(chr((0x20 | (deger & 0x1f)) + 63))
+            deger >>= 5
+        karakterler.append(chr(deger + 63))
+    return ''.join(karakterler)
+
+class _GuzergahIndeksi:
+    """
+    Güzergah koordinatlarının hat başına gruplanmış hali. Tüm noktalar SIRA düzeninde tek
+    bir bitişik `koordinatlar` (n x 2; enlem, boylam) dizisinde durur; her hattın ardışık
+    (HAT_NO, YON) parçaları `_parca_baslangiclari` ofsetleriyle, hattın parça aralığı da
+    sözlükle bulunur. Böylece bir hattın güzergahı sabit zamanda dilim olarak okunur.
+    """
 
-        if hat_verileri.empty:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.sort_values(['HAT_NO', 'SIRA'], kind='stable').reset_index(drop=True)
+        self.koordinatlar = np.ascontiguousarray(self.df[['ENLEM', 'BOYLAM']].to_numpy(dtype=np.float64))
+        hat_nolari = self.df['HAT_NO'].to_numpy()
+        yonler = self.df['YON'].to_numpy() if 'YON' in self.df.columns else np.zeros(len(self.df), dtype=np.int64)
+
+        yeni_parca = np.ones(len(self.df), dtype=bool)
+        yeni_parca[1:] = (hat_nolari[1:] != hat_nolari[:-1]) | (yonler[1:] != yonler[:-1])
+        parca_baslari = np.flatnonzero(yeni_parca)
+        self._parca_baslangiclari = np.append(parca_baslari, len(self.df))
+        self.parca_yonleri = yonler[parca_baslari]
+
+        parca_hatlari = hat_nolari[parca_baslari]
+        hat_baslari = np.flatnonzero(np.r_[True, parca_hatlari[1:] != parca_hatlari[:-1]])
+        hat_sonlari = np.append(hat_baslari[1:], len(parca_baslari))
+        self._hat_parcalari: Dict[int, Tuple[int, int]] = {
+            int(h): (int(b), int(e)) for h, b, e in zip(parca_hatlari[hat_baslari], hat_baslari, hat_sonlari)
+        }
+        self._segmentleri_indeksle(~yeni_parca[1:])
+
+    def _segmentleri_indeksle(self, bagli: np.ndarray, hucre_km: float = GUZERGAH_INDEKS_HUCRE_KM) -> None:
+        """
+        Aynı parçadaki ardışık iki nokta arasındaki her doğru parçasını, sınırlayıcı kutusunun
+        değdiği tüm ızgara hücrelerine kaydeder. Hücre anahtarları `_MekansalIndeks` ile aynı
+        sütun düzeninde sıralı tutulur; bir kare bölgedeki segmentler sütun başına iki ikili
+        aramayla bulunur.
+        """
+        self.hucre_km = hucre_km
+        enlem, boylam = self.koordinatlar[:, 0], self.koordinatlar[:, 1]
+        referans_enlem = float(enlem.mean()) if len(enlem) else 38.42
+        self._km_boylam = 111.320 * np.cos(np.radians(referans_enlem))
+        self._km_enlem = 110.574
+        self._x = boylam * self._km_boylam
+        self._y = enlem * self._km_enlem
+
+        # Her noktanın kendi parçasının başından itibaren güzergah boyunca km uzaklığı
+        adimlar = np.zeros(len(enlem))
+        adimlar[1:] = np.where(bagli, np.hypot(np.diff(self._x), np.diff(self._y)), 0.0)
+        kumulatif = np.cumsum(adimlar)
+        parca_uzunluklari = np.diff(self._parca_baslangiclari)
+        self.kumulatif_km = kumulatif - np.repeat(kumulatif[self._parca_baslangiclari[:-1]], parca_uzunluklari)
+
+        segmentler = np.flatnonzero(bagli)
+        x0 = np.floor(np.minimum(self._x[segmentler], self._x[segmentler + 1]) / hucre_km).astype(np.int64)
+        x1 = np.floor(np.maximum(self._x[segmentler], self._x[segmentler + 1]) / hucre_km).astype(np.int64)
+        y0 = np.floor(np.minimum(self._y[segmentler], self._y[segmentler + 1]) / hucre_km).astype(np.int64)
+        y1 = np.floor(np.maximum(self._y[segmentler], self._y[segmentler + 1]) / hucre_km).astype(np.int64)
+        if len(segmentler):
+            self._ix_min, self._ix_max = int(x0.min()), int(x1.max())
+            self._iy_min, self._iy_max = int(y0.min()), int(y1.max())
+        else:
+            self._ix_min = self._ix_max = self._iy_min = self._iy_max = 0
+        self._ny = self._iy_max - self._iy_min + 1
+
+        # Her segment kutusundaki (genişlik x yükseklik) hücre kadar tekrarlanır.
+        yukseklik = y1 - y0 + 1
+        adetler = (x1 - x0 + 1) * yukseklik
+        tekrar = np.repeat(np.arange(len(segmentler)), adetler)
+        sira_ici = np.arange(len(tekrar)) - np.repeat(np.cumsum(adetler) - adetler, adetler)
+        ix = x0[tekrar] + sira_ici // yukseklik[tekrar]
+        iy = y0[tekrar] + sira_ici % yukseklik[tekrar]
+        anahtarlar = (ix - self._ix_min) * self._ny + (iy - self._iy_min)
+        sira = np.argsort(anahtarlar, kind='stable')
+        self._segment_anahtarlari = anahtarlar[sira]
+        self._segmentler = segmentler[tekrar[sira]]
+
+    def izdus(self, bas: int, bit: int, enlemler: np.ndarray, boylamlar: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Noktaları [bas, bit) satırlarındaki parçanın çizgisine tek bir (nokta x segment)
+        matris işlemiyle izdüşürür. Her nokta için parça başından itibaren güzergah boyunca
+        km konumunu ve çizgiye km uzaklığını döndürür.
+        """
+        px = np.asarray(boylamlar, dtype=float)[:, None] * self._km_boylam
+        py = np.asarray(enlemler, dtype=float)[:, None] * self._km_enlem
+        if bit - bas < 2:
+            return np.zeros(len(px)), np.hypot(px[:, 0] - self._x[bas], py[:, 0] - self._y[bas])
+        ax, ay = self._x[bas:bit - 1], self._y[bas:bit - 1]
+        dx, dy = self._x[bas + 1:bit] - ax, self._y[bas + 1:bit] - ay
+        uzunluk2 = dx * dx + dy * dy
+        t = np.clip(np.divide((px - ax) * dx + (py - ay) * dy, uzunluk2, out=np.zeros((len(px), len(ax))), where=uzunluk2 > 0), 0.0, 1.0)
+        uzaklik = np.hypot(ax + t * dx - px, ay + t * dy - py)
+        j = uzaklik.argmin(axis=1)
+        satir = np.arange(len(px))
+        km = self.kumulatif_km[bas + j] + t[satir, j] * np.sqrt(uzunluk2[j])
+        return km, uzaklik[satir, j]
+
+    def yakin_segmentler(self, enlem: float, boylam: float, max_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Konuma `max_km` içinde yaklaşan segmentleri (başlangıç noktası satırı), düzlemsel
+        uzaklıklarını (km) ve segment üzerindeki en yakın noktanın koordinatlarını döndürür.
+        """
+        px, py = boylam * self._km_boylam, enlem * self._km_enlem
+        ix, iy = int(np.floor(px / self.hucre_km)), int(np.floor(py / self.hucre_km))
+        r = int(np.ceil(max_km / self.hucre_km))
+        x0, x1 = max(ix - r, self._ix_min), min(ix + r, self._ix_max)
+        y0, y1 = max(iy - r, self._iy_min), min(iy + r, self._iy_max)
+        if x0 > x1 or y0 > y1 or len(self._segmentler) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty((0, 2))
+        sutunlar = (np.arange(x0, x1 + 1) - self._ix_min) * self._ny
+        baslangiclar = np.searchsorted(self._segment_anahtarlari, sutunlar + (y0 - self._iy_min), side='left')
+        bitisler = np.searchsorted(self._segment_anahtarlari, sutunlar + (y1 - self._iy_min), side='right')
+        segmentler = np.unique(self._segmentler[_araliklari_birlestir(baslangiclar, bitisler)])
+
+        ax, ay = self._x[segmentler], self._y[segmentler]
+        dx, dy = self._x[segmentler + 1] - ax, self._y[segmentler + 1] - ay
+        uzunluk2 = dx * dx + dy * dy
+        t = np.clip(np.divide((px - ax) * dx + (py - ay) * dy, uzunluk2, out=np.zeros_like(uzunluk2), where=uzunluk2 > 0), 0.0, 1.0)
+        km = np.hypot(ax + t * dx - px, ay + t * dy - py)
+        yakin = km <= max_km
+        segmentler, t, km = segmentler[yakin], t[yakin], km[yakin]
+        noktalar = self.koordinatlar[segmentler] + t[:, None] * (self.koordinatlar[segmentler + 1] - self.koordinatlar[segmentler])
+        return segmentler, km, noktalar
+
+    def parcalar(self, hat_no: int) -> List[Tuple[Any, int, int]]:
+        """Hattın (yön, başlangıç, bitiş) satır aralıkları; hat yoksa boş liste."""
+        aralik = self._hat_parcalari.get(hat_no)
+        if aralik is None:
             return []
+        return [(self.parca_yonleri[p], int(self._parca_baslangiclari[p]), int(self._parca_baslangiclari[p + 1]))
+                for p in range(*aralik)]
 
-        return hat_verileri.to_dict('records')
-    except Exception as e:
-        logger.error(f"Sefer saatleri CSV dosyası okunurken hata oluştu: {e}")
-        return [{"hata": f"Sefer saatleri dosyası işlenirken bir hata oluştu: {e}"}]
+_guzergah_indeksi: Optional[_GuzergahIndeksi] = None
+
+def _guzergah_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _guzergah_indeksi
+    _guzergah_indeksi = _GuzergahIndeksi(df)
+
+_veri_dinleyicisi_ekle('route_coords_df', _guzergah_indeksini_olustur)
 
 # --- Tool 10: Hat Güzergah Koordinatlarını Getir ---
 @mcp.tool()
-def hat_guzergah_koordinatlarini_getir(hat_no: int, limit: int = 250) -> Optional[List[Dict[str, Any]]]:
+def hat_guzergah_koordinatlarini_getir(
+    hat_no: int,
+    limit: int = 250,
+    tolerans_metre: Optional[float] = None,
+    bicim: str = "kayit"
+) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen hat numarasına ait güzergahın koordinat (enlem/boylam)
     bilgilerini getirir.
 
     Args:
         hat_no (int): Güzergahı alınacak hat numarası.
-        limit (int): Döndürülelecek maksimum koordinat noktası sayısı.
+        limit (int): Döndürülelecek maksimum koordinat noktası sayısı ('kayit' biçiminde).
+        tolerans_metre (float, optional): Verilirse güzergah Douglas-Peucker ile bu toleransta
+                                          sadeleştirilir (örn. 10). Uç noktalar korunur.
+        bicim (str): 'kayit' her nokta için bir kayıt döndürür; 'polyline' her yön için
+                     Google Encoded Polyline biçiminde tek bir kodlanmış metin döndürür.
 
     Returns:
-        Güzergah koordinatlarını içeren kayıtların listesi.
+        Güzergah koordinatlarını içeren kayıtların listesi veya yön başına
+        (hat_no, yon, nokta_sayisi, polyline) kayıtlarının listesi.
     """
-    if route_coords_df is None:
-        logger.error("Güzergah koordinat verileri yüklenemediği için arama yapılamıyor.")
-        return [{"hata": "Güzergah koordinatları veritabanı hazır değil."}]
+    if bicim not in ("kayit", "polyline"):
+        return [{"hata": "Geçersiz biçim. Sadece 'kayit' veya 'polyline' kullanılabilir."}]
+    if tolerans_metre is not None and tolerans_metre <= 0:
+        return [{"hata": "tolerans_metre pozitif olmalıdır."}]
 
-    results_df = route_coords_df[route_coords_df['HAT_NO'] == hat_no].sort_values('SIRA').head(limit)
+    indeks = _guzergah_indeksi
+    if indeks is None:
+        logger.error("Güzergah koordinat verileri yüklenemediği için arama yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Güzergah koordinatları veritabanı hazır değil.")}]
+
+    sonuclar: List[Dict[str, Any]] = []
+    satirlar = []
+    for yon, bas, bit in indeks.parcalar(hat_no):
+        parca = np.arange(bas, bit)
+        if tolerans_metre is not None:
+            parca = parca[_douglas_peucker(indeks.koordinatlar[bas:bit, 0], indeks.koordinatlar[bas:bit, 1], tolerans_metre)]
+        if bicim == "polyline":
+            sonuclar.append({
+                "hat_no": hat_no,
+                "yon": yon.item() if isinstance(yon, np.generic) else yon,
+                "nokta_sayisi": len(parca),
+                "polyline": _polyline_kodla(indeks.koordinatlar[parca, 0], indeks.koordinatlar[parca, 1])
+            })
+        else:
+            satirlar.append(parca)
 
-    return results_df.to_dict('records')
+    if bicim == "polyline":
+        return sonuclar
+    if not satirlar:
+        return []
+    return indeks.df.iloc[np.concatenate(satirlar)[:limit]].to_dict('records')
 
 # --- Tool 11: Hat Detaylarını Ara ---
 @mcp.tool()
-def hat_detaylarini_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+async def hat_detaylarini_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
     Adında veya güzergahında belirtilen metni içeren hatların
     çalışma saatleri gibi detaylı bilgilerini arar.
@@ -761,15 +2473,324 @@ def hat_detaylarini_ara(hat_bilgisi: str, limit: int = 5) -> Optional[List[Dict[
     Returns:
         Hat detaylarını içeren kayıtların listesi.
     """
-    return _search_acikveri(
+    indeks = _hat_detay_indeksi
+    if indeks is not None:
+        return indeks.ara(hat_bilgisi, limit)
+
+    return await _search_acikveri(
         resource_id=HAT_DETAYLARI_RESOURCE_ID,
         query=hat_bilgisi,
         limit=limit
     )
 
+# --- Mekansal İndeks: Konum Tabanlı Aramalar İçin Izgara ---
+def _haversine_km(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> np.ndarray:
+    """
+    İki nokta (veya nokta dizileri) arasındaki mesafeyi Haversine formülü ile
+    kilometre cinsinden hesaplar. Dizi girdiler NumPy yayınlama kurallarıyla eşleşir.
+    """
+    R = 6371.0
+
+    lat1_rad = np.radians(lat1)
+    lon1_rad = np.radians(lon1)
+    lat2_rad = np.radians(lat2)
+    lon2_rad = np.radians(lon2)
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+
+    a = np.sin(dlat / 2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
+def _araliklari_birlestir(baslangiclar: np.ndarray, bitisler: np.ndarray) -> np.ndarray:
+    """
+    [baslangic, bitis) aralıklarını Python döngüsü olmadan tek bir indeks dizisinde birleştirir.
+    """
+    uzunluklar = bitisler - baslangiclar
+    toplam = int(uzunluklar.sum())
+    if toplam == 0:
+        return np.empty(0, dtype=np.int64)
+    kaymalar = np.repeat(baslangiclar - np.concatenate(([0], np.cumsum(uzunluklar)[:-1])), uzunluklar)
+    return kaymalar + np.arange(toplam)
+
+class _MekansalIndeks:
+    """
+    Noktaları yaklaşık `hucre_km` boyutunda hücrelere bölen bir ızgara indeksi.
+
+    Noktalar hücre anahtarına göre sıralı tutulur; aynı sütundaki ardışık hücreler
+    bellekte bitişik olduğundan, bir kare bölgedeki adaylar sütun başına iki ikili
+    arama ile bulunur. Sorgular yalnızca yakındaki hücrelere bakar ve en yakın k
+    sonuç tam sıralama yerine `np.argpartition` ile seçilir.
+    """
+
+    def __init__(self, kayitlar: pd.DataFrame, hucre_km: float = MEKANSAL_INDEKS_HUCRE_KM):
+        self.hucre_km = hucre_km
+        enlem = kayitlar['ENLEM'].to_numpy(dtype=float)
+        boylam = kayitlar['BOYLAM'].to_numpy(dtype=float)
+
+        referans_enlem = float(np.mean(enlem)) if len(enlem) else 38.42
+        self._km_boylam = 111.320 * np.cos(np.radians(referans_enlem))
+        self._km_enlem = 110.574
+
+        ix, iy = self._hucre(enlem, boylam)
+        if len(enlem):
+            self._ix_min, self._ix_max = int(ix.min()), int(ix.max())
+            self._iy_min, self._iy_max = int(iy.min()), int(iy.max())
+        else:
+            self._ix_min = self._ix_max = self._iy_min = self._iy_max = 0
+        self._ny = self._iy_max - self._iy_min + 1
+
+        anahtarlar = (ix - self._ix_min) * self._ny + (iy - self._iy_min)
+        sira = np.argsort(anahtarlar, kind='stable')
+        self._anahtarlar = anahtarlar[sira]
+        self.enlem = enlem[sira]
+        self.boylam = boylam[sira]
+        self.kayitlar = kayitlar.iloc[sira].reset_index(drop=True)
+        self._kayit_listesi = self.kayitlar.to_dict('records')
+
+    def __len__(self) -> int:
+        return len(self.enlem)
+
+    def _hucre(self, enlem: Any, boylam: Any) -> Tuple[Any, Any]:
+        ix = np.floor(np.asarray(boylam) * self._km_boylam / self.hucre_km).astype(np.int64)
+        iy = np.floor(np.asarray(enlem) * self._km_enlem / self.hucre_km).astype(np.int64)
+        return ix, iy
+
+    def _tum_alani_kaplayan_r(self, ix: int, iy: int) -> int:
+        return max(ix - self._ix_min, self._ix_max - ix, iy - self._iy_min, self._iy_max - iy, 0)
+
+    def _alana_uzaklik_r(self, ix: int, iy: int) -> int:
+        return max(self._ix_min - ix, ix - self._ix_max, self._iy_min - iy, iy - self._iy_max, 0)
+
+    def _kare_adaylari(self, ix: int, iy: int, r: int) -> np.ndarray:
+        """
+        (ix, iy) hücresini merkez alan (2r+1)x(2r+1) hücrelik karedeki noktaların indekslerini döndürür.
+        """
+        x0, x1 = max(ix - r, self._ix_min), min(ix + r, self._ix_max)
+        y0, y1 = max(iy - r, self._iy_min), min(iy + r, self._iy_max)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.int64)
+        sutunlar = (np.arange(x0, x1 + 1) - self._ix_min) * self._ny
+        baslangiclar = np.searchsorted(self._anahtarlar, sutunlar + (y0 - self._iy_min), side='left')
+        bitisler = np.searchsorted(self._anahtarlar, sutunlar + (y1 - self._iy_min), side='right')
+        return _araliklari_birlestir(baslangiclar, bitisler)
+
+    def _garanti_r(self, mesafe_km: float) -> int:
+        # Düzlem izdüşümünün enleme bağlı küçük sapması için %2 pay bırakılır.
+        return int(np.ceil(mesafe_km * 1.02 / self.hucre_km))
+
+    def _en_az_k_aday(self, ix: int, iy: int, k: int, r_tam: int) -> Tuple[int, np.ndarray]:
+        """
+        En az `k` aday içerene (veya tüm alanı kaplayana) kadar kareyi büyütür.
+        """
+        r = self._alana_uzaklik_r(ix, iy)
+        adaylar = self._kare_adaylari(ix, iy, r)
+        while len(adaylar) < k and r < r_tam:
+            r = min(2 * r + 1, r_tam)
+            adaylar = self._kare_adaylari(ix, iy, r)
+        return r, adaylar
+
+    def en_yakin(
+        self,
+        enlem: float,
+        boylam: float,
+        k: int,
+        max_km: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Verilen konuma en yakın en fazla `k` noktanın indekslerini ve km cinsinden
+        mesafelerini yakından uzağa sıralı olarak döndürür. `max_km` verilirse
+        yalnızca bu yarıçap içindeki noktalar dikkate alınır.
+        """
+        bos = (np.empty(0, dtype=np.int64), np.empty(0, dtype=float))
+        if len(self) == 0 or k <= 0:
+            return bos
+
+        ix, iy = (int(v) for v in self._hucre(enlem, boylam))
+        r_tam = self._tum_alani_kaplayan_r(ix, iy)
+
+        if max_km is not None:
+            adaylar = self._kare_adaylari(ix, iy, min(self._garanti_r(max_km), r_tam))
+            mesafeler = _haversine_km(enlem, boylam, self.enlem[adaylar], self.boylam[adaylar])
+            yaricap_icinde = mesafeler <= max_km
+            adaylar, mesafeler = adaylar[yaricap_icinde], mesafeler[yaricap_icinde]
+        else:
+            k = min(k, len(self))
+            r, adaylar = self._en_az_k_aday(ix, iy, k, r_tam)
+            mesafeler = _haversine_km(enlem, boylam, self.enlem[adaylar], self.boylam[adaylar])
+
+            # Karenin dışında, bulunan k'ıncı adaydan daha yakın bir nokta kalmadığından emin ol.
+            gerekli_r = min(self._garanti_r(np.partition(mesafeler, k - 1)[k - 1]), r_tam)
+            if gerekli_r > r:
+                adaylar = self._kare_adaylari(ix, iy, gerekli_r)
+                mesafeler = _haversine_km(enlem, boylam, self.enlem[adaylar], self.boylam[adaylar])
+
+        if len(adaylar) > k:
+            secilen = np.argpartition(mesafeler, k - 1)[:k]
+            adaylar, mesafeler = adaylar[secilen], mesafeler[secilen]
+        sira = np.argsort(mesafeler, kind='stable')
+        return adaylar[sira], mesafeler[sira]
+
+    def en_yakin_toplu(
+        self,
+        enlemler: np.ndarray,
+        boylamlar: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Birden çok konumun her biri için en yakın `k` noktayı tek seferde bulur.
+
+        Sorgular hücrelerine göre gruplanır; her hücre için aday kümesi bir kez
+        çıkarılır ve o hücredeki tüm sorgular için mesafe matrisi vektörel olarak
+        hesaplanır. (B, k) boyutlu indeks ve mesafe dizileri döndürür.
+        """
+        enlemler = np.asarray(enlemler, dtype=float)
+        boylamlar = np.asarray(boylamlar, dtype=float)
+        k = min(k, len(self))
+        sonuc_indeksler = np.full((len(enlemler), max(k, 0)), -1, dtype=np.int64)
+        sonuc_mesafeler = np.full((len(enlemler), max(k, 0)), np.inf)
+        if len(enlemler) == 0 or k <= 0:
+            return sonuc_indeksler, sonuc_mesafeler
+
+        ix, iy = self._hucre(enlemler, boylamlar)
+        hucreler, grup = np.unique(np.stack([ix, iy], axis=1), axis=0, return_inverse=True)
+        grup = grup.ravel()
+        sorgu_sirasi = np.argsort(grup, kind='stable')
+        grup_sinirlari = np.searchsorted(grup[sorgu_sirasi], np.arange(len(hucreler) + 1))
+
+        for g, (hx, hy) in enumerate(hucreler.tolist()):
+            sorgular = sorgu_sirasi[grup_sinirlari[g]:grup_sinirlari[g + 1]]
+            q_enlem = enlemler[sorgular, None]
+            q_boylam = boylamlar[sorgular, None]
+
+            r_tam = self._tum_alani_kaplayan_r(hx, hy)
+            r, adaylar = self._en_az_k_aday(hx, hy, k, r_tam)
+            mesafeler = _haversine_km(q_enlem, q_boylam, self.enlem[adaylar], self.boylam[adaylar])
+
+            k_inci = np.partition(mesafeler, k - 1, axis=1)[:, k - 1].max()
+            gerekli_r = min(self._garanti_r(k_inci), r_tam)
+            if gerekli_r > r:
+                adaylar = self._kare_adaylari(hx, hy, gerekli_r)
+                mesafeler = _haversine_km(q_enlem, q_boylam, self.enlem[adaylar], self.boylam[adaylar])
+
+            if mesafeler.shape[1] > k:
+                secilen = np.argpartition(mesafeler, k - 1, axis=1)[:, :k]
+            else:
+                secilen = np.broadcast_to(np.arange(mesafeler.shape[1]), mesafeler.shape)
+            secilen_mesafeler = np.take_along_axis(mesafeler, secilen, axis=1)
+            sira = np.argsort(secilen_mesafeler, axis=1, kind='stable')
+            sonuc_indeksler[sorgular] = adaylar[np.take_along_axis(secilen, sira, axis=1)]
+            sonuc_mesafeler[sorgular] = np.take_along_axis(secilen_mesafeler, sira, axis=1)
+
+        return sonuc_indeksler, sonuc_mesafeler
+
+    def yaricap_icindekiler_toplu(
+        self,
+        enlemler: np.ndarray,
+        boylamlar: np.ndarray,
+        max_km: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Her konum için `max_km` yarıçapı içindeki tüm noktaları bulur (mekansal birleştirme).
+
+        Sorgular hücrelerine göre gruplanır ve her hücre için aday kümesi bir kez çıkarılır.
+        Eşleşen (sorgu indeksi, nokta indeksi, km cinsinden mesafe) üçlülerini üç dizi olarak döndürür.
+        """
+        enlemler = np.asarray(enlemler, dtype=float)
+        boylamlar = np.asarray(boylamlar, dtype=float)
+        if len(enlemler) == 0 or len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        ix, iy = self._hucre(enlemler, boylamlar)
+        hucreler, grup = np.unique(np.stack([ix, iy], axis=1), axis=0, return_inverse=True)
+        grup = grup.ravel()
+        sorgu_sirasi = np.argsort(grup, kind='stable')
+        grup_sinirlari = np.searchsorted(grup[sorgu_sirasi], np.arange(len(hucreler) + 1))
+        r = self._garanti_r(max_km)
+
+        sorgu_parcalari, nokta_parcalari, mesafe_parcalari = [], [], []
+        for g, (hx, hy) in enumerate(hucreler.tolist()):
+            adaylar = self._kare_adaylari(hx, hy, r)
+            if len(adaylar) == 0:
+                continue
+            sorgular = sorgu_sirasi[grup_sinirlari[g]:grup_sinirlari[g + 1]]
+            mesafeler = _haversine_km(enlemler[sorgular, None], boylamlar[sorgular, None],
+                                      self.enlem[adaylar], self.boylam[adaylar])
+            si, ai = np.nonzero(mesafeler <= max_km)
+            sorgu_parcalari.append(sorgular[si])
+            nokta_parcalari.append(adaylar[ai])
+            mesafe_parcalari.append(mesafeler[si, ai])
+
+        if not sorgu_parcalari:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(sorgu_parcalari), np.concatenate(nokta_parcalari), np.concatenate(mesafe_parcalari)
+
+    def kayitlari_getir(self, indeksler: np.ndarray, mesafeler: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        İndekslere karşılık gelen kayıtları `mesafe_km` alanı eklenmiş sözlükler olarak döndürür.
+        """
+        return [
+            {**self._kayit_listesi[i], 'mesafe_km': float(mesafe)}
+            for i, mesafe in zip(indeksler.tolist(), mesafeler.tolist())
+        ]
+
+KONUM_TURLERI = ['Otobüs Durağı', 'İZBAN İstasyonu']
+
+# Tür adı -> indeks; None anahtarı tüm türleri içeren indekstir.
+_konum_indeksleri: Dict[Optional[str], _MekansalIndeks] = {}
+
+def _konum_indekslerini_olustur(_df: Optional[pd.DataFrame] = None) -> None:
+    """
+    Otobüs durakları ve İZBAN istasyonları için mekansal indeksleri yeniden oluşturur.
+    Durak veya istasyon verisi her yenilendiğinde bir kez çalışır.
+    """
+    global _konum_indeksleri
+    parcalar = []
+
+    if stops_df is not None and not stops_df.empty:
+        parcalar.append(pd.DataFrame({
+            'ADI': stops_df['DURAK_ADI'],
+            'ENLEM': stops_df['ENLEM'],
+            'BOYLAM': stops_df['BOYLAM'],
+            'TUR': KONUM_TURLERI[0]
+        }))
+
+    if izban_stations_df is not None and not izban_stations_df.empty:
+        parcalar.append(pd.DataFrame({
+            'ADI': izban_stations_df['ISTASYON_ADI'],
+            'ENLEM': izban_stations_df['ENLEM'],
+            'BOYLAM': izban_stations_df['BOYLAM'],
+            'TUR': KONUM_TURLERI[1]
+        }))
+
+    if not parcalar:
+        _konum_indeksleri = {}
+        return
+
+    birlesik = pd.concat(parcalar, ignore_index=True).dropna(subset=['ADI', 'ENLEM', 'BOYLAM'])
+    indeksler: Dict[Optional[str], _MekansalIndeks] = {None: _MekansalIndeks(birlesik)}
+    for tur in KONUM_TURLERI:
+        tur_kayitlari = birlesik[birlesik['TUR'] == tur]
+        if not tur_kayitlari.empty:
+            indeksler[tur] = _MekansalIndeks(tur_kayitlari)
+
+    _konum_indeksleri = indeksler
+    logger.info(f"Mekansal indeksler oluşturuldu: {len(birlesik)} konum.")
+
+_veri_dinleyicisi_ekle('stops_df', _konum_indekslerini_olustur)
+_veri_dinleyicisi_ekle('izban_stations_df', _konum_indekslerini_olustur)
+
 # --- Tool 12: Konuma Göre En Yakın Durakları Bulma ---
 @mcp.tool()
-def en_yakin_duraklari_bul(latitude: float, longitude: float, limit: int = 5, tur: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+@_havuzda_calistir
+def en_yakin_duraklari_bul(
+    latitude: float,
+    longitude: float,
+    limit: int = 5,
+    tur: Optional[str] = None,
+    max_km: Optional[float] = None
+) -> Optional[List[Dict[str, Any]]]:
     """
     Verilen enlem ve boylama en yakın otobüs duraklarını veya İZBAN istasyonlarını bulur.
     `tur` parametresi ile sadece belirli bir türdeki yerleri arayabilir.
@@ -781,71 +2802,35 @@ def en_yakin_duraklari_bul(latitude: float, longitude: float, limit: int = 5, tu
         limit (int): Döndürülecek maksimum durak/istasyon sayısı.
         tur (str, optional): Aranacak yer türü ('Otobüs Durağı' veya 'İZBAN İstasyonu'). 
                              Belirtilmezse her ikisi de aranır.
+        max_km (float, optional): Verilirse yalnızca bu yarıçap (km) içindeki yerler döndürülür.
 
     Returns:
         En yakın durakların/istasyonların bilgilerini (tür, ad, mesafe vb.) içeren bir liste.
     """
-    if (stops_df is None or stops_df.empty) and \
-       (izban_stations_df is None or izban_stations_df.empty):
+    indeksler = _konum_indeksleri
+    if not indeksler:
         logger.error("Durak ve İZBAN istasyon verileri yüklenemediği için arama yapılamıyor.")
-        return [{"hata": "Veritabanları hazır değil."}]
-
-    all_locations = []
-
-    if stops_df is not None and not stops_df.empty:
-        stops = stops_df.copy()
-        stops['TUR'] = 'Otobüs Durağı'
-        stops = stops.rename(columns={'DURAK_ADI': 'ADI'})
-        all_locations.append(stops[['ADI', 'ENLEM', 'BOYLAM', 'TUR']])
+        return [{"hata": _hazir_degil_mesaji("Veritabanları hazır değil.")}]
 
-    if izban_stations_df is not None and not izban_stations_df.empty:
-        izban = izban_stations_df.copy()
-        izban['TUR'] = 'İZBAN İstasyonu'
-        izban = izban.rename(columns={'ISTASYON_ADI': 'ADI'})
-        all_locations.append(izban[['ADI', 'ENLEM', 'BOYLAM', 'TUR']])
-
-    if not all_locations:
-        logger.warning("Konum tabanlı arama için uygun veri bulunamadı.")
-        return []
-
-    combined_df = pd.concat(all_locations, ignore_index=True).dropna(subset=['ADI', 'ENLEM', 'BOYLAM'])
-
-    target_df = combined_df
     if tur:
-        valid_types = ['Otobüs Durağı', 'İZBAN İstasyonu']
-        if tur in valid_types:
+        if tur in KONUM_TURLERI:
             logger.info(f"Arama sadece '{tur}' türündeki yerler için filtreleniyor.")
-            target_df = combined_df[combined_df['TUR'] == tur]
         else:
             logger.error(f"Geçersiz tür '{tur}' belirtildi.")
-            return [{"hata": f"Geçersiz tür. Sadece {valid_types} değerlerinden biri kullanılabilir."}]
-    
-    if target_df.empty:
+            return [{"hata": f"Geçersiz tür. Sadece {KONUM_TURLERI} değerlerinden biri kullanılabilir."}]
+
+    indeks = indeksler.get(tur or None)
+    if indeks is None:
         logger.warning(f"'{tur}' türünde herhangi bir konum bulunamadı.")
         return []
 
-    R = 6371.0
-
-    lat1_rad = np.radians(latitude)
-    lon1_rad = np.radians(longitude)
-    lat2_rad = np.radians(target_df['ENLEM'])
-    lon2_rad = np.radians(target_df['BOYLAM'])
-
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-
-    a = np.sin(dlat / 2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    distance_km = R * c
-
-    target_df['mesafe_km'] = distance_km
+    secilenler, mesafeler = indeks.en_yakin(latitude, longitude, limit, max_km=max_km)
 
-    nearest = target_df.sort_values(by='mesafe_km').head(limit)
-
-    return nearest.to_dict('records')
+    return indeks.kayitlari_getir(secilenler, mesafeler)
 
 # --- Tool 13: Tarayıcıdan Hassas Konum Alma ---
 @mcp.tool()
+@_ayri_threadde_calistir
 def konumumu_al() -> str:
     """
     Kullanıcının hassas coğrafi konumunu almak için yerel bir web sunucusu başlatır.
@@ -903,7 +2888,7 @@ def konumumu_al() -> str:
 
 # --- Tool 14: Metro İstasyonlarını Getir ---
 @mcp.tool()
-def metro_istasyonlarini_getir() -> Optional[List[Dict[str, Any]]]:
+async def metro_istasyonlarini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     İzmir metrosuna ait tüm istasyonların bir listesini döndürür.
 
@@ -912,20 +2897,17 @@ def metro_istasyonlarini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     url = f"{METRO_BASE_URL}/istasyonlar"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
+        durum_kodu, veri = await _statik_veri_onbellegi.getir(url)
+        if durum_kodu == 204:
             return []
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return veri
+    except _HTTP_HATALARI as e:
         logger.error(f"Metro istasyonları API isteği sırasında hata: {e}")
         return None
-    return None
 
 # --- Tool 15: Tramvay Hatlarını Getir ---
 @mcp.tool()
-def tramvay_hatlarini_getir() -> Optional[List[Dict[str, Any]]]:
+async def tramvay_hatlarini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     İzmir tramvayına ait tüm hatların bir listesini döndürür.
 
@@ -934,20 +2916,17 @@ def tramvay_hatlarini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     url = f"{TRAMVAY_BASE_URL}/hatlar"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
+        durum_kodu, veri = await _statik_veri_onbellegi.getir(url)
+        if durum_kodu == 204:
             return []
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return veri
+    except _HTTP_HATALARI as e:
         logger.error(f"Tramvay hatları API isteği sırasında hata: {e}")
         return None
-    return None
 
 # --- Tool 16: Tramvay İstasyonlarını Getir ---
 @mcp.tool()
-def tramvay_istasyonlarini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
+async def tramvay_istasyonlarini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen hat ID'sine sahip tramvay hattının tüm istasyonlarını getirir.
 
@@ -959,21 +2938,18 @@ def tramvay_istasyonlarini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     url = f"{TRAMVAY_BASE_URL}/istasyonlar/{hat_id}"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
+        durum_kodu, veri = await _statik_veri_onbellegi.getir(url)
+        if durum_kodu == 204:
             logger.info(f"'{hat_id}' numaralı tramvay hattı için istasyon bulunamadı.")
             return []
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return veri
+    except _HTTP_HATALARI as e:
         logger.error(f"Tramvay istasyonları API isteği sırasında hata: {e}")
         return None
-    return None
 
 # --- Tool 17: Tramvay Seferlerini Getir ---
 @mcp.tool()
-def tramvay_seferlerini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
+async def tramvay_seferlerini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     Belirtilen hat ID'sine göre tramvay sefer saatlerini getirir.
 
@@ -985,21 +2961,18 @@ def tramvay_seferlerini_getir(hat_id: int) -> Optional[List[Dict[str, Any]]]:
     """
     url = f"{TRAMVAY_BASE_URL}/seferler/{hat_id}"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
+        durum_kodu, veri = await _statik_veri_onbellegi.getir(url)
+        if durum_kodu == 204:
             logger.info(f"'{hat_id}' numaralı tramvay hattı için sefer bulunamadı.")
             return []
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return veri
+    except _HTTP_HATALARI as e:
         logger.error(f"Tramvay seferleri API isteği sırasında hata: {e}")
         return None
-    return None
 
 # --- Tool 18: Metro Sefer Saatlerini Getir ---
 @mcp.tool()
-def metro_sefer_saatlerini_getir() -> Optional[List[Dict[str, Any]]]:
+async def metro_sefer_saatlerini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     İzmir metrosuna ait tüm sefer saatlerini getirir.
 
@@ -1008,24 +2981,88 @@ def metro_sefer_saatlerini_getir() -> Optional[List[Dict[str, Any]]]:
     """
     url = f"{METRO_BASE_URL}/sefersaatleri"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 204:
+        durum_kodu, veri = await _statik_veri_onbellegi.getir(url)
+        if durum_kodu == 204:
             logger.info("Metro için sefer saati bulunamadı.")
             return []
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return veri
+    except _HTTP_HATALARI as e:
         logger.error(f"Metro sefer saatleri API isteği sırasında hata: {e}")
         return None
-    return None
+
+# --- Raylı Sistem Mesafe Motoru ---
+class _RayliHatMesafeleri:
+    """
+    Bir raylı sistem hattının istasyon adı -> sıra indeksi eşlemesi ve kümülatif
+    mesafe dizisi. İki istasyon arası mesafe, kümülatif mesafelerin farkı olarak
+    O(1) sürede bulunur; tüm istasyon çiftlerinin mesafe matrisi bir kez hesaplanır.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.adlar: List[str] = df['ISTASYON_ADI'].tolist()
+        self.kumulatif = df['KUMULATIF_MESAFE'].to_numpy(dtype=np.int64)
+        self._sira: Dict[str, int] = {}
+        for i, ad in enumerate(self.adlar):
+            self._sira.setdefault(self._anahtar(ad), i)
+        self.matris = np.abs(self.kumulatif[:, None] - self.kumulatif[None, :])
+
+    @staticmethod
+    def _anahtar(ad: Any) -> str:
+        return ' '.join(_kelimelere_ayir(ad))
+
+    def sira(self, ad: str) -> Optional[int]:
+        return self._sira.get(self._anahtar(ad))
+
+    def siralar(self, adlar: List[str]) -> np.ndarray:
+        """Adların sıra indekslerini döndürür; bulunamayan adlar için -1."""
+        return np.fromiter((self._sira.get(self._anahtar(ad), -1) for ad in adlar), dtype=np.int64, count=len(adlar))
+
+_rayli_hat_motorlari: Dict[str, _RayliHatMesafeleri] = {}
+
+def _rayli_hat_motorunu_olustur(hat: str, df: pd.DataFrame) -> None:
+    _rayli_hat_motorlari[hat] = _RayliHatMesafeleri(df)
+
+for _hat in _RAYLI_HATLAR:
+    _veri_dinleyicisi_ekle(_RAYLI_HATLAR[_hat]['degisken'], functools.partial(_rayli_hat_motorunu_olustur, _hat))
+
+def _rayli_hat_motoru(hat: str) -> Tuple[Optional[_RayliHatMesafeleri], Optional[Dict[str, Any]]]:
+    """Hattın mesafe motorunu veya hat geçersiz/hazır değilse bir hata sözlüğünü döndürür."""
+    tanim = _RAYLI_HATLAR.get(hat)
+    if tanim is None:
+        return None, {"hata": f"Geçersiz hat. Sadece {list(_RAYLI_HATLAR)} değerlerinden biri kullanılabilir."}
+    motor = _rayli_hat_motorlari.get(hat)
+    if motor is None:
+        logger.error(f"{tanim['ad']} mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
+        return None, {"hata": _hazir_degil_mesaji(f"{tanim['ad']} mesafe veritabanı hazır değil.")}
+    return motor, None
+
+def _rayli_hat_mesafesi(hat: str, kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Dict[str, Any]:
+    motor, hata = _rayli_hat_motoru(hat)
+    if hata:
+        return hata
+
+    birim = _RAYLI_HATLAR[hat]['birim']
+    birim_adi = "istasyonu" if birim == 'istasyon' else "durağı"
+    kalkis = motor.sira(kalkis_istasyon_adi)
+    varis = motor.sira(varis_istasyon_adi)
+    if kalkis is None:
+        return {"hata": f"Kalkış {birim_adi} bulunamadı: '{kalkis_istasyon_adi}'. Lütfen {birim} adını kontrol edin."}
+    if varis is None:
+        return {"hata": f"Varış {birim_adi} bulunamadı: '{varis_istasyon_adi}'. Lütfen {birim} adını kontrol edin."}
+
+    anahtar = "istasyonu" if birim == 'istasyon' else "duragi"
+    return {
+        f"kalkis_{anahtar}": motor.adlar[kalkis],
+        f"varis_{anahtar}": motor.adlar[varis],
+        "mesafe_metre": int(motor.matris[kalkis, varis])
+    }
 
 # --- Tool 19: Metro İstasyonları Arası Mesafe Hesaplama ---
 @mcp.tool()
 def metro_istasyonlari_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
     """
     İki metro istasyonu arasındaki mesafeyi metre cinsinden hesaplar.
-    İstasyon adlarının tam olarak eşleşmesi gerekir.
+    İstasyon adları büyük/küçük harf ve Türkçe karakter farkları gözetilmeden eşleştirilir.
 
     Args:
         kalkis_istasyon_adi (str): Başlangıç istasyonunun adı.
@@ -1034,39 +3071,14 @@ def metro_istasyonlari_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_ista
     Returns:
         Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
     """
-    if metro_distances_df is None:
-        logger.error("Metro mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
-        return {"hata": "Metro mesafe veritabanı hazır değil."}
-
-    try:
-        kalkis_station = metro_distances_df[metro_distances_df['ISTASYON_ADI'].str.lower() == kalkis_istasyon_adi.lower()]
-        varis_station = metro_distances_df[metro_distances_df['ISTASYON_ADI'].str.lower() == varis_istasyon_adi.lower()]
-
-        if kalkis_station.empty:
-            return {"hata": f"Kalkış istasyonu bulunamadı: '{kalkis_istasyon_adi}'. Lütfen istasyon adını kontrol edin."}
-        if varis_station.empty:
-            return {"hata": f"Varış istasyonu bulunamadı: '{varis_istasyon_adi}'. Lütfen istasyon adını kontrol edin."}
-
-        kalkis_mesafe = kalkis_station.iloc[0]['KUMULATIF_MESAFE']
-        varis_mesafe = varis_station.iloc[0]['KUMULATIF_MESAFE']
-
-        mesafe = abs(varis_mesafe - kalkis_mesafe)
-
-        return {
-            "kalkis_istasyonu": kalkis_station.iloc[0]['ISTASYON_ADI'],
-            "varis_istasyonu": varis_station.iloc[0]['ISTASYON_ADI'],
-            "mesafe_metre": int(mesafe)
-        }
-    except Exception as e:
-        logger.error(f"Metro mesafe hesaplanırken bir hata oluştu: {e}", exc_info=True)
-        return {"hata": f"Hesaplama sırasında beklenmedik bir hata oluştu: {e}"}
+    return _rayli_hat_mesafesi('metro', kalkis_istasyon_adi, varis_istasyon_adi)
 
 # --- Tool 20: Karşıyaka Tramvay İstasyonları Arası Mesafe Hesaplama ---
 @mcp.tool()
 def karsiyaka_tram_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
     """
     İki Karşıyaka tramvay istasyonu arasındaki mesafeyi metre cinsinden hesaplar.
-    İstasyon adlarının tam olarak eşleşmesi gerekir.
+    İstasyon adları büyük/küçük harf ve Türkçe karakter farkları gözetilmeden eşleştirilir.
 
     Args:
         kalkis_istasyon_adi (str): Başlangıç istasyonunun adı.
@@ -1075,39 +3087,46 @@ def karsiyaka_tram_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis
     Returns:
         Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
     """
-    if karsiyaka_tram_distances_df is None:
-        logger.error("Karşıyaka tramvay mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
-        return {"hata": "Karşıyaka tramvay mesafe veritabanı hazır değil."}
+    return _rayli_hat_mesafesi('karsiyaka_tram', kalkis_istasyon_adi, varis_istasyon_adi)
 
-    try:
-        kalkis_station = karsiyaka_tram_distances_df[karsiyaka_tram_distances_df['ISTASYON_ADI'].str.lower() == kalkis_istasyon_adi.lower()]
-        varis_station = karsiyaka_tram_distances_df[karsiyaka_tram_distances_df['ISTASYON_ADI'].str.lower() == varis_istasyon_adi.lower()]
+# --- Tool 21: Konak Tramvay Durakları Arası Mesafe Hesaplama (Kara Tarafı) ---
+@mcp.tool()
+def konak_tram_1_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
+    """
+    Kara tarafı olan yöndeki iki Konak tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
+    Durak adları büyük/küçük harf ve Türkçe karakter farkları gözetilmeden eşleştirilir.
 
-        if kalkis_station.empty:
-            return {"hata": f"Kalkış istasyonu bulunamadı: '{kalkis_istasyon_adi}'. Lütfen istasyon adını kontrol edin."}
-        if varis_station.empty:
-            return {"hata": f"Varış istasyonu bulunamadı: '{varis_istasyon_adi}'. Lütfen istasyon adını kontrol edin."}
+    Args:
+        kalkis_istasyon_adi (str): Başlangıç durağının adı.
+        varis_istasyon_adi (str): Varış durağının adı.
 
-        kalkis_mesafe = kalkis_station.iloc[0]['KUMULATIF_MESAFE']
-        varis_mesafe = varis_station.iloc[0]['KUMULATIF_MESAFE']
+    Returns:
+        Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
+    """
+    return _rayli_hat_mesafesi('konak_tram_kara', kalkis_istasyon_adi, varis_istasyon_adi)
 
-        mesafe = abs(varis_mesafe - kalkis_mesafe)
+# --- Tool 22: Konak Tramvay Durakları Arası Mesafe Hesaplama (Deniz Tarafı) ---
+@mcp.tool()
+def konak_tram_2_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
+    """
+    Deniz tarafı olan yöndeki iki Konak tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
+    Durak adları büyük/küçük harf ve Türkçe karakter farkları gözetilmeden eşleştirilir.
 
-        return {
-            "kalkis_istasyonu": kalkis_station.iloc[0]['ISTASYON_ADI'],
-            "varis_istasyonu": varis_station.iloc[0]['ISTASYON_ADI'],
-            "mesafe_metre": int(mesafe)
-        }
-    except Exception as e:
-        logger.error(f"Karşıyaka tramvay mesafe hesaplanırken bir hata oluştu: {e}", exc_info=True)
-        return {"hata": f"Hesaplama sırasında beklenmedik bir hata oluştu: {e}"}
+    Args:
+        kalkis_istasyon_adi (str): Başlangıç durağının adı.
+        varis_istasyon_adi (str): Varış durağının adı.
 
-# --- Tool 21: Konak Tramvay Durakları Arası Mesafe Hesaplama (Kara Tarafı) ---
+    Returns:
+        Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
+    """
+    return _rayli_hat_mesafesi('konak_tram_deniz', kalkis_istasyon_adi, varis_istasyon_adi)
+
+# --- Tool 23: Çiğli Tramvay Durakları Arası Mesafe Hesaplama ---
 @mcp.tool()
-def konak_tram_1_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
+def cigli_tram_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
     """
-    Kara tarafı olan yöndeki iki Konak tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
-    Durak adlarının tam olarak eşleşmesi gerekir.
+    İki Çiğli tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
+    Durak adları büyük/küçük harf ve Türkçe karakter farkları gözetilmeden eşleştirilir.
 
     Args:
         kalkis_istasyon_adi (str): Başlangıç durağının adı.
@@ -1116,114 +3135,2192 @@ def konak_tram_1_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_i
     Returns:
         Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
     """
-    if konak_tram_distances_df is None:
-        logger.error("Konak tramvay mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
-        return {"hata": "Konak tramvay mesafe veritabanı hazır değil."}
+    return _rayli_hat_mesafesi('cigli_tram', kalkis_istasyon_adi, varis_istasyon_adi)
 
-    try:
-        kalkis_station = konak_tram_distances_df[konak_tram_distances_df['ISTASYON_ADI'].str.lower() == kalkis_istasyon_adi.lower()]
-        varis_station = konak_tram_distances_df[konak_tram_distances_df['ISTASYON_ADI'].str.lower() == varis_istasyon_adi.lower()]
+# --- Tool 24: Veri Setlerinin Durumu ---
+@mcp.tool()
+def veri_durumunu_getir() -> Dict[str, Any]:
+    """
+    Sunucunun kullandığı yerel veri setlerinin hazır olup olmadığını ve her birinin
+    hangi kaynaktan ('anlik_goruntu' veya 'guncel') ne zaman yüklendiğini döndürür.
 
-        if kalkis_station.empty:
-            return {"hata": f"Kalkış durağı bulunamadı: '{kalkis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
-        if varis_station.empty:
-            return {"hata": f"Varış durağı bulunamadı: '{varis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
+    Returns:
+        Genel hazır olma durumunu ve veri seti bazında ayrıntıları içeren bir sözlük.
+    """
+    with _veri_kilidi:
+        durum = {ad: dict(bilgi) for ad, bilgi in _veri_durumu.items()}
+    return {
+        "hazir": veriler_hazir.is_set(),
+        "veri_setleri": {ad: durum.get(ad, {"kaynak": None}) for ad, _, _ in _VERI_SETLERI}
+    }
+
+# --- Tool 25: Çok Sayıda Konum İçin En Yakın Durakları Bulma ---
+@mcp.tool()
+@_havuzda_calistir
+def en_yakin_duraklari_toplu_bul(
+    latitudes: List[float],
+    longitudes: List[float],
+    limit: int = 3,
+    tur: Optional[str] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Birden çok konumun (örneğin bir güzergahın tüm noktaları veya bir hattaki
+    tüm otobüslerin konumları) her biri için en yakın durakları/istasyonları tek
+    seferde bulur. `en_yakin_duraklari_bul` aracını nokta başına çağırmaktan çok daha hızlıdır.
 
-        kalkis_mesafe = kalkis_station.iloc[0]['KUMULATIF_MESAFE']
-        varis_mesafe = varis_station.iloc[0]['KUMULATIF_MESAFE']
+    Args:
+        latitudes (List[float]): Konumların enlemleri.
+        longitudes (List[float]): Konumların boylamları (enlemlerle aynı sırada).
+        limit (int): Her konum için döndürülecek maksimum durak/istasyon sayısı.
+        tur (str, optional): Aranacak yer türü ('Otobüs Durağı' veya 'İZBAN İstasyonu').
+                             Belirtilmezse her ikisi de aranır.
 
-        mesafe = abs(varis_mesafe - kalkis_mesafe)
+    Returns:
+        Her giriş konumu için sırası, koordinatları ve en yakın yerlerin listesini içeren kayıtlar.
+    """
+    if len(latitudes) != len(longitudes):
+        return [{"hata": "Enlem ve boylam listelerinin uzunlukları aynı olmalıdır."}]
+    if len(latitudes) > TOPLU_SORGU_MAX_NOKTA:
+        return [{"hata": f"Tek seferde en fazla {TOPLU_SORGU_MAX_NOKTA} konum sorgulanabilir."}]
+
+    indeksler = _konum_indeksleri
+    if not indeksler:
+        logger.error("Durak ve İZBAN istasyon verileri yüklenemediği için toplu arama yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Veritabanları hazır değil.")}]
+
+    if tur and tur not in KONUM_TURLERI:
+        logger.error(f"Geçersiz tür '{tur}' belirtildi.")
+        return [{"hata": f"Geçersiz tür. Sadece {KONUM_TURLERI} değerlerinden biri kullanılabilir."}]
+
+    indeks = indeksler.get(tur or None)
+    if indeks is None:
+        logger.warning(f"'{tur}' türünde herhangi bir konum bulunamadı.")
+        return []
 
-        return {
-            "kalkis_duragi": kalkis_station.iloc[0]['ISTASYON_ADI'],
-            "varis_duragi": varis_station.iloc[0]['ISTASYON_ADI'],
-            "mesafe_metre": int(mesafe)
+    secilenler, mesafeler = indeks.en_yakin_toplu(np.asarray(latitudes), np.asarray(longitudes), limit)
+
+    return [
+        {
+            "sira": i,
+            "latitude": lat,
+            "longitude": lon,
+            "en_yakinlar": indeks.kayitlari_getir(secilenler[i], mesafeler[i])
         }
-    except Exception as e:
-        logger.error(f"Konak tramvay mesafe hesaplanırken bir hata oluştu: {e}", exc_info=True)
-        return {"hata": f"Hesaplama sırasında beklenmedik bir hata oluştu: {e}"}
+        for i, (lat, lon) in enumerate(zip(latitudes, longitudes))
+    ]
 
-# --- Tool 22: Konak Tramvay Durakları Arası Mesafe Hesaplama (Deniz Tarafı) ---
+# --- Tool 26: Önbellek İstatistikleri ---
 @mcp.tool()
-def konak_tram_2_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
+def onbellek_istatistiklerini_getir() -> List[Dict[str, Any]]:
     """
-    Deniz tarafı olan yöndeki iki Konak tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
-    Durak adlarının tam olarak eşleşmesi gerekir.
+    Sunucunun API yanıtları için kullandığı önbelleklerin isabet/ıska sayılarını,
+    birleştirilen (tek bir istekle karşılanan) eş zamanlı istek sayısını ve
+    güncel kayıt sayısını döndürür.
+
+    Returns:
+        Her önbellek için istatistikleri içeren bir liste.
+    """
+    return [onbellek.istatistikler() for onbellek in _ONBELLEKLER]
+
+# --- Tool 27: Önbelleği Temizle ---
+@mcp.tool()
+def onbellegi_temizle(onbellek_adi: Optional[str] = None) -> Dict[str, Any]:
+    """
+    API yanıt önbelleklerini elle temizler. Örneğin metro/tramvay istasyon veya
+    sefer bilgilerinin değiştiği biliniyorsa bir sonraki sorgunun kaynaktan
+    alınmasını sağlar.
 
     Args:
-        kalkis_istasyon_adi (str): Başlangıç durağının adı.
-        varis_istasyon_adi (str): Varış durağının adı.
+        onbellek_adi (str, optional): Temizlenecek önbelleğin adı ('anlik_veri', 'statik_veri' veya 'erisim_alani').
+                                      Belirtilmezse tüm önbellekler temizlenir.
+
+    Returns:
+        Temizlenen önbelleklerin adlarını içeren bir sözlük.
+    """
+    adlar = [onbellek.ad for onbellek in _ONBELLEKLER]
+    if onbellek_adi is not None and onbellek_adi not in adlar:
+        return {"hata": f"Geçersiz önbellek adı. Sadece {adlar} değerlerinden biri kullanılabilir."}
+
+    temizlenenler = []
+    for onbellek in _ONBELLEKLER:
+        if onbellek_adi is None or onbellek.ad == onbellek_adi:
+            onbellek.temizle()
+            temizlenenler.append(onbellek.ad)
+    logger.info(f"Önbellekler elle temizlendi: {temizlenenler}")
+    return {"temizlenen_onbellekler": temizlenenler}
+
+# --- Tool 28: Raylı Sistem Hattında İki İstasyon Arası Mesafe ---
+@mcp.tool()
+def rayli_hat_mesafe_hesapla(hat: str, kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Dict[str, Any]:
+    """
+    Bir metro veya tramvay hattındaki iki istasyon/durak arasındaki mesafeyi metre cinsinden hesaplar.
+
+    Args:
+        hat (str): Hat anahtarı ('metro', 'karsiyaka_tram', 'konak_tram_kara', 'konak_tram_deniz', 'cigli_tram').
+        kalkis_istasyon_adi (str): Başlangıç istasyonunun/durağının adı.
+        varis_istasyon_adi (str): Varış istasyonunun/durağının adı.
 
     Returns:
         Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
     """
-    if konak_tram_deniz_distances_df is None:
-        logger.error("Konak tramvay (deniz) mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
-        return {"hata": "Konak tramvay (deniz) mesafe veritabanı hazır değil."}
+    return _rayli_hat_mesafesi(hat, kalkis_istasyon_adi, varis_istasyon_adi)
 
-    try:
-        kalkis_station = konak_tram_deniz_distances_df[konak_tram_deniz_distances_df['ISTASYON_ADI'].str.lower() == kalkis_istasyon_adi.lower()]
-        varis_station = konak_tram_deniz_distances_df[konak_tram_deniz_distances_df['ISTASYON_ADI'].str.lower() == varis_istasyon_adi.lower()]
+# --- Tool 29: Raylı Sistem Hattında Toplu Mesafe Hesaplama ---
+@mcp.tool()
+def rayli_hat_mesafelerini_toplu_hesapla(
+    hat: str,
+    kalkis_istasyon_adlari: List[str],
+    varis_istasyon_adlari: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Bir metro veya tramvay hattında birden çok istasyon/durak çifti arasındaki
+    mesafeleri tek seferde hesaplar.
 
-        if kalkis_station.empty:
-            return {"hata": f"Kalkış durağı bulunamadı: '{kalkis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
-        if varis_station.empty:
-            return {"hata": f"Varış durağı bulunamadı: '{varis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
+    Args:
+        hat (str): Hat anahtarı ('metro', 'karsiyaka_tram', 'konak_tram_kara', 'konak_tram_deniz', 'cigli_tram').
+        kalkis_istasyon_adlari (List[str]): Kalkış istasyonlarının/duraklarının adları.
+        varis_istasyon_adlari (List[str]): Varış istasyonlarının/duraklarının adları (kalkışlarla aynı sırada).
 
-        kalkis_mesafe = kalkis_station.iloc[0]['KUMULATIF_MESAFE']
-        varis_mesafe = varis_station.iloc[0]['KUMULATIF_MESAFE']
+    Returns:
+        Her çift için istasyon adlarını ve mesafeyi (bulunamayan adlar için hata) içeren kayıtlar.
+    """
+    if len(kalkis_istasyon_adlari) != len(varis_istasyon_adlari):
+        return [{"hata": "Kalkış ve varış listelerinin uzunlukları aynı olmalıdır."}]
+    if len(kalkis_istasyon_adlari) > TOPLU_SORGU_MAX_NOKTA:
+        return [{"hata": f"Tek seferde en fazla {TOPLU_SORGU_MAX_NOKTA} çift sorgulanabilir."}]
+
+    motor, hata = _rayli_hat_motoru(hat)
+    if hata:
+        return [hata]
+
+    kalkislar = motor.siralar(kalkis_istasyon_adlari)
+    varislar = motor.siralar(varis_istasyon_adlari)
+    gecerli = (kalkislar >= 0) & (varislar >= 0)
+    mesafeler = np.where(gecerli, motor.matris[kalkislar, varislar], -1)
+
+    anahtar = "istasyonu" if _RAYLI_HATLAR[hat]['birim'] == 'istasyon' else "duragi"
+    sonuclar = []
+    for i, (kalkis, varis) in enumerate(zip(kalkislar.tolist(), varislar.tolist())):
+        if kalkis < 0:
+            sonuclar.append({"sira": i, "hata": f"Kalkış noktası bulunamadı: '{kalkis_istasyon_adlari[i]}'."})
+        elif varis < 0:
+            sonuclar.append({"sira": i, "hata": f"Varış noktası bulunamadı: '{varis_istasyon_adlari[i]}'."})
+        else:
+            sonuclar.append({
+                "sira": i,
+                f"kalkis_{anahtar}": motor.adlar[kalkis],
+                f"varis_{anahtar}": motor.adlar[varis],
+                "mesafe_metre": int(mesafeler[i])
+            })
+    return sonuclar
+
+# --- Tool 30: Raylı Sistem Hattının Mesafe Matrisi ---
+@mcp.tool()
+def rayli_hat_mesafe_matrisini_getir(hat: str) -> Dict[str, Any]:
+    """
+    Bir metro veya tramvay hattındaki tüm istasyon/durak çiftleri arasındaki
+    mesafeleri metre cinsinden bir matris olarak döndürür.
+
+    Args:
+        hat (str): Hat anahtarı ('metro', 'karsiyaka_tram', 'konak_tram_kara', 'konak_tram_deniz', 'cigli_tram').
+
+    Returns:
+        Hat sırasına göre istasyon adlarını ve `mesafe_metre[i][j]` biçiminde
+        i. ve j. istasyonlar arasındaki mesafeleri içeren bir sözlük.
+    """
+    motor, hata = _rayli_hat_motoru(hat)
+    if hata:
+        return hata
+
+    return {
+        "hat": hat,
+        "istasyonlar": motor.adlar,
+        "mesafe_metre": motor.matris.tolist()
+    }
+
+# --- Durak <-> Hat Ters İndeksi ---
+class _DurakHatIndeksi:
+    """
+    DURAKTAN_GECEN_HATLAR sütunundan ("29-30" biçiminde) çıkarılan çift yönlü indeks.
+
+    Durak -> hatlar ve hat -> duraklar eşlemeleri CSR biçiminde tutulur: sıralı anahtar
+    dizisi, her anahtarın değerlerinin başladığı konumları gösteren `baslangiclar` ve
+    tüm değerlerin art arda dizildiği tek bir tam sayı dizisi. Sorgular bir ikili arama
+    ve bir dilimden ibarettir.
+    """
+
+    def __init__(self, duraklar: pd.DataFrame):
+        self._duraklar = duraklar[['DURAK_ID', 'DURAK_ADI', 'ENLEM', 'BOYLAM']].reset_index(drop=True)
+
+        hatlar = duraklar['DURAKTAN_GECEN_HATLAR'].reset_index(drop=True).str.split('-').explode()
+        hatlar = pd.to_numeric(hatlar, errors='coerce').dropna()
+        satirlar = hatlar.index.to_numpy(dtype=np.int32)
+        hat_nolari = hatlar.to_numpy(dtype=np.int32)
+
+        durak_idleri = self._duraklar['DURAK_ID'].to_numpy(dtype=np.int64)
+        self._enlemler = self._duraklar['ENLEM'].to_numpy(dtype=float)
+        self._boylamlar = self._duraklar['BOYLAM'].to_numpy(dtype=float)
+        self._id_sirasi = np.argsort(durak_idleri, kind='stable').astype(np.int32)
+        self._sirali_idler = durak_idleri[self._id_sirasi]
+
+        sira = np.lexsort((hat_nolari, satirlar))
+        self._durak_hatlari = hat_nolari[sira]
+        self._durak_baslangiclari = np.searchsorted(satirlar[sira], np.arange(len(self._duraklar) + 1)).astype(np.int32)
+
+        sira = np.lexsort((durak_idleri[satirlar], hat_nolari))
+        sirali_hatlar = hat_nolari[sira]
+        self.hat_nolari, ilk_konumlar = np.unique(sirali_hatlar, return_index=True)
+        self._hat_baslangiclari = np.append(ilk_konumlar, len(sirali_hatlar)).astype(np.int32)
+        self._hat_duraklari = satirlar[sira]
+
+    def durak_satiri(self, durak_id: int) -> Optional[int]:
+        i = int(np.searchsorted(self._sirali_idler, durak_id))
+        if i == len(self._sirali_idler) or self._sirali_idler[i] != durak_id:
+            return None
+        return int(self._id_sirasi[i])
+
+    def duraktan_gecen_hatlar(self, satir: int) -> np.ndarray:
+        return self._durak_hatlari[self._durak_baslangiclari[satir]:self._durak_baslangiclari[satir + 1]]
+
+    def hattin_durak_satirlari(self, hat_no: int) -> np.ndarray:
+        i = int(np.searchsorted(self.hat_nolari, hat_no))
+        if i == len(self.hat_nolari) or self.hat_nolari[i] != hat_no:
+            return np.empty(0, dtype=np.int32)
+        return self._hat_duraklari[self._hat_baslangiclari[i]:self._hat_baslangiclari[i + 1]]
+
+    def durak_kayitlari(self, satirlar: np.ndarray) -> List[Dict[str, Any]]:
+        return self._duraklar.iloc[satirlar].to_dict('records')
+
+    def durak_adi(self, satir: int) -> str:
+        return self._duraklar['DURAK_ADI'].iat[satir]
+
+    def koordinatlar(self, satirlar: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Durak satırlarının (enlem, boylam) dizilerini döndürür."""
+        return self._enlemler[satirlar], self._boylamlar[satirlar]
+
+    def durak_hat_dizileri(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Durak -> hatlar CSR dizilerini (her satırın başlangıç konumları, hat numaraları) döndürür."""
+        return self._durak_baslangiclari, self._durak_hatlari
+
+_durak_hat_indeksi: Optional[_DurakHatIndeksi] = None
+
+def _durak_hat_indeksini_olustur(df: pd.DataFrame) -> None:
+    global _durak_hat_indeksi
+    _durak_hat_indeksi = _DurakHatIndeksi(df)
+
+_veri_dinleyicisi_ekle('stops_df', _durak_hat_indeksini_olustur)
+
+# --- Tool 31: Hattın Geçtiği Duraklar ---
+@mcp.tool()
+def hattin_duraklarini_getir(hat_no: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Belirtilen otobüs hattının geçtiği tüm durakları döndürür.
+    Duraklar güzergah sırasına göre değil, durak numarasına göre sıralıdır.
+
+    Args:
+        hat_no (int): Otobüs hattının numarası.
+
+    Returns:
+        Durak bilgilerini (DURAK_ID, DURAK_ADI, ENLEM, BOYLAM) içeren kayıtların listesi.
+    """
+    indeks = _durak_hat_indeksi
+    if indeks is None:
+        logger.error("Durak verileri yüklenemediği için hattın durakları getirilemiyor.")
+        return [{"hata": _hazir_degil_mesaji("Durak veritabanı hazır değil.")}]
+
+    satirlar = indeks.hattin_durak_satirlari(hat_no)
+    if len(satirlar) == 0:
+        logger.warning(f"{hat_no} numaralı hat için durak bulunamadı.")
+        return []
+
+    return indeks.durak_kayitlari(satirlar)
+
+# --- Tool 32: Duraktan Geçen Hatlar ---
+@mcp.tool()
+def duraktan_gecen_hatlari_getir(durak_id: int) -> Dict[str, Any]:
+    """
+    Belirtilen duraktan geçen otobüs hatlarının numaralarını döndürür.
+
+    Args:
+        durak_id (int): Durağın ID'si.
+
+    Returns:
+        Durağın bilgilerini ve `hatlar` altında hat numaralarının listesini içeren bir sözlük.
+    """
+    indeks = _durak_hat_indeksi
+    if indeks is None:
+        logger.error("Durak verileri yüklenemediği için duraktan geçen hatlar getirilemiyor.")
+        return {"hata": _hazir_degil_mesaji("Durak veritabanı hazır değil.")}
 
-        mesafe = abs(varis_mesafe - kalkis_mesafe)
+    satir = indeks.durak_satiri(durak_id)
+    if satir is None:
+        return {"hata": f"Durak bulunamadı: {durak_id}. Lütfen durak ID'sini kontrol edin."}
 
+    kayit = indeks.durak_kayitlari(np.array([satir]))[0]
+    kayit["hatlar"] = indeks.duraktan_gecen_hatlar(satir).tolist()
+    return kayit
+
+# --- Hatlar Arası Aktarma Matrisi ---
+class _AktarmaMatrisi:
+    """
+    Otobüs hatları arasındaki aktarma imkanlarını tutan hat x hat matrisi.
+
+    İki hat, ortak bir duraktan geçiyorsa veya durakları arasında
+    `AKTARMA_YURUME_YARICAPI_KM` içinde yürünebiliyorsa birbirine bağlıdır. Her bağlı
+    hat çifti için en kısa yürüyüşlü aktarma noktası (inilen ve binilen durak) ile
+    aktarma yapılabilecek durak çifti sayısı, (a, b) çift kodlarına göre sıralı seyrek
+    dizilerde saklanır. Bağlantı bilgisi ayrıca yoğun bir boolean matris olarak tutulur.
+    433 hat için bu yaklaşık 190 KB'tır ve aktarma sorguları matris çarpımlarıyla yanıtlanır.
+    """
+
+    def __init__(self, duraklar: pd.DataFrame, durak_hat_indeksi: '_DurakHatIndeksi', imza: str):
+        self.imza = imza
+        self.durak_hat_indeksi = durak_hat_indeksi
+        hat_nolari = durak_hat_indeksi.hat_nolari
+        L = len(hat_nolari)
+
+        duraklar = duraklar.reset_index(drop=True)
+        gecerli = duraklar[['ENLEM', 'BOYLAM']].notna().all(axis=1).to_numpy()
+        satirlar = np.nonzero(gecerli)[0]
+        mekansal = _MekansalIndeks(pd.DataFrame({
+            'SATIR': satirlar,
+            'ENLEM': duraklar['ENLEM'].to_numpy()[satirlar],
+            'BOYLAM': duraklar['BOYLAM'].to_numpy()[satirlar]
+        }))
+        q, n, mesafe = mekansal.yaricap_icindekiler_toplu(mekansal.enlem, mekansal.boylam, AKTARMA_YURUME_YARICAPI_KM)
+        indeks_satirlari = mekansal.kayitlar['SATIR'].to_numpy()
+        inilen, binilen = indeks_satirlari[q], indeks_satirlari[n]
+
+        # Her (inilen, binilen) durak çiftini, iki duraktan geçen hatların kartezyen çarpımına genişlet.
+        baslangiclar, durak_hatlari = durak_hat_indeksi.durak_hat_dizileri()
+        baslangiclar = baslangiclar.astype(np.int64)
+        hat_sayilari = np.diff(baslangiclar)
+        cift_sayilari = hat_sayilari[inilen] * hat_sayilari[binilen]
+        cift = np.repeat(np.arange(len(inilen)), cift_sayilari)
+        sira_ici = np.arange(int(cift_sayilari.sum())) - np.repeat(np.cumsum(cift_sayilari) - cift_sayilari, cift_sayilari)
+        b_sayisi = hat_sayilari[binilen][cift]
+        hat_konumlari = np.searchsorted(hat_nolari, durak_hatlari)
+        a = hat_konumlari[baslangiclar[inilen][cift] + sira_ici // b_sayisi]
+        b = hat_konumlari[baslangiclar[binilen][cift] + sira_ici % b_sayisi]
+
+        farkli = a != b
+        kodlar = a[farkli].astype(np.int64) * L + b[farkli]
+        cift, cift_mesafe = cift[farkli], mesafe[cift[farkli]]
+
+        sira = np.lexsort((cift_mesafe, kodlar))
+        self._kodlar, ilkler, self._nokta_sayilari = np.unique(kodlar[sira], return_index=True, return_counts=True)
+        secilen = cift[sira][ilkler]
+        self._inilen_satirlar = inilen[secilen].astype(np.int32)
+        self._binilen_satirlar = binilen[secilen].astype(np.int32)
+        self._yurume_km = cift_mesafe[sira][ilkler]
+
+        self.bagli = np.zeros((L, L), dtype=bool)
+        self.bagli[self._kodlar // L, self._kodlar % L] = True
+        logger.info(f"Aktarma matrisi oluşturuldu: {L} hat, {len(self._kodlar)} bağlı hat çifti.")
+
+    def _cift_konumu(self, a: int, b: int) -> int:
+        return int(np.searchsorted(self._kodlar, a * len(self.durak_hat_indeksi.hat_nolari) + b))
+
+    def yurume_metre(self, a: int, b: int) -> int:
+        return int(round(self._yurume_km[self._cift_konumu(a, b)] * 1000))
+
+    def aktarma_noktasi(self, a: int, b: int) -> Dict[str, Any]:
+        """a. hattan b. hatta en kısa yürüyüşlü aktarma noktasını döndürür (konumlar hat_nolari dizisindedir)."""
+        i = self._cift_konumu(a, b)
+        inilen, binilen = self.durak_hat_indeksi.durak_kayitlari(
+            np.array([self._inilen_satirlar[i], self._binilen_satirlar[i]]))
         return {
-            "kalkis_duragi": kalkis_station.iloc[0]['ISTASYON_ADI'],
-            "varis_duragi": varis_station.iloc[0]['ISTASYON_ADI'],
-            "mesafe_metre": int(mesafe)
+            "inilen_durak_id": inilen['DURAK_ID'],
+            "inilen_durak_adi": inilen['DURAK_ADI'],
+            "binilen_durak_id": binilen['DURAK_ID'],
+            "binilen_durak_adi": binilen['DURAK_ADI'],
+            "yurume_metre": int(round(self._yurume_km[i] * 1000)),
+            "aktarma_noktasi_sayisi": int(self._nokta_sayilari[i])
         }
-    except Exception as e:
-        logger.error(f"Konak tramvay (deniz) mesafe hesaplanırken bir hata oluştu: {e}", exc_info=True)
-        return {"hata": f"Hesaplama sırasında beklenmedik bir hata oluştu: {e}"}
 
-# --- Tool 23: Çiğli Tramvay Durakları Arası Mesafe Hesaplama ---
+    def baglantilar(
+        self,
+        kalkis_hatlari: np.ndarray,
+        varis_hatlari: np.ndarray,
+        max_aktarma: int
+    ) -> List[Tuple[int, ...]]:
+        """
+        Kalkış hatlarından varış hatlarına en fazla `max_aktarma` aktarmalı hat dizilerini
+        (hat_nolari konumları olarak) aktarma sayısına göre sıralı döndürür.
+        """
+        yollar: List[Tuple[int, ...]] = [(int(h),) for h in np.intersect1d(kalkis_hatlari, varis_hatlari)]
+        if max_aktarma < 1:
+            return yollar
+
+        bir_aktarma = self.bagli[np.ix_(kalkis_hatlari, varis_hatlari)]
+        for i, j in zip(*np.nonzero(bir_aktarma)):
+            yollar.append((int(kalkis_hatlari[i]), int(varis_hatlari[j])))
+        if max_aktarma < 2:
+            return yollar
+
+        # a -> c -> b yollarının sayısı: bagli[kalkis, :] @ bagli[:, varis]
+        ara_sayilari = self.bagli[kalkis_hatlari].astype(np.int32) @ self.bagli[:, varis_hatlari].astype(np.int32)
+        iki_aktarma = (ara_sayilari > 0) & ~bir_aktarma
+        iki_aktarma[np.isin(kalkis_hatlari, varis_hatlari), :] = False
+        i, j = np.nonzero(iki_aktarma)
+        if len(i):
+            ara_hatlar = (self.bagli[kalkis_hatlari[i]] & self.bagli[:, varis_hatlari[j]].T).argmax(axis=1)
+            yollar.extend(
+                (int(a), int(c), int(b))
+                for a, c, b in zip(kalkis_hatlari[i], ara_hatlar, varis_hatlari[j])
+            )
+        return yollar
+
+_aktarma_matrisi: Optional[_AktarmaMatrisi] = None
+
+def _aktarma_matrisini_olustur(df: pd.DataFrame) -> None:
+    """
+    Durak verisi yenilendiğinde aktarma matrisini yeniden oluşturur. Matrisi etkileyen
+    sütunlar (durak no, koordinatlar, geçen hatlar) değişmemişse mevcut matris korunur.
+    """
+    global _aktarma_matrisi
+    sutunlar = ['DURAK_ID', 'ENLEM', 'BOYLAM', 'DURAKTAN_GECEN_HATLAR']
+    imza = hashlib.sha1(pd.util.hash_pandas_object(df[sutunlar], index=False).to_numpy().tobytes()).hexdigest()
+    if _aktarma_matrisi is not None and _aktarma_matrisi.imza == imza:
+        logger.info("Durak/hat ilişkileri değişmediği için aktarma matrisi korunuyor.")
+        return
+    _aktarma_matrisi = _AktarmaMatrisi(df, _durak_hat_indeksi, imza)
+
+# Durak <-> hat indeksinden sonra çalışması için onun dinleyicisinden sonra eklenir.
+_veri_dinleyicisi_ekle('stops_df', _aktarma_matrisini_olustur)
+
+# --- Tool 33: Aktarmalı Hat Bağlantıları ---
 @mcp.tool()
-def cigli_tram_duraklar_arasi_mesafe_hesapla(kalkis_istasyon_adi: str, varis_istasyon_adi: str) -> Optional[Dict[str, Any]]:
+@_havuzda_calistir
+def aktarmali_hatlari_bul(
+    kalkis_durak_id: int,
+    varis_durak_id: int,
+    max_aktarma: int = 2,
+    limit: int = 10
+) -> Optional[List[Dict[str, Any]]]:
     """
-    İki Çiğli tramvay durağı arasındaki mesafeyi metre cinsinden hesaplar.
-    Durak adlarının tam olarak eşleşmesi gerekir.
+    İki durak arasında doğrudan veya en fazla iki aktarmayla gidilebilecek otobüs hattı
+    kombinasyonlarını bulur. Aktarma, ortak bir durakta veya yürünebilecek kadar yakın
+    iki durak arasında yapılabilir. Sonuçlar önce aktarma sayısına, sonra toplam
+    yürüme mesafesine göre sıralıdır. Sefer saatleri ve yolculuk süresi dikkate alınmaz.
 
     Args:
-        kalkis_istasyon_adi (str): Başlangıç durağının adı.
-        varis_istasyon_adi (str): Varış durağının adı.
+        kalkis_durak_id (int): Başlangıç durağının ID'si.
+        varis_durak_id (int): Varış durağının ID'si.
+        max_aktarma (int): İzin verilen en fazla aktarma sayısı (0, 1 veya 2).
+        limit (int): Döndürülecek maksimum bağlantı sayısı.
 
     Returns:
-        Hesaplanan mesafeyi veya hata durumunda bir mesaj içeren bir sözlük.
+        Her bağlantı için aktarma sayısını, binilecek hatları ve aktarma noktalarını içeren kayıtlar.
+    """
+    matris = _aktarma_matrisi
+    if matris is None:
+        logger.error("Durak verileri yüklenemediği için aktarma araması yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Durak veritabanı hazır değil.")}]
+    if not 0 <= max_aktarma <= 2:
+        return [{"hata": "max_aktarma 0, 1 veya 2 olmalıdır."}]
+
+    indeks = matris.durak_hat_indeksi
+    kalkis, varis = indeks.durak_satiri(kalkis_durak_id), indeks.durak_satiri(varis_durak_id)
+    if kalkis is None:
+        return [{"hata": f"Kalkış durağı bulunamadı: {kalkis_durak_id}. Lütfen durak ID'sini kontrol edin."}]
+    if varis is None:
+        return [{"hata": f"Varış durağı bulunamadı: {varis_durak_id}. Lütfen durak ID'sini kontrol edin."}]
+
+    kalkis_hatlari = np.searchsorted(indeks.hat_nolari, indeks.duraktan_gecen_hatlar(kalkis))
+    varis_hatlari = np.searchsorted(indeks.hat_nolari, indeks.duraktan_gecen_hatlar(varis))
+
+    yollar = matris.baglantilar(kalkis_hatlari, varis_hatlari, max_aktarma)
+    yollar.sort(key=lambda yol: (len(yol), sum(matris.yurume_metre(a, b) for a, b in zip(yol, yol[1:]))))
+
+    sonuclar = []
+    for yol in yollar[:limit]:
+        aktarmalar = [matris.aktarma_noktasi(a, b) for a, b in zip(yol, yol[1:])]
+        sonuclar.append({
+            "aktarma_sayisi": len(yol) - 1,
+            "hatlar": indeks.hat_nolari[list(yol)].tolist(),
+            "aktarmalar": aktarmalar,
+            "toplam_yurume_metre": sum(a["yurume_metre"] for a in aktarmalar)
+        })
+    return sonuclar
+
+# --- Yürüme Mesafesindeki Aktarma Noktaları ---
+AKTARMA_NOKTASI_TURLERI = KONUM_TURLERI + RAYLI_ISTASYON_TURLERI
+
+# (tür, ID) -> walking_transfers_df içindeki [başlangıç, bitiş) satır aralığı
+_yurume_aktarma_araliklari: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+def _yurume_aktarma_indeksini_olustur(df: pd.DataFrame) -> None:
+    """Kaynak (tür, ID) çiftine göre sıralı kenar listesinde her kaynağın satır aralığını çıkarır."""
+    global _yurume_aktarma_araliklari
+    turler = df['KAYNAK_TUR'].to_numpy()
+    kimlikler = df['KAYNAK_ID'].to_numpy()
+    degisimler = np.flatnonzero((turler[1:] != turler[:-1]) | (kimlikler[1:] != kimlikler[:-1])) + 1
+    baslangiclar = np.concatenate(([0], degisimler)) if len(df) else np.empty(0, dtype=np.int64)
+    bitisler = np.append(degisimler, len(df)) if len(df) else np.empty(0, dtype=np.int64)
+    _yurume_aktarma_araliklari = dict(zip(
+        zip(turler[baslangiclar].tolist(), kimlikler[baslangiclar].tolist()),
+        zip(baslangiclar.tolist(), bitisler.tolist())
+    ))
+
+_veri_dinleyicisi_ekle('walking_transfers_df', _yurume_aktarma_indeksini_olustur)
+
+# --- Tool 34: Yakındaki Aktarma Noktaları ---
+@mcp.tool()
+def yakin_aktarma_noktalarini_getir(
+    tur: str,
+    kimlik: int,
+    max_metre: Optional[int] = None,
+    sadece_diger_turler: bool = False,
+    limit: int = 20
+) -> Optional[List[Dict[str, Any]]]:
     """
-    if cigli_tram_distances_df is None:
-        logger.error("Çiğli tramvay mesafe verileri yüklenemediği için hesaplama yapılamıyor.")
-        return {"hata": "Çiğli tramvay mesafe veritabanı hazır değil."}
+    Bir otobüs durağı, İZBAN, metro veya tramvay istasyonundan yürüyerek
+    ulaşılabilecek diğer durak ve istasyonları yakından uzağa doğru döndürür.
+    Mesafeler kuş uçuşudur; yürüme süresi sabit bir yürüme hızıyla hesaplanır.
 
-    try:
-        kalkis_station = cigli_tram_distances_df[cigli_tram_distances_df['ISTASYON_ADI'].str.lower() == kalkis_istasyon_adi.lower()]
-        varis_station = cigli_tram_distances_df[cigli_tram_distances_df['ISTASYON_ADI'].str.lower() == varis_istasyon_adi.lower()]
+    Args:
+        tur (str): Başlangıç noktasının türü ('Otobüs Durağı', 'İZBAN İstasyonu',
+                   'Metro İstasyonu' veya 'Tramvay İstasyonu').
+        kimlik (int): Durak ID'si veya istasyon ID'si.
+        max_metre (int, optional): Verilirse yalnızca bu mesafe içindeki noktalar döndürülür.
+        sadece_diger_turler (bool): True ise yalnızca farklı türdeki (örneğin otobüsten
+                                    metroya) aktarma noktaları döndürülür.
+        limit (int): Döndürülecek maksimum nokta sayısı.
+
+    Returns:
+        Aktarma noktalarının tür, ID, ad, konum, mesafe (metre) ve yürüme süresi (dakika) bilgileri.
+    """
+    if tur not in AKTARMA_NOKTASI_TURLERI:
+        return [{"hata": f"Geçersiz tür. Sadece {AKTARMA_NOKTASI_TURLERI} değerlerinden biri kullanılabilir."}]
+
+    df = walking_transfers_df
+    if df is None:
+        logger.error("Yürüme aktarma verileri yüklenemediği için arama yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Yürüme aktarma veritabanı hazır değil.")}]
+
+    aralik = _yurume_aktarma_araliklari.get((tur, kimlik))
+    if aralik is None:
+        return []
+
+    sonuclar = df.iloc[aralik[0]:aralik[1]]
+    if max_metre is not None:
+        sonuclar = sonuclar[sonuclar['MESAFE_M'] <= max_metre]
+    if sadece_diger_turler:
+        sonuclar = sonuclar[sonuclar['HEDEF_TUR'] != tur]
+
+    return sonuclar.head(limit).drop(columns=['KAYNAK_TUR', 'KAYNAK_ID']).rename(columns={
+        'HEDEF_TUR': 'TUR', 'HEDEF_ID': 'ID', 'HEDEF_ADI': 'ADI', 'HEDEF_ENLEM': 'ENLEM', 'HEDEF_BOYLAM': 'BOYLAM'
+    }).to_dict('records')
 
-        if kalkis_station.empty:
-            return {"hata": f"Kalkış durağı bulunamadı: '{kalkis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
-        if varis_station.empty:
-            return {"hata": f"Varış durağı bulunamadı: '{varis_istasyon_adi}'. Lütfen durak adını kontrol edin."}
+# --- Yolculuk Planlayıcı (RAPTOR) ---
+class _Rota:
+    """Aynı durak dizisini izleyen seferler: `zamanlar[sefer, durak_sirasi]` dakika cinsinden."""
 
-        kalkis_mesafe = kalkis_station.iloc[0]['KUMULATIF_MESAFE']
-        varis_mesafe = varis_station.iloc[0]['KUMULATIF_MESAFE']
+    __slots__ = ('hat', 'tur', 'yon', 'duraklar', 'zamanlar')
 
-        mesafe = abs(varis_mesafe - kalkis_mesafe)
+    def __init__(self, hat: Any, tur: str, yon: str, duraklar: np.ndarray, zamanlar: np.ndarray):
+        self.hat = hat
+        self.tur = tur
+        self.yon = yon
+        self.duraklar = duraklar
+        self.zamanlar = zamanlar
 
+class _YolculukPlanlayici:
+    """
+    Otobüs sefer saatlerini, raylı sistem hatlarını ve yürüme aktarmalarını dizi tabanlı
+    bir zaman çizelgesine derler ve en erken varış sorgularını RAPTOR algoritmasıyla yanıtlar.
+
+    Veri kaynaklarının sınırları nedeniyle bazı değerler tahmindir:
+    - Otobüs sefer saatleri yalnızca hat başı kalkışlarını içerir. Hattın durak sırası
+      güzergah koordinatlarından (yoksa durakların ana eksen üzerindeki izdüşümünden)
+      çıkarılır. Ara durak saatleri `OTOBUS_ORT_HIZ_KM_SA` ile hesaplanır.
+    - Metro, tramvay ve İZBAN için sefer aralığı ve hız `RAYLI_SISTEM_SEFERLERI`
+      değerlerinden alınır. Çalışma saatleri `RAYLI_SISTEM_CALISMA_SAATLERI` ile belirlenir.
+    """
+
+    def __init__(self, tarife_id: int):
+        self.tarife_id = tarife_id
+        self.dugumler = _aktarma_dugumleri()
+        self._dugum_indeksi = pd.MultiIndex.from_frame(self.dugumler[['TUR', 'ID']])
+        self._dugum_kayitlari = self.dugumler[['TUR', 'ID', 'ADI', 'ENLEM', 'BOYLAM']].to_dict('records')
+        self._mekansal = _MekansalIndeks(self.dugumler.assign(SATIR=np.arange(len(self.dugumler))))
+        self.rotalar: List[_Rota] = []
+
+        self._otobus_rotalarini_ekle()
+        self._rayli_rotalari_ekle()
+        self._durak_rotalarini_indeksle()
+        self._yurume_kenarlarini_indeksle()
+
+    def _dugumler(self, tur: str, kimlikler: Any) -> np.ndarray:
+        kimlikler = np.asarray(kimlikler)
+        return self._dugum_indeksi.get_indexer(pd.MultiIndex.from_arrays([np.full(len(kimlikler), tur), kimlikler]))
+
+    def _rota_ekle(self, hat: Any, tur: str, duraklar: np.ndarray, km: np.ndarray, kalkislar: np.ndarray, hiz_km_sa: float) -> None:
+        """Durak dizisini iki yönlü (gidiş ve dönüş) rota olarak ekler."""
+        duraklar, ilkler = np.unique(duraklar, return_index=True)
+        sira = np.argsort(ilkler)
+        duraklar, km = duraklar[sira], km[ilkler[sira]]
+        if len(duraklar) < 2 or len(kalkislar[0]) + len(kalkislar[1]) == 0:
+            return
+        sureler = (km - km[0]) / hiz_km_sa * 60
+        for yon, yon_duraklari, yon_sureleri, yon_kalkislari in (
+            ("Gidiş", duraklar, sureler, kalkislar[0]),
+            ("Dönüş", duraklar[::-1], sureler[-1] - sureler[::-1], kalkislar[1]),
+        ):
+            if len(yon_kalkislari):
+                zamanlar = (yon_kalkislari[:, None] + yon_sureleri[None, :]).astype(np.float32)
+                self.rotalar.append(_Rota(hat, tur, yon, np.ascontiguousarray(yon_duraklari, dtype=np.int32), zamanlar))
+
+    def _guzergahlar(self) -> Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Hat no -> (enlemler, boylamlar, kümülatif km); birden çok yön varsa ilk yönün güzergahı."""
+        df = route_coords_df
+        if df is None or df.empty:
+            return {}
+        if 'YON' in df.columns:
+            df = df[df['YON'] == df.groupby('HAT_NO')['YON'].transform('min')]
+        df = df.sort_values(['HAT_NO', 'SIRA'], kind='stable')
+        hat_nolari = df['HAT_NO'].to_numpy()
+        enlem, boylam = df['ENLEM'].to_numpy(dtype=float), df['BOYLAM'].to_numpy(dtype=float)
+        sinirlar = np.flatnonzero(np.diff(hat_nolari)) + 1
+        guzergahlar = {}
+        for bas, bit in zip(np.concatenate(([0], sinirlar)), np.append(sinirlar, len(df))):
+            adim = _haversine_km(enlem[bas:bit - 1], boylam[bas:bit - 1], enlem[bas + 1:bit], boylam[bas + 1:bit])
+            guzergahlar[int(hat_nolari[bas])] = (enlem[bas:bit], boylam[bas:bit], np.concatenate(([0.0], np.cumsum(adim))))
+        return guzergahlar
+
+    @staticmethod
+    def _duraklari_sirala(enlem: np.ndarray, boylam: np.ndarray, guzergah: Optional[Tuple[np.ndarray, ...]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Hattın duraklarını güzergah boyunca sıralar; sıralamayı ve her durağın hat başına km uzaklığını döndürür."""
+        if guzergah is not None:
+            g_enlem, g_boylam, g_km = guzergah
+            konum = g_km[_haversine_km(enlem[:, None], boylam[:, None], g_enlem[None, :], g_boylam[None, :]).argmin(axis=1)]
+            sira = np.argsort(konum, kind='stable')
+            return sira, konum[sira] - konum[sira][0]
+
+        # Güzergah yoksa duraklar, dağılımlarının ana ekseni üzerindeki izdüşümlerine göre sıralanır.
+        xy = np.stack([(boylam - boylam.mean()) * np.cos(np.radians(enlem.mean())), enlem - enlem.mean()], axis=1)
+        eksen = np.linalg.svd(xy, full_matrices=False)[2][0]
+        sira = np.argsort(xy @ eksen, kind='stable')
+        adim = _haversine_km(enlem[sira][:-1], boylam[sira][:-1], enlem[sira][1:], boylam[sira][1:])
+        return sira, np.concatenate(([0.0], np.cumsum(adim)))
+
+    def _otobus_rotalarini_ekle(self) -> None:
+        indeks = _durak_hat_indeksi
+        if schedules_df is None or stops_df is None or indeks is None:
+            return
+        durak_dugumleri = self._dugumler(KONUM_TURLERI[0], stops_df['DURAK_ID'].to_numpy())
+        enlem = stops_df['ENLEM'].to_numpy(dtype=float)
+        boylam = stops_df['BOYLAM'].to_numpy(dtype=float)
+        guzergahlar = self._guzergahlar()
+
+        seferler = schedules_df[schedules_df['TARIFE_ID'] == self.tarife_id].sort_values(['HAT_NO', 'SIRA'], kind='stable')
+        gidisler = _saatten_dakikaya(seferler['GIDIS_SAATI'])
+        donusler = _saatten_dakikaya(seferler['DONUS_SAATI'])
+        hat_nolari = seferler['HAT_NO'].to_numpy()
+        sinirlar = np.flatnonzero(np.diff(hat_nolari)) + 1
+        for bas, bit in zip(np.concatenate(([0], sinirlar)), np.append(sinirlar, len(seferler))):
+            if bas == bit:
+                continue
+            hat_no = int(hat_nolari[bas])
+            satirlar = indeks.hattin_durak_satirlari(hat_no)
+            satirlar = satirlar[durak_dugumleri[satirlar] >= 0]
+            if len(satirlar) < 2:
+                continue
+            sira, km = self._duraklari_sirala(enlem[satirlar], boylam[satirlar], guzergahlar.get(hat_no))
+            kalkislar = (_gece_yarisini_duzelt(gidisler[bas:bit]), _gece_yarisini_duzelt(donusler[bas:bit]))
+            self._rota_ekle(hat_no, "Otobüs", durak_dugumleri[satirlar[sira]], km, kalkislar, OTOBUS_ORT_HIZ_KM_SA)
+
+    def _rayli_rotalari_ekle(self) -> None:
+        bas, bit = _saatten_dakikaya(pd.Series(RAYLI_SISTEM_CALISMA_SAATLERI))
+
+        def frekans_rotasi_ekle(hat: str, mod: str, tur: str, duraklar: np.ndarray, km: np.ndarray) -> None:
+            aralik_dk, hiz_km_sa = RAYLI_SISTEM_SEFERLERI[mod]
+            kalkislar = np.arange(bas, bit + 1e-9, aralik_dk)
+            bulunan = duraklar >= 0
+            self._rota_ekle(hat, tur, duraklar[bulunan], km[bulunan], (kalkislar, kalkislar), hiz_km_sa)
+
+        if izban_stations_df is not None and not izban_stations_df.empty:
+            izban = izban_stations_df.dropna(subset=['ENLEM', 'BOYLAM']).sort_values('ISTASYON_SIRASI')
+            enlem, boylam = izban['ENLEM'].to_numpy(dtype=float), izban['BOYLAM'].to_numpy(dtype=float)
+            km = np.concatenate(([0.0], np.cumsum(_haversine_km(enlem[:-1], boylam[:-1], enlem[1:], boylam[1:]))))
+            frekans_rotasi_ekle("İZBAN", 'izban', "İZBAN", self._dugumler(KONUM_TURLERI[1], izban['ISTASYON_ID'].to_numpy()), km)
+
+        if rail_stations_df is None:
+            return
+        for hat, tanim in _RAYLI_HATLAR.items():
+            mesafeler = globals().get(tanim['degisken'])
+            if mesafeler is None or mesafeler.empty:
+                continue
+            istasyon_turu = RAYLI_ISTASYON_TURLERI[0] if tanim['mod'] == 'metro' else RAYLI_ISTASYON_TURLERI[1]
+            istasyonlar = rail_stations_df[rail_stations_df['TUR'] == istasyon_turu]
+            ad_kimlik: Dict[str, int] = {}
+            for ad, kimlik in zip(istasyonlar['ADI'].tolist(), istasyonlar['ID'].tolist()):
+                ad_kimlik.setdefault(' '.join(_kelimelere_ayir(ad)), kimlik)
+            kimlikler = [ad_kimlik.get(' '.join(_kelimelere_ayir(ad)), -1) for ad in mesafeler['ISTASYON_ADI'].tolist()]
+            duraklar = np.where(np.array(kimlikler) >= 0, self._dugumler(istasyon_turu, kimlikler), -1)
+            km = mesafeler['KUMULATIF_MESAFE'].to_numpy(dtype=float) / 1000
+            frekans_rotasi_ekle(tanim['ad'], tanim['mod'], "Metro" if tanim['mod'] == 'metro' else "Tramvay", duraklar, km)
+
+    def _durak_rotalarini_indeksle(self) -> None:
+        """Düğüm -> (rota, durak sırası) CSR indeksi."""
+        uzunluklar = np.array([len(r.duraklar) for r in self.rotalar], dtype=np.int64)
+        dugumler = np.concatenate([r.duraklar for r in self.rotalar]) if self.rotalar else np.empty(0, dtype=np.int32)
+        rotalar = np.repeat(np.arange(len(self.rotalar), dtype=np.int32), uzunluklar)
+        sira = np.argsort(dugumler, kind='stable')
+        self._durak_rotalari = rotalar[sira]
+        self._durak_rota_baslangiclari = np.searchsorted(dugumler[sira], np.arange(len(self.dugumler) + 1))
+
+    def _yurume_kenarlarini_indeksle(self) -> None:
+        """Düğüm -> (komşu düğüm, yürüme süresi) CSR indeksi."""
+        df = walking_transfers_df
+        if df is None or df.empty:
+            kaynak = hedef = np.empty(0, dtype=np.int64)
+            dakika = np.empty(0)
+        else:
+            kaynak = self._dugum_indeksi.get_indexer(pd.MultiIndex.from_frame(df[['KAYNAK_TUR', 'KAYNAK_ID']]))
+            hedef = self._dugum_indeksi.get_indexer(pd.MultiIndex.from_frame(df[['HEDEF_TUR', 'HEDEF_ID']]))
+            dakika = df['YURUME_DK'].to_numpy(dtype=float)
+            gecerli = (kaynak >= 0) & (hedef >= 0)
+            kaynak, hedef, dakika = kaynak[gecerli], hedef[gecerli], dakika[gecerli]
+        sira = np.argsort(kaynak, kind='stable')
+        self._yurume_hedefleri = hedef[sira]
+        self._yurume_sureleri = dakika[sira]
+        self._yurume_baslangiclari = np.searchsorted(kaynak[sira], np.arange(len(self.dugumler) + 1))
+
+    def _yakin_dugumler(self, enlem: float, boylam: float) -> Tuple[np.ndarray, np.ndarray]:
+        _, noktalar, km = self._mekansal.yaricap_icindekiler_toplu([enlem], [boylam], ROTA_ERISIM_YARICAPI_KM)
+        return self._mekansal.kayitlar['SATIR'].to_numpy()[noktalar], km / YURUME_HIZI_KM_SA * 60
+
+    def planla(
+        self,
+        kalkis_enlem: float,
+        kalkis_boylam: float,
+        varis_enlem: float,
+        varis_boylam: float,
+        kalkis_dk: float,
+        max_aktarma: int
+    ) -> List[Dict[str, Any]]:
+        """
+        En fazla `max_aktarma` aktarmalı en erken varışlı yolculukları bulur. Her tur bir
+        araç biniş sayısına karşılık gelir; varışı bir önceki seçenekten erken olan her
+        yolculuk (daha az aktarma ile daha geç varış) ayrı bir seçenek olarak döner.
+        """
+        N = len(self.dugumler)
+        en_iyi = np.full(N, np.inf)
+        etiket = np.full(N, np.inf)
+        isaretli = np.zeros(N, dtype=bool)
+
+        erisim, erisim_dk = self._yakin_dugumler(kalkis_enlem, kalkis_boylam)
+        cikis, cikis_dk = self._yakin_dugumler(varis_enlem, varis_boylam)
+        etiket[erisim] = kalkis_dk + erisim_dk
+        en_iyi[erisim] = etiket[erisim]
+        isaretli[erisim] = True
+        ufuk = kalkis_dk + ROTA_PLANLAMA_UFKU_DK
+
+        secenekler: List[Dict[str, Any]] = []
+        hedef_en_iyi = np.inf
+        dogrudan_km = float(_haversine_km(kalkis_enlem, kalkis_boylam, varis_enlem, varis_boylam))
+        if dogrudan_km <= ROTA_ERISIM_YARICAPI_KM:
+            hedef_en_iyi = kalkis_dk + dogrudan_km / YURUME_HIZI_KM_SA * 60
+            secenekler.append(self._yurume_secenegi(kalkis_dk, hedef_en_iyi, dogrudan_km))
+
+        # Tur başına ebeveyn bilgisi: araç (rota, sefer, biniş sırası, iniş sırası) veya yürüme (kaynak düğüm, süre)
+        turlar: List[Dict[str, np.ndarray]] = []
+        for _ in range(max_aktarma + 1):
+            if not isaretli.any():
+                break
+            ebeveyn, isaretli = self._turu_tara(etiket, en_iyi, isaretli, min(ufuk, hedef_en_iyi))
+            turlar.append(ebeveyn)
+
+            if len(cikis):
+                varislar = etiket[cikis] + cikis_dk
+                j = int(np.argmin(varislar))
+                if varislar[j] < hedef_en_iyi:
+                    hedef_en_iyi = float(varislar[j])
+                    secenekler.append(self._yolculuk(turlar, int(cikis[j]), float(cikis_dk[j]), kalkis_dk, erisim, erisim_dk))
+
+        return secenekler
+
+    def erisilebilir(
+        self,
+        kalkis_enlem: float,
+        kalkis_boylam: float,
+        kalkis_dk: float,
+        sure_dk: float,
+        max_aktarma: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Başlangıç noktasından `sure_dk` dakika içinde ulaşılabilen tüm düğümleri bulur
+        (hedefsiz RAPTOR). Düğüm satırlarını, en erken varış dakikalarını ve bu varış
+        için gereken araç biniş sayısını (0: yalnızca yürüme) döndürür.
+        """
+        N = len(self.dugumler)
+        en_iyi = np.full(N, np.inf)
+        etiket = np.full(N, np.inf)
+        binis_sayisi = np.zeros(N, dtype=np.int8)
+        isaretli = np.zeros(N, dtype=bool)
+
+        sinir = kalkis_dk + sure_dk
+        erisim, erisim_dk = self._yakin_dugumler(kalkis_enlem, kalkis_boylam)
+        erisim, erisim_dk = erisim[kalkis_dk + erisim_dk <= sinir], erisim_dk[kalkis_dk + erisim_dk <= sinir]
+        etiket[erisim] = en_iyi[erisim] = kalkis_dk + erisim_dk
+        isaretli[erisim] = True
+
+        for tur in range(1, max_aktarma + 2):
+            if not isaretli.any():
+                break
+            onceki = en_iyi.copy()
+            _, isaretli = self._turu_tara(etiket, en_iyi, isaretli, sinir)
+            binis_sayisi[en_iyi < onceki] = tur
+
+        dugumler = np.flatnonzero(en_iyi <= sinir)
+        return dugumler, en_iyi[dugumler], binis_sayisi[dugumler]
+
+    def _turu_tara(
+        self,
+        etiket: np.ndarray,
+        en_iyi: np.ndarray,
+        isaretli: np.ndarray,
+        sinir: float
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Tek bir RAPTOR turu: işaretli düğümlerden geçen rotaları tarar, ardından araçtan
+        inilen düğümlerden yürüme aktarmalarını uygular. `sinir` dakikasından sonra varan
+        etiketler dikkate alınmaz. `etiket` ve `en_iyi` yerinde güncellenir; turun ebeveyn
+        bilgisi ile bir sonraki tur için işaretli düğümler döner.
+        """
+        N = len(self.dugumler)
+        onceki = etiket.copy()
+        ebeveyn = {
+            'rota': np.full(N, -1, dtype=np.int32), 'sefer': np.full(N, -1, dtype=np.int32),
+            'binis': np.full(N, -1, dtype=np.int32), 'inis': np.full(N, -1, dtype=np.int32),
+            'yurume_kaynak': np.full(N, -1, dtype=np.int32), 'yurume_dk': np.zeros(N)
+        }
+
+        isaretli_dugumler = np.flatnonzero(isaretli)
+        kenarlar = _araliklari_birlestir(self._durak_rota_baslangiclari[isaretli_dugumler],
+                                          self._durak_rota_baslangiclari[isaretli_dugumler + 1])
+        for r in np.unique(self._durak_rotalari[kenarlar]).tolist():
+            rota = self.rotalar[r]
+            duraklar = rota.duraklar
+            ilk_kalkislar = rota.zamanlar[:, 0]
+            alt = int(np.searchsorted(rota.zamanlar[:, -1], onceki[duraklar][isaretli[duraklar]].min()))
+            ust = int(np.searchsorted(ilk_kalkislar, sinir, side='right'))
+            if alt >= ust:
+                continue
+            zamanlar = rota.zamanlar[alt:ust]
+            n_sefer, n_durak = zamanlar.shape
+
+            binis_zamani = np.where(isaretli[duraklar], onceki[duraklar], np.inf)
+            uygun = zamanlar >= binis_zamani
+            ilk_sefer = np.where(uygun.any(axis=0), uygun.argmax(axis=0), n_sefer)
+            sefer = np.minimum.accumulate(ilk_sefer)
+            binis_sirasi = np.maximum.accumulate(np.where(ilk_sefer == sefer, np.arange(n_durak), -1))
+
+            inis = np.flatnonzero(sefer[:-1] < n_sefer) + 1
+            if len(inis) == 0:
+                continue
+            binilen_sefer = sefer[inis - 1]
+            varis = zamanlar[binilen_sefer, inis]
+            inis_duraklari = duraklar[inis]
+            iyi = varis < np.minimum(en_iyi[inis_duraklari], sinir)
+            if not iyi.any():
+                continue
+            d = inis_duraklari[iyi]
+            etiket[d] = en_iyi[d] = varis[iyi]
+            ebeveyn['rota'][d] = r
+            ebeveyn['sefer'][d] = alt + binilen_sefer[iyi]
+            ebeveyn['binis'][d] = binis_sirasi[inis - 1][iyi]
+            ebeveyn['inis'][d] = inis[iyi]
+            ebeveyn['yurume_kaynak'][d] = -1
+
+        araclar = np.flatnonzero(ebeveyn['rota'] >= 0)
+        isaretli = np.zeros(N, dtype=bool)
+        isaretli[araclar] = True
+
+        # Araçtan inilen duraklardan yürüme aktarmaları
+        baslangiclar = self._yurume_baslangiclari[araclar]
+        bitisler = self._yurume_baslangiclari[araclar + 1]
+        kenarlar = _araliklari_birlestir(baslangiclar, bitisler)
+        if len(kenarlar):
+            kaynaklar = np.repeat(araclar, bitisler - baslangiclar)
+            hedefler = self._yurume_hedefleri[kenarlar]
+            sureler = self._yurume_sureleri[kenarlar]
+            varislar = etiket[kaynaklar] + sureler
+            sira = np.lexsort((varislar, hedefler))
+            hedefler, ilkler = np.unique(hedefler[sira], return_index=True)
+            kaynaklar, sureler, varislar = kaynaklar[sira][ilkler], sureler[sira][ilkler], varislar[sira][ilkler]
+            iyi = varislar < np.minimum(en_iyi[hedefler], sinir)
+            d = hedefler[iyi]
+            etiket[d] = en_iyi[d] = varislar[iyi]
+            ebeveyn['yurume_kaynak'][d] = kaynaklar[iyi]
+            ebeveyn['yurume_dk'][d] = sureler[iyi]
+            isaretli[d] = True
+
+        return ebeveyn, isaretli
+
+    def _dugum_bilgisi(self, dugum: int) -> Dict[str, Any]:
+        kayit = self._dugum_kayitlari[dugum]
+        return {"tur": kayit['TUR'], "id": int(kayit['ID']), "adi": kayit['ADI']}
+
+    @staticmethod
+    def _yurume_secenegi(kalkis_dk: float, varis_dk: float, km: float) -> Dict[str, Any]:
+        return {
+            "aktarma_sayisi": 0,
+            "kalkis_saati": _dakikadan_saate(kalkis_dk),
+            "varis_saati": _dakikadan_saate(varis_dk),
+            "sure_dk": round(varis_dk - kalkis_dk),
+            "bacaklar": [{"tur": "Yürüme", "nereden": "Başlangıç noktası", "nereye": "Varış noktası",
+                          "sure_dk": round(varis_dk - kalkis_dk, 1), "mesafe_metre": int(km * 1000)}]
+        }
+
+    def _yolculuk(
+        self,
+        turlar: List[Dict[str, np.ndarray]],
+        dugum: int,
+        cikis_dk: float,
+        kalkis_dk: float,
+        erisim: np.ndarray,
+        erisim_dk: np.ndarray
+    ) -> Dict[str, Any]:
+        """Ebeveyn bilgilerini geriye doğru izleyerek yolculuğun bacaklarını çıkarır."""
+        bacaklar: List[Dict[str, Any]] = [{
+            "tur": "Yürüme", "nereden": self._dugum_bilgisi(dugum), "nereye": "Varış noktası", "sure_dk": round(cikis_dk, 1)
+        }]
+        ilk_binis_dk = son_inis_dk = None
+        k = len(turlar) - 1
+        while k >= 0:
+            ebeveyn = turlar[k]
+            if ebeveyn['yurume_kaynak'][dugum] >= 0:
+                kaynak = int(ebeveyn['yurume_kaynak'][dugum])
+                bacaklar.append({"tur": "Yürüme", "nereden": self._dugum_bilgisi(kaynak), "nereye": self._dugum_bilgisi(dugum),
+                                 "sure_dk": round(float(ebeveyn['yurume_dk'][dugum]), 1)})
+                dugum = kaynak
+            if ebeveyn['rota'][dugum] >= 0:
+                rota = self.rotalar[int(ebeveyn['rota'][dugum])]
+                sefer = rota.zamanlar[int(ebeveyn['sefer'][dugum])]
+                binis, inis = int(ebeveyn['binis'][dugum]), int(ebeveyn['inis'][dugum])
+                bacaklar.append({
+                    "tur": rota.tur, "hat": rota.hat, "yon": rota.yon,
+                    "binis": self._dugum_bilgisi(int(rota.duraklar[binis])), "binis_saati": _dakikadan_saate(sefer[binis]),
+                    "inis": self._dugum_bilgisi(int(rota.duraklar[inis])), "inis_saati": _dakikadan_saate(sefer[inis]),
+                    "durak_sayisi": inis - binis
+                })
+                dugum = int(rota.duraklar[binis])
+                ilk_binis_dk = float(sefer[binis])
+                if son_inis_dk is None:
+                    son_inis_dk = float(sefer[inis])
+            k -= 1
+            # Önceki turlarda iyileşmemiş düğümlerin etiketi daha önceki bir turdan gelir.
+            while k >= 0 and turlar[k]['rota'][dugum] < 0 and turlar[k]['yurume_kaynak'][dugum] < 0:
+                k -= 1
+
+        i = int(np.flatnonzero(erisim == dugum)[0])
+        bacaklar.append({"tur": "Yürüme", "nereden": "Başlangıç noktası", "nereye": self._dugum_bilgisi(dugum),
+                         "sure_dk": round(float(erisim_dk[i]), 1)})
+        bacaklar.reverse()
+
+        # Başlangıç noktasından, ilk araca tam biniş saatinde durakta olacak şekilde çıkılır.
+        kalkis = ilk_binis_dk - float(erisim_dk[i])
+        varis = son_inis_dk + cikis_dk
         return {
-            "kalkis_duragi": kalkis_station.iloc[0]['ISTASYON_ADI'],
-            "varis_duragi": varis_station.iloc[0]['ISTASYON_ADI'],
-            "mesafe_metre": int(mesafe)
+            "aktarma_sayisi": sum(b["tur"] != "Yürüme" for b in bacaklar) - 1,
+            "kalkis_saati": _dakikadan_saate(kalkis),
+            "varis_saati": _dakikadan_saate(varis),
+            "sure_dk": round(varis - kalkis),
+            "bacaklar": bacaklar
+        }
+
+_yolculuk_planlayicilari: Dict[int, _YolculukPlanlayici] = {}
+_planlayici_kilidi = Lock()
+_erisim_alani_onbellegi = _TTLOnbellek("erisim_alani", ERISIM_ALANI_ONBELLEK_TTL_S, ERISIM_ALANI_ONBELLEK_MAX_KAYIT)
+_ONBELLEKLER.append(_erisim_alani_onbellegi)
+
+def _yolculuk_planlayicisi(tarife_id: int) -> _YolculukPlanlayici:
+    """Gün türünün derlenmiş zaman çizelgesini döndürür; yoksa derler ve saklar."""
+    with _planlayici_kilidi:
+        planlayici = _yolculuk_planlayicilari.get(tarife_id)
+        if planlayici is None:
+            baslangic = monotonic()
+            planlayici = _YolculukPlanlayici(tarife_id)
+            _yolculuk_planlayicilari[tarife_id] = planlayici
+            logger.info(f"{TARIFE_GUN_TURLERI[tarife_id]} zaman çizelgesi {monotonic() - baslangic:.2f} sn'de derlendi: "
+                        f"{len(planlayici.rotalar)} rota, {sum(len(r.zamanlar) for r in planlayici.rotalar)} sefer.")
+        return planlayici
+
+def _yolculuk_planlayicilarini_sifirla(_df: Optional[pd.DataFrame] = None) -> None:
+    with _planlayici_kilidi:
+        _yolculuk_planlayicilari.clear()
+    _erisim_alani_onbellegi.temizle()
+
+for _ad in ('stops_df', 'route_coords_df', 'izban_stations_df', 'schedules_df', 'rail_stations_df', 'walking_transfers_df',
+            *(tanim['degisken'] for tanim in _RAYLI_HATLAR.values())):
+    _veri_dinleyicisi_ekle(_ad, _yolculuk_planlayicilarini_sifirla)
+
+# --- Tool 35: Yolculuk Planlama ---
+@mcp.tool()
+@_havuzda_calistir
+def rota_planla(
+    kalkis_enlem: float,
+    kalkis_boylam: float,
+    varis_enlem: float,
+    varis_boylam: float,
+    kalkis_saati: Optional[str] = None,
+    tarih: Optional[str] = None,
+    max_aktarma: int = 2
+) -> Dict[str, Any]:
+    """
+    İki konum arasında otobüs, İZBAN, metro, tramvay ve yürüyüşü birleştiren en erken
+    varışlı yolculuk seçeneklerini bulur. Daha az aktarmalı ama daha geç varan
+    seçenekler de listelenir.
+
+    Otobüslerin ara durak saatleri hat başı kalkış saatlerinden tahmin edilir. Raylı
+    sistemlerde ortalama sefer aralıkları kullanılır. Sonuçlar planlama amaçlıdır.
+
+    Args:
+        kalkis_enlem (float): Başlangıç noktasının enlemi.
+        kalkis_boylam (float): Başlangıç noktasının boylamı.
+        varis_enlem (float): Varış noktasının enlemi.
+        varis_boylam (float): Varış noktasının boylamı.
+        kalkis_saati (str, optional): 'SS:DD' biçiminde kalkış saati. Belirtilmezse şu anki saat kullanılır.
+        tarih (str, optional): 'YYYY-AA-GG' biçiminde yolculuk tarihi (gün türü için). Belirtilmezse bugün.
+        max_aktarma (int): İzin verilen en fazla aktarma sayısı (0-4).
+
+    Returns:
+        Kullanılan gün türünü ve her seçenek için kalkış/varış saatleri, süre ve
+        bacakların (yürüme, hat, biniş/iniş durakları ve saatleri) listesini içeren bir sözlük.
+    """
+    if not 0 <= max_aktarma <= 4:
+        return {"hata": "max_aktarma 0 ile 4 arasında olmalıdır."}
+
+    simdi = datetime.now(ZoneInfo("Europe/Istanbul"))
+    try:
+        gun = datetime.strptime(tarih, "%Y-%m-%d") if tarih else simdi
+    except ValueError:
+        return {"hata": "Geçersiz tarih. 'YYYY-AA-GG' biçimi kullanılmalıdır."}
+    kalkis_dk = _saat_dakikasi(kalkis_saati) if kalkis_saati else simdi.hour * 60 + simdi.minute
+    if kalkis_dk is None:
+        return {"hata": "Geçersiz kalkış saati. 'SS:DD' biçimi kullanılmalıdır."}
+
+    if stops_df is None or schedules_df is None:
+        logger.error("Durak veya sefer verileri yüklenemediği için rota planlanamıyor.")
+        return {"hata": _hazir_degil_mesaji("Durak ve sefer veritabanları hazır değil.")}
+
+    tarife_id = _tarife_id(gun)
+    secenekler = _yolculuk_planlayicisi(tarife_id).planla(
+        kalkis_enlem, kalkis_boylam, varis_enlem, varis_boylam, float(kalkis_dk), max_aktarma)
+
+    return {
+        "gun_turu": TARIFE_GUN_TURLERI[tarife_id],
+        "kalkis_saati": _dakikadan_saate(kalkis_dk),
+        "secenekler": secenekler
+    }
+
+def _izgara_alani(enlemler: np.ndarray, boylamlar: np.ndarray, yaricaplar_km: np.ndarray, hucre_km: float) -> Dict[str, Any]:
+    """
+    Her noktanın çevresindeki yarıçap içinde merkezi kalan ızgara hücrelerini işaretler ve
+    aynı satırdaki bitişik hücreleri dikdörtgenlerde birleştirerek GeoJSON MultiPolygon döndürür.
+    """
+    d_enlem = hucre_km / 111.32
+    d_boylam = hucre_km / (111.32 * np.cos(np.radians(float(enlemler.mean()))))
+    satir = np.floor(enlemler / d_enlem).astype(np.int64)
+    sutun = np.floor(boylamlar / d_boylam).astype(np.int64)
+    k = int(np.ceil(yaricaplar_km.max() / hucre_km)) if len(yaricaplar_km) else 0
+
+    hucreler = []
+    for di in range(-k, k + 1):
+        for dj in range(-k, k + 1):
+            h_satir, h_sutun = satir + di, sutun + dj
+            km = _haversine_km(enlemler, boylamlar, (h_satir + 0.5) * d_enlem, (h_sutun + 0.5) * d_boylam)
+            icinde = (km <= yaricaplar_km) | ((di == 0) & (dj == 0))
+            hucreler.append(np.stack([h_satir[icinde], h_sutun[icinde]], axis=1))
+    hucreler = np.unique(np.concatenate(hucreler), axis=0)
+
+    if len(hucreler) == 0:
+        return {"type": "MultiPolygon", "coordinates": []}
+    yeni_parca = np.ones(len(hucreler), dtype=bool)
+    yeni_parca[1:] = (hucreler[1:, 0] != hucreler[:-1, 0]) | (hucreler[1:, 1] != hucreler[:-1, 1] + 1)
+    baslangiclar = np.flatnonzero(yeni_parca)
+    bitisler = np.append(baslangiclar[1:], len(hucreler)) - 1
+
+    cokgenler = []
+    for b, e in zip(baslangiclar.tolist(), bitisler.tolist()):
+        alt, ust = round(hucreler[b, 0] * d_enlem, 6), round((hucreler[b, 0] + 1) * d_enlem, 6)
+        sol, sag = round(hucreler[b, 1] * d_boylam, 6), round((hucreler[e, 1] + 1) * d_boylam, 6)
+        cokgenler.append([[[sol, alt], [sag, alt], [sag, ust], [sol, ust], [sol, alt]]])
+    return {"type": "MultiPolygon", "coordinates": cokgenler}
+
+def _erisim_alani(
+    kalkis_enlem: float,
+    kalkis_boylam: float,
+    sure_dk: int,
+    kalkis_dk: int,
+    tarife_id: int,
+    max_aktarma: int,
+    alan_ciz: bool
+) -> Dict[str, Any]:
+    planlayici = _yolculuk_planlayicisi(tarife_id)
+    dugumler, varislar, binisler = planlayici.erisilebilir(kalkis_enlem, kalkis_boylam, kalkis_dk, sure_dk, max_aktarma)
+
+    sira = np.argsort(varislar, kind='stable')
+    dugumler, varislar, binisler = dugumler[sira], varislar[sira], binisler[sira]
+    tablo = planlayici.dugumler.iloc[dugumler]
+    sonuc: Dict[str, Any] = {
+        "gun_turu": TARIFE_GUN_TURLERI[tarife_id],
+        "kalkis_saati": _dakikadan_saate(kalkis_dk),
+        "sure_dk": sure_dk,
+        "nokta_sayisi": len(dugumler),
+        "noktalar": [
+            {"tur": tur, "id": int(kimlik), "adi": adi, "enlem": float(enlem), "boylam": float(boylam),
+             "varis_saati": _dakikadan_saate(varis), "sure_dk": round(float(varis) - kalkis_dk, 1),
+             "aktarma_sayisi": max(int(binis) - 1, 0)}
+            for tur, kimlik, adi, enlem, boylam, varis, binis in zip(
+                tablo['TUR'], tablo['ID'], tablo['ADI'], tablo['ENLEM'], tablo['BOYLAM'], varislar, binisler)
+        ]
+    }
+
+    if alan_ciz:
+        kalan_km = np.minimum((kalkis_dk + sure_dk - varislar) * YURUME_HIZI_KM_SA / 60, ROTA_ERISIM_YARICAPI_KM)
+        sonuc["alan"] = _izgara_alani(
+            np.append(tablo['ENLEM'].to_numpy(dtype=float), kalkis_enlem),
+            np.append(tablo['BOYLAM'].to_numpy(dtype=float), kalkis_boylam),
+            np.append(kalan_km, min(sure_dk * YURUME_HIZI_KM_SA / 60, ROTA_ERISIM_YARICAPI_KM)),
+            ERISIM_ALANI_IZGARA_KM
+        )
+    return sonuc
+
+# --- Tool 36: Belirli Sürede Ulaşılabilen Duraklar ---
+@mcp.tool()
+async def erisilebilir_duraklari_getir(
+    kalkis_enlem: float,
+    kalkis_boylam: float,
+    sure_dk: int = 30,
+    kalkis_saati: Optional[str] = None,
+    tarih: Optional[str] = None,
+    max_aktarma: int = 2,
+    alan_ciz: bool = False
+) -> Dict[str, Any]:
+    """
+    Bir konumdan belirli bir kalkış saatinde yola çıkıldığında `sure_dk` dakika içinde
+    otobüs, İZBAN, metro, tramvay ve yürüyüşle ulaşılabilen tüm durak ve istasyonları
+    en erken varış saatleriyle döndürür (erişilebilirlik / izokron analizi).
+
+    Kalkış saati birkaç dakikalık zaman diliminin başına yuvarlanır; aynı konum, dilim ve
+    süre için tekrarlanan sorgular önbellekten yanıtlanır.
+
+    Args:
+        kalkis_enlem (float): Başlangıç noktasının enlemi.
+        kalkis_boylam (float): Başlangıç noktasının boylamı.
+        sure_dk (int): Yolculuk süresi üst sınırı, dakika cinsinden.
+        kalkis_saati (str, optional): 'SS:DD' biçiminde kalkış saati. Belirtilmezse şu anki saat kullanılır.
+        tarih (str, optional): 'YYYY-AA-GG' biçiminde yolculuk tarihi (gün türü için). Belirtilmezse bugün.
+        max_aktarma (int): İzin verilen en fazla aktarma sayısı (0-4).
+        alan_ciz (bool): True ise ulaşılabilen bölge kaba bir ızgara üzerinde GeoJSON
+                         MultiPolygon olarak `alan` alanında döner.
+
+    Returns:
+        Gün türü, yuvarlanmış kalkış saati ve varış süresine göre sıralı durak/istasyon
+        listesini içeren bir sözlük.
+    """
+    if not 1 <= sure_dk <= ROTA_PLANLAMA_UFKU_DK:
+        return {"hata": f"sure_dk 1 ile {ROTA_PLANLAMA_UFKU_DK} arasında olmalıdır."}
+    if not 0 <= max_aktarma <= 4:
+        return {"hata": "max_aktarma 0 ile 4 arasında olmalıdır."}
+
+    simdi = datetime.now(ZoneInfo("Europe/Istanbul"))
+    try:
+        gun = datetime.strptime(tarih, "%Y-%m-%d") if tarih else simdi
+    except ValueError:
+        return {"hata": "Geçersiz tarih. 'YYYY-AA-GG' biçimi kullanılmalıdır."}
+    kalkis_dk = _saat_dakikasi(kalkis_saati) if kalkis_saati else simdi.hour * 60 + simdi.minute
+    if kalkis_dk is None:
+        return {"hata": "Geçersiz kalkış saati. 'SS:DD' biçimi kullanılmalıdır."}
+
+    if stops_df is None or schedules_df is None:
+        logger.error("Durak veya sefer verileri yüklenemediği için erişilebilirlik hesaplanamıyor.")
+        return {"hata": _hazir_degil_mesaji("Durak ve sefer veritabanları hazır değil.")}
+
+    kalkis_dk = kalkis_dk // ERISIM_ALANI_ZAMAN_DILIMI_DK * ERISIM_ALANI_ZAMAN_DILIMI_DK
+    tarife_id = _tarife_id(gun)
+    # Yaklaşık 10 m'lik konum farkları aynı önbellek kaydını paylaşır.
+    anahtar = (round(kalkis_enlem, 4), round(kalkis_boylam, 4), tarife_id, kalkis_dk, sure_dk, max_aktarma, alan_ciz)
+    hesapla = functools.partial(_erisim_alani, anahtar[0], anahtar[1], sure_dk, kalkis_dk, tarife_id, max_aktarma, alan_ciz)
+    dongu = asyncio.get_running_loop()
+    return await _erisim_alani_onbellegi.getir(anahtar, lambda: dongu.run_in_executor(_hesaplama_havuzu, hesapla))
+
+# --- Tool 37: Sonraki Kalkışlar ---
+@mcp.tool()
+def sonraki_kalkislari_getir(
+    hat_no: Optional[int] = None,
+    durak_id: Optional[int] = None,
+    yon: Optional[str] = None,
+    saat: Optional[str] = None,
+    tarih: Optional[str] = None,
+    adet: int = 5
+) -> Dict[str, Any]:
+    """
+    Bir otobüs hattının veya bir duraktan geçen tüm hatların, verilen saatten sonraki ilk
+    `adet` hat başı kalkışını döndürür. Gün türü (hafta içi, cumartesi, pazar) tarihten
+    belirlenir; gece yarısını geçen sorgularda önceki günün gece seferleri ve ertesi günün
+    ilk seferleri de dikkate alınır.
+
+    Sefer tablosu yalnızca hat başlarından kalkış saatlerini içerir; durak sorgularında da
+    dönen saatler hattın ilk durağından kalkış saatleridir.
+
+    Args:
+        hat_no (int, optional): Kalkışları aranacak hat numarası.
+        durak_id (int, optional): Kalkışları aranacak durağın ID'si (hat_no yerine).
+        yon (str, optional): 'Gidiş' veya 'Dönüş'. Belirtilmezse her iki yön.
+        saat (str, optional): 'SS:DD' biçiminde başlangıç saati. Belirtilmezse şu anki saat (Europe/Istanbul).
+        tarih (str, optional): 'YYYY-AA-GG' biçiminde tarih. Belirtilmezse bugün.
+        adet (int): Döndürülecek kalkış sayısı (1-50).
+
+    Returns:
+        Sorgu anını ve saat sırasına göre kalkışları (hat, yön, tarih, saat, kalan dakika,
+        gün türü ve araç özellikleri) içeren bir sözlük.
+    """
+    if (hat_no is None) == (durak_id is None):
+        return {"hata": "hat_no veya durak_id parametrelerinden yalnızca biri belirtilmelidir."}
+    if not 1 <= adet <= 50:
+        return {"hata": "adet 1 ile 50 arasında olmalıdır."}
+    if yon is None:
+        yonler = [0, 1]
+    else:
+        yonler = [i for i, ad in enumerate(_KalkisTablosu.YONLER) if _turkce_normalize(ad) == _turkce_normalize(yon).strip()]
+        if not yonler:
+            return {"hata": f"Geçersiz yön. Sadece {list(_KalkisTablosu.YONLER)} değerlerinden biri kullanılabilir."}
+
+    simdi = datetime.now(ZoneInfo("Europe/Istanbul"))
+    try:
+        gun = datetime.strptime(tarih, "%Y-%m-%d").date() if tarih else simdi.date()
+    except ValueError:
+        return {"hata": "Geçersiz tarih. 'YYYY-AA-GG' biçimi kullanılmalıdır."}
+    dakika = _saat_dakikasi(saat) if saat else simdi.hour * 60 + simdi.minute
+    if dakika is None:
+        return {"hata": "Geçersiz saat. 'SS:DD' biçimi kullanılmalıdır."}
+
+    tablo = _kalkis_tablosu
+    if tablo is None:
+        logger.error("Sefer saatleri verisi yüklenemediği için kalkışlar aranamıyor.")
+        return {"hata": _hazir_degil_mesaji("Sefer saatleri veritabanı hazır değil.")}
+
+    if hat_no is not None:
+        hat_nolari = [hat_no]
+    else:
+        indeks = _durak_hat_indeksi
+        if indeks is None:
+            return {"hata": _hazir_degil_mesaji("Durak veritabanı hazır değil.")}
+        satir = indeks.durak_satiri(durak_id)
+        if satir is None:
+            return {"hata": f"'{durak_id}' ID'li durak bulunamadı."}
+        hat_nolari = indeks.duraktan_gecen_hatlar(satir).tolist()
+
+    # Önceki günün gece yarısından sonraki seferleri, bugünün ve ertesi günün seferleri;
+    # her biri gün başlangıcına göre dakika cinsinden tek bir zaman eksenine taşınır.
+    adaylar = []
+    for gun_farki in (-1, 0, 1):
+        tarife_id = _tarife_id(gun + timedelta(days=gun_farki))
+        kayma = gun_farki * 24 * 60
+        for hat in hat_nolari:
+            for y in yonler:
+                for i in tablo.kalkislar(hat, tarife_id, y, dakika - kayma, adet):
+                    adaylar.append((int(tablo.dakikalar[i]) + kayma, hat, y, tarife_id, i))
+    adaylar.sort()
+
+    gun_baslangici = datetime.combine(gun, time(0))
+    kalkislar = []
+    for an, hat, y, tarife_id, i in adaylar[:adet]:
+        kalkis = gun_baslangici + timedelta(minutes=an)
+        engelli, bisiklet, elektrikli = tablo.ozellikler[i].tolist()
+        kalkislar.append({
+            "hat_no": int(hat),
+            "yon": _KalkisTablosu.YONLER[y],
+            "tarih": kalkis.date().isoformat(),
+            "kalkis_saati": kalkis.strftime("%H:%M"),
+            "kalan_dk": an - dakika,
+            "gun_turu": TARIFE_GUN_TURLERI[tarife_id],
+            "engelli_destegi": engelli,
+            "bisikletli": bisiklet,
+            "elektrikli_otobus": elektrikli
+        })
+
+    sonuc: Dict[str, Any] = {"tarih": gun.isoformat(), "saat": _dakikadan_saate(dakika)}
+    if durak_id is not None:
+        sonuc["durak_id"] = durak_id
+    sonuc["kalkislar"] = kalkislar
+    return sonuc
+
+# --- Tool 38: Bir Konumun Yakınından Geçen Hatlar ---
+@mcp.tool()
+def yakindan_gecen_hatlari_getir(enlem: float, boylam: float, max_metre: int = 300, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Güzergahı verilen konumun `max_metre` yakınından geçen otobüs hatlarını, konumun
+    güzergaha olan en kısa uzaklığına göre sıralı olarak döndürür.
+
+    Args:
+        enlem (float): Konumun enlemi.
+        boylam (float): Konumun boylamı.
+        max_metre (int): Güzergaha en fazla uzaklık, metre cinsinden (1-2000).
+        limit (int): Döndürülecek maksimum hat sayısı.
+
+    Returns:
+        Her hat için hat numarası, güzergaha uzaklık, güzergah üzerindeki en yakın nokta
+        ve yakından geçen yönleri içeren kayıtların listesi.
+    """
+    if not 1 <= max_metre <= 2000:
+        return [{"hata": "max_metre 1 ile 2000 arasında olmalıdır."}]
+
+    indeks = _guzergah_indeksi
+    if indeks is None:
+        logger.error("Güzergah koordinat verileri yüklenemediği için arama yapılamıyor.")
+        return [{"hata": _hazir_degil_mesaji("Güzergah koordinatları veritabanı hazır değil.")}]
+
+    segmentler, km, noktalar = indeks.yakin_segmentler(enlem, boylam, max_metre / 1000)
+    if len(segmentler) == 0:
+        return []
+
+    hat_nolari = indeks.df['HAT_NO'].to_numpy()[segmentler]
+    sira = np.lexsort((km, hat_nolari))
+    hatlar, ilkler = np.unique(hat_nolari[sira], return_index=True)
+    en_yakinlar = sira[ilkler]
+    en_yakinlar = en_yakinlar[np.argsort(km[en_yakinlar], kind='stable')][:limit]
+
+    yon_sutunu = indeks.df['YON'].to_numpy()[segmentler] if 'YON' in indeks.df.columns else None
+    sonuclar = []
+    for i in en_yakinlar.tolist():
+        kayit = {
+            "hat_no": int(hat_nolari[i]),
+            "mesafe_metre": int(round(km[i] * 1000)),
+            "en_yakin_enlem": round(float(noktalar[i, 0]), 6),
+            "en_yakin_boylam": round(float(noktalar[i, 1]), 6)
         }
+        if yon_sutunu is not None:
+            kayit["yonler"] = sorted({y.item() if isinstance(y, np.generic) else y
+                                      for y in yon_sutunu[hat_nolari == hat_nolari[i]]})
+        sonuclar.append(kayit)
+    return sonuclar
+
+# --- Varış Tahmini (Anlık Konumlardan) ---
+def _ondalik_sayi(deger: Any) -> float:
+    """'38,4512' gibi virgüllü metinleri de kabul ederek sayıya çevirir; çevrilemezse NaN döner."""
+    try:
+        return float(str(deger).replace(',', '.'))
+    except ValueError:
+        return np.nan
+
+def _otobus_konumlarini_ayristir(konumlar: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """IZTEK konum kayıtlarından (OtobusId, Yon, KoorX=enlem, KoorY=boylam) id'ye göre sıralı dizileri çıkarır; eksik kayıtlar atlanır."""
+    degerler = np.array([
+        [_ondalik_sayi(_alan(k, 'OtobusId')), _ondalik_sayi(_alan(k, 'Yon')),
+         _ondalik_sayi(_alan(k, 'KoorX', 'Enlem')), _ondalik_sayi(_alan(k, 'KoorY', 'Boylam'))]
+        for k in konumlar
+    ], dtype=float).reshape(-1, 4)
+    degerler = degerler[~np.isnan(degerler[:, [0, 2, 3]]).any(axis=1)]
+    idler, ilkler = np.unique(degerler[:, 0].astype(np.int64), return_index=True)
+    degerler = degerler[ilkler]
+    return idler, degerler[:, 1], degerler[:, 2], degerler[:, 3]
+
+class _VarisTahminMotoru:
+    """
+    Anlık otobüs konumlarını hat güzergahına izdüşürerek duraklara varış süresini tahmin eder.
+
+    Her yoklamada bir hattın tüm araçları tek seferde işlenir: araçlar yönlerine uyan
+    güzergah parçasına izdüşülür, bir önceki gözlemle karşılaştırılarak güzergah boyunca
+    hızları hesaplanır ve üstel ortalamayla yumuşatılır. Bir durağa varış süresi, durağın
+    güzergah üzerindeki konumuna kalan mesafenin aracın (yoksa hattın, o da yoksa
+    varsayılan) ortalama hızına bölünmesiyle bulunur.
+    """
+
+    def __init__(self, guzergahlar: _GuzergahIndeksi, durak_hatlari: _DurakHatIndeksi):
+        self.guzergahlar = guzergahlar
+        self.durak_hatlari = durak_hatlari
+        # hat -> (sıralı araç id, zaman, parça başlangıç satırı, km, hız km/sa)
+        self._durumlar: Dict[int, Tuple[np.ndarray, ...]] = {}
+        # (hat, parça başlangıç satırı) -> (durak satırları, güzergah km konumları)
+        self._durak_konumlari: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self._kilit = Lock()
+
+    def _parca_sec(self, hat_no: int, yonler: np.ndarray, enlemler: np.ndarray, boylamlar: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Her aracı yönü eşleşen parçaya (eşleşme yoksa en yakın parçaya) izdüşürür."""
+        n = len(enlemler)
+        parca = np.full(n, -1, dtype=np.int64)
+        km = np.full(n, np.nan)
+        uzaklik = np.full(n, np.inf)
+        parcalar = self.guzergahlar.parcalar(hat_no)
+        for yon, bas, bit in parcalar:
+            p_km, p_uzaklik = self.guzergahlar.izdus(bas, bit, enlemler, boylamlar)
+            if len(parcalar) > 1:
+                # Yönü bilinen araçlar yalnızca kendi yönlerinin parçasına atanır.
+                p_uzaklik = np.where(np.isnan(yonler) | (yonler == _sayiya_cevir(yon)), p_uzaklik, np.inf)
+            daha_yakin = p_uzaklik < uzaklik
+            parca[daha_yakin], km[daha_yakin], uzaklik[daha_yakin] = bas, p_km[daha_yakin], p_uzaklik[daha_yakin]
+        return parca, km, uzaklik
+
+    def gozlemle(self, hat_no: int, konumlar: List[Dict[str, Any]], zaman: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Hattın anlık konumlarını işler, araç hızlarını günceller ve araç başına
+        (id, yön, konum, parça, km, güzergaha uzaklık, hız) dizilerini döndürür.
+        """
+        zaman = monotonic() if zaman is None else zaman
+        idler, yonler, enlemler, boylamlar = _otobus_konumlarini_ayristir(konumlar)
+        parca, km, uzaklik = self._parca_sec(hat_no, yonler, enlemler, boylamlar)
+        guzergahta = uzaklik * 1000 <= ETA_MAX_GUZERGAH_UZAKLIGI_M
+        parca[~guzergahta] = -1
+
+        with self._kilit:
+            zamanlar = np.full(len(idler), zaman)
+            kayit_km = km.copy()
+            hizlar = np.full(len(idler), np.nan)
+            onceki = self._durumlar.get(hat_no)
+            if onceki is not None and len(onceki[0]):
+                o_id, o_zaman, o_parca, o_km, o_hiz = onceki
+                i = np.minimum(np.searchsorted(o_id, idler), len(o_id) - 1)
+                eslesen = (o_id[i] == idler) & (zaman - o_zaman[i] <= ETA_GOZLEM_ZAMAN_ASIMI_S)
+                hizlar[eslesen] = o_hiz[i[eslesen]]
+
+                # Önbellekten gelen aynı yanıt gibi çok yakın gözlemler hız hesabına katılmaz.
+                erken = eslesen & (zaman - o_zaman[i] < ETA_MIN_GOZLEM_ARALIGI_S) & (o_parca[i] == parca)
+                zamanlar[erken], kayit_km[erken] = o_zaman[i[erken]], o_km[i[erken]]
+
+                olcum = eslesen & ~erken & (o_parca[i] == parca) & (parca >= 0)
+                ornek = (km - o_km[i]) / np.maximum(zaman - o_zaman[i], 1e-9) * 3600
+                gecerli = olcum & (ornek >= 0) & (ornek <= ETA_HIZ_SINIRLARI_KM_SA[1] * 2)
+                ornek = np.clip(ornek, 0, ETA_HIZ_SINIRLARI_KM_SA[1])
+                hizlar[gecerli] = np.where(np.isnan(hizlar[gecerli]), ornek[gecerli],
+                                           (1 - ETA_HIZ_YUMUSATMA) * hizlar[gecerli] + ETA_HIZ_YUMUSATMA * ornek[gecerli])
+            self._durumlar[hat_no] = (idler, zamanlar, parca, kayit_km, hizlar)
+
+        return {"id": idler, "yon": yonler, "enlem": enlemler, "boylam": boylamlar,
+                "parca": parca, "km": km, "uzaklik_km": uzaklik, "hiz": hizlar}
+
+    def _duraklari_izdus(self, hat_no: int, bas: int, bit: int) -> Tuple[np.ndarray, np.ndarray]:
+        anahtar = (hat_no, bas)
+        konum = self._durak_konumlari.get(anahtar)
+        if konum is None:
+            satirlar = self.durak_hatlari.hattin_durak_satirlari(hat_no)
+            km, uzaklik = self.guzergahlar.izdus(bas, bit, *self.durak_hatlari.koordinatlar(satirlar))
+            yakin = uzaklik * 1000 <= ETA_MAX_GUZERGAH_UZAKLIGI_M
+            konum = self._durak_konumlari[anahtar] = (satirlar[yakin], km[yakin])
+        return konum
+
+    def duraga_varislar(self, hat_no: int, durak_satiri: int, araclar: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """Durağa henüz ulaşmamış araçların kalan mesafesini ve tahmini varış süresini döndürür."""
+        hat_hizi = np.nanmean(araclar['hiz']) if np.isfinite(araclar['hiz']).any() else np.nan
+        sonuclar = []
+        for yon, bas, bit in self.guzergahlar.parcalar(hat_no):
+            satirlar, durak_km = self._duraklari_izdus(hat_no, bas, bit)
+            eslesen = np.flatnonzero(satirlar == durak_satiri)
+            if len(eslesen) == 0:
+                continue
+            kalan_km = durak_km[eslesen[0]] - araclar['km']
+            uygun = np.flatnonzero((araclar['parca'] == bas) & (kalan_km >= 0))
+            hiz = araclar['hiz'][uygun]
+            kaynak = np.where(np.isfinite(hiz), "arac", "hat" if np.isfinite(hat_hizi) else "varsayilan")
+            hiz = np.where(np.isfinite(hiz), hiz, hat_hizi if np.isfinite(hat_hizi) else OTOBUS_ORT_HIZ_KM_SA)
+            hiz = np.clip(hiz, *ETA_HIZ_SINIRLARI_KM_SA)
+            for j, v, k in zip(uygun.tolist(), hiz.tolist(), kaynak.tolist()):
+                sonuclar.append({
+                    "otobus_id": int(araclar['id'][j]),
+                    "yon": _sayiya_cevir(yon),
+                    "kalan_mesafe_metre": int(round(kalan_km[j] * 1000)),
+                    "tahmini_varis_dk": round(float(kalan_km[j]) / v * 60, 1),
+                    "hiz_km_sa": round(v, 1),
+                    "hiz_kaynagi": k
+                })
+        sonuclar.sort(key=lambda kayit: kayit["tahmini_varis_dk"])
+        return sonuclar
+
+def _sayiya_cevir(deger: Any) -> Any:
+    """NumPy skalerlerini JSON'a yazılabilir Python sayılarına çevirir; sayı olmayanlar aynen döner."""
+    return deger.item() if isinstance(deger, np.generic) else deger
+
+_varis_tahmin_motoru: Optional[_VarisTahminMotoru] = None
+
+def _varis_tahmin_motorunu_olustur(_df: pd.DataFrame) -> None:
+    global _varis_tahmin_motoru
+    if _guzergah_indeksi is None or _durak_hat_indeksi is None:
+        return
+    _varis_tahmin_motoru = _VarisTahminMotoru(_guzergah_indeksi, _durak_hat_indeksi)
+
+for _ad in ('route_coords_df', 'stops_df'):
+    _veri_dinleyicisi_ekle(_ad, _varis_tahmin_motorunu_olustur)
+
+def _konumlari_isle(hat_no: int, konumlar: List[Dict[str, Any]]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Konum sorgularını varış tahmini motoruna ve hattın konum geçmişine iletir; böylece her
+    yoklamada hızlar güncellenir ve yanıt atılmadan önce geçmişe eklenir. Motorun güzergaha
+    izdüşürdüğü araçları, hattın güzergahı yoksa veya konumlar işlenemezse None döndürür.
+    """
+    motor = _varis_tahmin_motoru
+    araclar = None
+    if motor is not None and motor.guzergahlar.parcalar(hat_no):
+        try:
+            araclar = motor.gozlemle(hat_no, konumlar)
+        except Exception as e:
+            logger.warning(f"'{hat_no}' hattının konumları varış tahmini için işlenemedi: {e}")
+    try:
+        _konum_gecmisine_ekle(hat_no, konumlar, araclar)
     except Exception as e:
-        logger.error(f"Çiğli tramvay mesafe hesaplanırken bir hata oluştu: {e}", exc_info=True)
-        return {"hata": f"Hesaplama sırasında beklenmedik bir hata oluştu: {e}"}
+        logger.warning(f"'{hat_no}' hattının konumları geçmişe eklenemedi: {e}")
+    return araclar
+
+# --- Tool 39: Konumdan Varış Tahmini ---
+@mcp.tool()
+async def otobus_varis_tahmini_getir(hat_no: int, durak_id: int) -> Dict[str, Any]:
+    """
+    Bir hattın otobüslerinin belirtilen durağa tahmini varış sürelerini, anlık konumları
+    hat güzergahına izdüşürerek yerel olarak hesaplar. IZTEK'in kendi tahmininin
+    bulunmadığı veya güncel olmadığı durumlar için tasarlanmıştır.
+
+    Hızlar, aynı hattın art arda yapılan konum sorgularındaki ilerlemeden öğrenilir; ilk
+    sorguda hattın varsayılan ortalama hızı kullanılır.
+
+    Args:
+        hat_no (int): Hat numarası.
+        durak_id (int): Varış tahmini yapılacak durağın ID'si.
+
+    Returns:
+        Durağa henüz ulaşmamış otobüsleri kalan mesafe, tahmini varış süresi (dakika) ve
+        kullanılan hızla birlikte varış süresine göre sıralı olarak içeren bir sözlük.
+    """
+    motor = _varis_tahmin_motoru
+    if motor is None:
+        return {"hata": _hazir_degil_mesaji("Güzergah ve durak veritabanları hazır değil.")}
+    durak_satiri = motor.durak_hatlari.durak_satiri(durak_id)
+    if durak_satiri is None:
+        return {"hata": f"'{durak_id}' ID'li durak bulunamadı."}
+    if not motor.guzergahlar.parcalar(hat_no):
+        return {"hata": f"'{hat_no}' numaralı hattın güzergah bilgisi bulunamadı."}
+
+    konumlar = await _hat_otobus_konumlari(hat_no)
+    if konumlar is None:
+        return {"hata": "Otobüs konumları alınamadı."}
+    if not konumlar:
+        return {"hat_no": hat_no, "durak_id": durak_id, "otobusler": []}
+    araclar = _konumlari_isle(hat_no, konumlar)
+    if araclar is None:
+        return {"hata": "Otobüs konumları varış tahmini için işlenemedi."}
+    return {
+        "hat_no": hat_no,
+        "durak_id": durak_id,
+        "otobusler": motor.duraga_varislar(hat_no, durak_satiri, araclar)
+    }
+
+# --- Canlı Konum Takibi (Arka Plan Yoklayıcısı) ---
+CANLI_KONUM_KAYNAGI = "izmir-ulasim://hat/{line_id}/otobus-konumlari"
+
+class _CanliKonumTakipcisi:
+    """
+    En az bir abonesi olan her hattın otobüs konumlarını `CANLI_TAKIP_ARALIGI_S` saniyede bir
+    tek istekle çeker ve yalnızca değişen araçları (eklenen, güncellenen, kaldırılan) sürüm
+    numaralı değişiklik kayıtları olarak yayınlar. Kaynağa giden istek sayısı izleyici
+    sayısına değil, izlenen hat sayısına bağlıdır.
+
+    İki tür abone vardır: `resources/subscribe` ile abone olan MCP oturumlarına hattın kaynağı
+    değiştiğinde `notifications/resources/updated` gönderilir; araçlar üzerinden abone olan
+    istemciler değişiklikleri son gördükleri sürümle çeker ve `CANLI_TAKIP_ABONE_ZAMAN_ASIMI_S`
+    boyunca yoklamazlarsa abonelikleri düşer.
+    """
+
+    def __init__(self, konum_getir: Callable[[int], Awaitable[Optional[List[Dict[str, Any]]]]]):
+        self._konum_getir = konum_getir
+        self._oturumlar: Dict[int, set] = {}
+        self._istemciler: Dict[int, Dict[str, float]] = {}
+        self._araclar: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._surumler: Dict[int, int] = {}
+        self._gecmis: Dict[int, deque] = {}
+        self._gorev: Optional[asyncio.Task] = None
+        self.istek_sayisi = 0
+
+    def izlenen_hatlar(self) -> List[int]:
+        sinir = monotonic() - CANLI_TAKIP_ABONE_ZAMAN_ASIMI_S
+        for hat, istemciler in list(self._istemciler.items()):
+            for abone_id in [a for a, gorulme in istemciler.items() if gorulme < sinir]:
+                del istemciler[abone_id]
+            if not istemciler:
+                del self._istemciler[hat]
+        return sorted(set(self._istemciler) | {hat for hat, oturumlar in self._oturumlar.items() if oturumlar})
+
+    def oturum_ekle(self, hat: int, oturum: Any) -> None:
+        self._oturumlar.setdefault(hat, set()).add(oturum)
+        self._baslat()
+
+    def oturum_cikar(self, hat: int, oturum: Any) -> None:
+        self._oturumlar.get(hat, set()).discard(oturum)
+
+    def istemci_ekle(self, hat: int) -> str:
+        abone_id = secrets.token_hex(8)
+        self._istemciler.setdefault(hat, {})[abone_id] = monotonic()
+        self._baslat()
+        return abone_id
+
+    def istemci_gorundu(self, hat: int, abone_id: str) -> bool:
+        istemciler = self._istemciler.get(hat, {})
+        if abone_id not in istemciler or istemciler[abone_id] < monotonic() - CANLI_TAKIP_ABONE_ZAMAN_ASIMI_S:
+            return False
+        istemciler[abone_id] = monotonic()
+        return True
+
+    def istemci_cikar(self, hat: int, abone_id: str) -> bool:
+        return self._istemciler.get(hat, {}).pop(abone_id, None) is not None
+
+    def _baslat(self) -> None:
+        if self._gorev is None or self._gorev.done():
+            self._gorev = asyncio.create_task(self._calis())
+
+    async def _calis(self) -> None:
+        sinir = asyncio.Semaphore(CANLI_TAKIP_ES_ZAMANLI_ISTEK)
+
+        async def yokla(hat: int) -> None:
+            async with sinir:
+                await self.hatti_yokla(hat)
+
+        logger.info("Canlı konum takibi başlatıldı.")
+        while True:
+            hatlar = self.izlenen_hatlar()
+            if not hatlar:
+                break
+            await asyncio.gather(*(yokla(hat) for hat in hatlar))
+            await asyncio.sleep(CANLI_TAKIP_ARALIGI_S)
+        logger.info("İzlenen hat kalmadığı için canlı konum takibi durduruldu.")
+
+    async def hatti_yokla(self, hat: int) -> None:
+        """Hattın konumlarını bir kez çeker; değişiklik varsa yeni sürüm olarak kaydeder ve abonelere bildirir."""
+        try:
+            konumlar = await self._konum_getir(hat)
+        except Exception as e:
+            logger.warning(f"'{hat}' hattının canlı konumları alınamadı: {e}")
+            return
+        self.istek_sayisi += 1
+        if konumlar is None:
+            return
+        _konumlari_isle(hat, konumlar)
+
+        idler, yonler, enlemler, boylamlar = _otobus_konumlarini_ayristir(konumlar)
+        yeni = {
+            i: {"otobus_id": i, "yon": None if np.isnan(y) else int(y), "enlem": e, "boylam": b}
+            for i, y, e, b in zip(idler.tolist(), yonler.tolist(), enlemler.tolist(), boylamlar.tolist())
+        }
+        eski = self._araclar.get(hat, {})
+        degisiklik = {
+            "eklenen": [kayit for i, kayit in yeni.items() if i not in eski],
+            "guncellenen": [kayit for i, kayit in yeni.items() if i in eski and eski[i] != kayit],
+            "kaldirilan": [i for i in eski if i not in yeni]
+        }
+        if hat in self._surumler and not any(degisiklik.values()):
+            return
+        self._araclar[hat] = yeni
+        self._surumler[hat] = self._surumler.get(hat, 0) + 1
+        self._gecmis.setdefault(hat, deque(maxlen=CANLI_TAKIP_GECMIS_UZUNLUGU)).append((self._surumler[hat], degisiklik))
+        await self._bildir(hat)
+
+    async def _bildir(self, hat: int) -> None:
+        uri = AnyUrl(CANLI_KONUM_KAYNAGI.format(line_id=hat))
+        for oturum in list(self._oturumlar.get(hat, ())):
+            try:
+                await oturum.send_resource_updated(uri)
+            except Exception as e:
+                logger.info(f"'{hat}' hattı abonesine bildirim gönderilemedi, abonelik kaldırıldı: {e}")
+                self.oturum_cikar(hat, oturum)
+
+    def anlik_goruntu(self, hat: int) -> Dict[str, Any]:
+        return {"hat_no": hat, "surum": self._surumler.get(hat, 0), "otobusler": list(self._araclar.get(hat, {}).values())}
+
+    def degisiklikler(self, hat: int, surum: int) -> Dict[str, Any]:
+        """
+        `surum`den bu yana birikmiş değişiklikleri tek bir değişiklik kaydında birleştirir.
+        Geçmiş bu sürüme kadar uzanmıyorsa (veya sürüm tanınmıyorsa) tam görüntü döner.
+        """
+        guncel = self._surumler.get(hat, 0)
+        gecmis = [(s, d) for s, d in self._gecmis.get(hat, ()) if s > surum]
+        if surum > guncel or (surum < guncel and (not gecmis or gecmis[0][0] != surum + 1)):
+            return {**self.anlik_goruntu(hat), "onceki_surum": surum, "tam_goruntu": True}
+
+        # Bir aracın pencere içindeki ilk olayı eklenme ise başlangıçta yoktu.
+        onceden_vardi: Dict[int, bool] = {}
+        for _, degisiklik in gecmis:
+            for kayit in degisiklik["eklenen"]:
+                onceden_vardi.setdefault(kayit["otobus_id"], False)
+            for kayit in degisiklik["guncellenen"]:
+                onceden_vardi.setdefault(kayit["otobus_id"], True)
+            for i in degisiklik["kaldirilan"]:
+                onceden_vardi.setdefault(i, True)
+
+        araclar = self._araclar.get(hat, {})
+        return {
+            "hat_no": hat,
+            "onceki_surum": surum,
+            "surum": guncel,
+            "tam_goruntu": False,
+            "eklenen": [araclar[i] for i, vardi in onceden_vardi.items() if not vardi and i in araclar],
+            "guncellenen": [araclar[i] for i, vardi in onceden_vardi.items() if vardi and i in araclar],
+            "kaldirilan": [i for i, vardi in onceden_vardi.items() if vardi and i not in araclar]
+        }
+
+_canli_takipci = _CanliKonumTakipcisi(_hat_otobus_konumlari)
+
+def _konum_kaynagi_hatti(uri: Any) -> Optional[int]:
+    eslesme = re.fullmatch(r'izmir-ulasim://hat/(\d+)/otobus-konumlari', str(uri))
+    return int(eslesme.group(1)) if eslesme else None
+
+@mcp.resource(CANLI_KONUM_KAYNAGI, mime_type="application/json")
+async def hat_otobus_konumlari_kaynagi(line_id: int) -> str:
+    """Hattın canlı takipteki son otobüs konumları ve sürüm numarası. Abone olunursa değiştikçe bildirilir."""
+    if line_id not in _canli_takipci.izlenen_hatlar():
+        await _canli_takipci.hatti_yokla(line_id)
+    return json.dumps(_canli_takipci.anlik_goruntu(line_id), ensure_ascii=False)
+
+# FastMCP kaynak aboneliklerini kendisi yönetmediğinden abone ol/bırak istekleri alt
+# katmandaki sunucuya kaydedilir ve yetenek bildiriminde abonelik desteği açılır.
+@mcp._mcp_server.subscribe_resource()
+async def _konum_kaynagina_abone_ol(uri: AnyUrl) -> None:
+    hat = _konum_kaynagi_hatti(uri)
+    if hat is None:
+        raise ValueError(f"'{uri}' kaynağı abonelik desteklemiyor.")
+    _canli_takipci.oturum_ekle(hat, mcp._mcp_server.request_context.session)
+
+@mcp._mcp_server.unsubscribe_resource()
+async def _konum_kaynagi_aboneligini_birak(uri: AnyUrl) -> None:
+    hat = _konum_kaynagi_hatti(uri)
+    if hat is not None:
+        _canli_takipci.oturum_cikar(hat, mcp._mcp_server.request_context.session)
+
+_sunucu_yetenekleri = mcp._mcp_server.get_capabilities
+
+def _abonelik_destekli_yetenekler(*args: Any, **kwargs: Any) -> Any:
+    yetenekler = _sunucu_yetenekleri(*args, **kwargs)
+    if yetenekler.resources is not None:
+        yetenekler.resources.subscribe = True
+    return yetenekler
+
+mcp._mcp_server.get_capabilities = _abonelik_destekli_yetenekler
+
+# --- Tool 40: Hat Konum Takibini Başlat ---
+@mcp.tool()
+async def hat_konum_takibini_baslat(line_id: int) -> Dict[str, Any]:
+    """
+    Bir hattın otobüs konumlarını arka planda takibe alır ve güncel konumları döndürür.
+    Aynı hattı izleyen tüm istemciler kaynağa giden tek bir periyodik istekle beslenir.
+    Sonraki değişiklikler `hat_konum_degisikliklerini_getir` ile dönen `surum` verilerek alınır.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+
+    Returns:
+        Abone ID'si, yoklama aralığı, sürüm numarası ve güncel otobüs konumlarını içeren bir sözlük.
+    """
+    abone_id = _canli_takipci.istemci_ekle(line_id)
+    if _canli_takipci.anlik_goruntu(line_id)["surum"] == 0:
+        await _canli_takipci.hatti_yokla(line_id)
+    return {"abone_id": abone_id, "yoklama_araligi_s": CANLI_TAKIP_ARALIGI_S, **_canli_takipci.anlik_goruntu(line_id)}
+
+# --- Tool 41: Hat Konum Değişikliklerini Getir ---
+@mcp.tool()
+def hat_konum_degisikliklerini_getir(line_id: int, abone_id: str, surum: int) -> Dict[str, Any]:
+    """
+    Takipteki bir hatta verilen sürümden bu yana eklenen, konumu değişen ve hattan
+    ayrılan otobüsleri döndürür. Değişiklik yoksa listeler boş döner. Geçmiş yeterince
+    eskiye uzanmıyorsa `tam_goruntu` true olur ve tüm otobüsler `otobusler` altında gelir.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+        abone_id (str): `hat_konum_takibini_baslat` ile alınan abone ID'si.
+        surum (int): İstemcinin sahip olduğu son sürüm numarası.
+
+    Returns:
+        Önceki ve güncel sürüm numaralarını ve değişiklikleri içeren bir sözlük.
+    """
+    if not _canli_takipci.istemci_gorundu(line_id, abone_id):
+        return {"hata": "Abonelik bulunamadı veya zaman aşımına uğradı. Takibi yeniden başlatın."}
+    return _canli_takipci.degisiklikler(line_id, surum)
+
+# --- Tool 42: Hat Konum Takibini Bırak ---
+@mcp.tool()
+def hat_konum_takibini_birak(line_id: int, abone_id: str) -> Dict[str, Any]:
+    """
+    Bir hattın konum takibinden çıkar. Hattın başka abonesi kalmazsa yoklama durur.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+        abone_id (str): `hat_konum_takibini_baslat` ile alınan abone ID'si.
+
+    Returns:
+        Aboneliğin kaldırılıp kaldırılmadığını belirten bir sözlük.
+    """
+    return {"hat_no": line_id, "abonelik_kaldirildi": _canli_takipci.istemci_cikar(line_id, abone_id)}
+
+# --- Konum Geçmişi ve Hat Analizleri ---
+class _KonumHalkasi:
+    """
+    Bir hattın son konum gözlemlerini sabit kapasiteli dairesel dizilerde tutar. Sütunlar
+    kompakttır (float32 konum/km, int32 araç ve parça, int8 yön); zaman damgaları halkanın
+    taban zamanına göre desisaniye farkı olarak int32 saklanır. Kapasite dolunca en eski
+    satırların üzerine yazılır, böylece bellek kullanımı sabit kalır.
+    """
+
+    SUTUNLAR = (('otobus', np.int32), ('yon', np.int8), ('parca', np.int32),
+                ('enlem', np.float32), ('boylam', np.float32), ('km', np.float32))
+
+    def __init__(self, kapasite: int):
+        self.kapasite = kapasite
+        self.taban = zaman_damgasi()
+        self.zaman_ds = np.zeros(kapasite, dtype=np.int32)
+        self.sutunlar = {ad: np.zeros(kapasite, dtype=tip) for ad, tip in self.SUTUNLAR}
+        self._yazma = 0
+        self.adet = 0
+        self.son_zaman = -np.inf
+        self._son_ozet: Optional[bytes] = None
+
+    def ekle(self, zaman: float, degerler: Dict[str, np.ndarray]) -> None:
+        n = len(degerler['otobus'])
+        ozet = hashlib.sha1(b''.join(np.ascontiguousarray(degerler[ad]).tobytes() for ad, _ in self.SUTUNLAR)).digest()
+        # Önbellekten gelen aynı yanıt ikinci kez kaydedilmez.
+        if ozet == self._son_ozet and zaman - self.son_zaman < ANLIK_VERI_ONBELLEK_TTL_S:
+            return
+        if n > self.kapasite:
+            degerler = {ad: dizi[-self.kapasite:] for ad, dizi in degerler.items()}
+            n = self.kapasite
+        konumlar = (self._yazma + np.arange(n)) % self.kapasite
+        self.zaman_ds[konumlar] = int(round((zaman - self.taban) * 10))
+        for ad, _ in self.SUTUNLAR:
+            self.sutunlar[ad][konumlar] = degerler[ad]
+        self._yazma = (self._yazma + n) % self.kapasite
+        self.adet = min(self.adet + n, self.kapasite)
+        self.son_zaman, self._son_ozet = zaman, ozet
+
+    def pencere(self, baslangic: float) -> Dict[str, np.ndarray]:
+        """`baslangic` zamanından sonraki satırları eskiden yeniye sıralı sütunlar olarak döndürür."""
+        sira = (self._yazma - self.adet + np.arange(self.adet)) % self.kapasite
+        zaman = self.taban + self.zaman_ds[sira] / 10.0
+        secili = zaman >= baslangic
+        sira = sira[secili]
+        pencere = {ad: dizi[sira] for ad, dizi in self.sutunlar.items()}
+        pencere['zaman'] = zaman[secili]
+        return pencere
+
+    @property
+    def bayt(self) -> int:
+        return self.zaman_ds.nbytes + sum(dizi.nbytes for dizi in self.sutunlar.values())
+
+# En son güncellenen hatlar sonda; KONUM_GECMISI_MAX_HAT aşılınca en eskisi atılır.
+_konum_gecmisleri: "OrderedDict[int, _KonumHalkasi]" = OrderedDict()
+
+def _konum_gecmisine_ekle(hat_no: int, konumlar: List[Dict[str, Any]], araclar: Optional[Dict[str, np.ndarray]]) -> None:
+    if araclar is None:
+        idler, yonler, enlemler, boylamlar = _otobus_konumlarini_ayristir(konumlar)
+        parca, km = np.full(len(idler), -1), np.full(len(idler), np.nan)
+    else:
+        idler, yonler, enlemler, boylamlar = araclar['id'], araclar['yon'], araclar['enlem'], araclar['boylam']
+        parca, km = araclar['parca'], araclar['km']
+    if len(idler) == 0:
+        return
+
+    halka = _konum_gecmisleri.get(hat_no)
+    if halka is None:
+        halka = _konum_gecmisleri[hat_no] = _KonumHalkasi(KONUM_GECMISI_HAT_KAPASITESI)
+        while len(_konum_gecmisleri) > KONUM_GECMISI_MAX_HAT:
+            _konum_gecmisleri.popitem(last=False)
+    _konum_gecmisleri.move_to_end(hat_no)
+    halka.ekle(zaman_damgasi(), {
+        'otobus': idler, 'yon': np.nan_to_num(yonler, nan=0), 'parca': parca,
+        'enlem': enlemler, 'boylam': boylamlar, 'km': km
+    })
+
+def _konum_penceresi(hat_no: int, dakika: int) -> Tuple[Optional[Dict[str, np.ndarray]], Optional[Dict[str, Any]]]:
+    """Hattın son `dakika` dakikalık geçmişini ya da (pencerede gözlem yoksa) hata sözlüğünü döndürür."""
+    halka = _konum_gecmisleri.get(hat_no)
+    if halka is None or halka.adet == 0:
+        return None, {"hata": f"'{hat_no}' hattı için konum geçmişi yok. Önce hat_konum_takibini_baslat ile takibe alın."}
+    pencere = halka.pencere(zaman_damgasi() - dakika * 60)
+    if len(pencere['zaman']) == 0:
+        return None, {"hata": f"'{hat_no}' hattı için son {dakika} dakikada konum gözlemi yok."}
+    return pencere, None
+
+def _ardisik_gozlemler(pencere: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Gözlemleri araç ve zamana göre sıralar; aynı aracın `KONUM_GECMISI_MAX_BOSLUK_S` içinde
+    art arda gelen iki gözleminden oluşan aralıkların maskesini (ilk satıra göre) döndürür.
+    """
+    sira = np.lexsort((pencere['zaman'], pencere['otobus']))
+    sirali = {ad: dizi[sira] for ad, dizi in pencere.items()}
+    dt = np.diff(sirali['zaman'])
+    gecerli = (sirali['otobus'][1:] == sirali['otobus'][:-1]) & (dt > 0) & (dt <= KONUM_GECMISI_MAX_BOSLUK_S)
+    return sirali, gecerli
+
+# --- Tool 43: Hattın Gözlenen Ortalama Hızı ---
+@mcp.tool()
+def hat_gozlenen_hizini_getir(line_id: int, dakika: int = 30) -> Dict[str, Any]:
+    """
+    Bir hattın otobüslerinin son `dakika` dakikadaki konum geçmişinden gözlenen ortalama
+    hızlarını hat, yön ve araç bazında hesaplar. API'ye yeniden sorgu yapılmaz; geçmiş,
+    hattın konum sorguları ve canlı takip sırasında biriktirilir.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+        dakika (int): Geriye doğru bakılacak süre, dakika cinsinden.
+
+    Returns:
+        Toplam mesafe/süreden hesaplanan ortalama hızları (km/sa) içeren bir sözlük.
+    """
+    if not 1 <= dakika <= KONUM_GECMISI_DK:
+        return {"hata": f"dakika 1 ile {KONUM_GECMISI_DK} arasında olmalıdır."}
+    pencere, hata = _konum_penceresi(line_id, dakika)
+    if hata:
+        return hata
+
+    g, gecerli = _ardisik_gozlemler(pencere)
+    dt = np.diff(g['zaman'])
+    km = _haversine_km(g['enlem'][:-1], g['boylam'][:-1], g['enlem'][1:], g['boylam'][1:])
+    # Saatte 100 km'yi aşan sıçramalar konum hatası sayılır.
+    gecerli &= km / np.maximum(dt, 1e-9) * 3600 <= 100
+    km, dt = km[gecerli], dt[gecerli]
+    araclar, arac_kodu = np.unique(g['otobus'][:-1][gecerli], return_inverse=True)
+    yonler, yon_kodu = np.unique(g['yon'][:-1][gecerli], return_inverse=True)
+
+    def hiz(mesafe: np.ndarray, sure: np.ndarray) -> np.ndarray:
+        return np.round(np.divide(mesafe, sure, out=np.full(len(mesafe), np.nan), where=sure > 0) * 3600, 1)
+
+    arac_km, arac_s = np.bincount(arac_kodu, km, len(araclar)), np.bincount(arac_kodu, dt, len(araclar))
+    yon_km, yon_s = np.bincount(yon_kodu, km, len(yonler)), np.bincount(yon_kodu, dt, len(yonler))
+    return {
+        "hat_no": line_id,
+        "pencere_dk": dakika,
+        "gozlem_sayisi": len(g['zaman']),
+        "arac_sayisi": len(araclar),
+        "ortalama_hiz_km_sa": round(float(km.sum() / dt.sum() * 3600), 1) if dt.sum() > 0 else None,
+        "yonler": [{"yon": int(y), "ortalama_hiz_km_sa": float(v)} for y, v in zip(yonler, hiz(yon_km, yon_s))],
+        "araclar": [
+            {"otobus_id": int(a), "ortalama_hiz_km_sa": float(v), "mesafe_km": round(float(k), 2), "sure_dk": round(float(t) / 60, 1)}
+            for a, v, k, t in zip(araclar, hiz(arac_km, arac_s), arac_km, arac_s)
+        ]
+    }
+
+# --- Tool 44: Hatta Otobüs Yığılmalarını Tespit Et ---
+@mcp.tool()
+def hat_yigilmalarini_getir(line_id: int, esik_metre: int = 300) -> Dict[str, Any]:
+    """
+    Bir hattın en son gözlenen konumlarında aynı yönde birbirine `esik_metre`den yakın
+    seyreden (yığılmış) otobüs çiftlerini bulur. Güzergah bilgisi varsa mesafeler güzergah
+    boyunca, yoksa kuş uçuşu hesaplanır.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+        esik_metre (int): İki otobüsün yığılmış sayılacağı en büyük ara mesafe (metre).
+
+    Returns:
+        Yön başına araç sayısı, ortalama ara mesafe ve yığılmış çiftleri içeren bir sözlük.
+    """
+    pencere, hata = _konum_penceresi(line_id, KONUM_GECMISI_DK)
+    if hata:
+        return hata
+    son = pencere['zaman'] == pencere['zaman'].max()
+    anlik = {ad: dizi[son] for ad, dizi in pencere.items()}
+
+    yonler = []
+    ciftler = []
+    for yon in np.unique(anlik['yon']).tolist():
+        y = anlik['yon'] == yon
+        otobus, km = anlik['otobus'][y], anlik['km'][y].astype(float)
+        parca = anlik['parca'][y]
+        if len(otobus) < 2:
+            yonler.append({"yon": yon, "arac_sayisi": int(len(otobus)), "ortalama_ara_mesafe_metre": None})
+            continue
+        if np.isfinite(km).all() and (parca >= 0).all() and len(np.unique(parca)) == 1:
+            # Güzergah boyunca sıralı ardışık araçlar arasındaki mesafe
+            sira = np.argsort(km)
+            onde, arkada = sira[1:], sira[:-1]
+            ara_km = km[onde] - km[arkada]
+            olcu = "guzergah"
+        else:
+            # Her araç için aynı yöndeki en yakın diğer araç
+            uzaklik = _haversine_km(anlik['enlem'][y][:, None], anlik['boylam'][y][:, None],
+                                    anlik['enlem'][y][None, :], anlik['boylam'][y][None, :])
+            np.fill_diagonal(uzaklik, np.inf)
+            arkada = np.arange(len(otobus))
+            onde = uzaklik.argmin(axis=1)
+            ara_km = uzaklik[arkada, onde]
+            tekil = arkada < onde
+            tekil |= onde[onde] != arkada
+            arkada, onde, ara_km = arkada[tekil], onde[tekil], ara_km[tekil]
+            olcu = "kus_ucusu"
+        yonler.append({"yon": yon, "arac_sayisi": int(len(otobus)),
+                       "ortalama_ara_mesafe_metre": int(round(float(ara_km.mean()) * 1000)), "olcu": olcu})
+        for i in np.flatnonzero(ara_km * 1000 < esik_metre).tolist():
+            ciftler.append({"yon": yon, "otobus_1": int(otobus[arkada[i]]), "otobus_2": int(otobus[onde[i]]),
+                            "ara_mesafe_metre": int(round(float(ara_km[i]) * 1000))})
+
+    return {
+        "hat_no": line_id,
+        "gozlem_zamani": datetime.fromtimestamp(float(pencere['zaman'].max()), ZoneInfo("Europe/Istanbul")).strftime("%H:%M:%S"),
+        "yonler": yonler,
+        "yigilmalar": sorted(ciftler, key=lambda c: c["ara_mesafe_metre"])
+    }
+
+# --- Tool 45: Hattın Gerçekleşen Sefer Aralıkları ---
+@mcp.tool()
+def hat_gercek_sefer_araliklarini_getir(line_id: int, durak_id: Optional[int] = None, dakika: int = KONUM_GECMISI_DK) -> Dict[str, Any]:
+    """
+    Bir hattın otobüslerinin bir referans noktasından geçiş zamanlarını konum geçmişinden
+    çıkarır ve ardışık geçişler arasındaki gerçekleşen sefer aralıklarını (headway) hesaplar.
+    Referans nokta verilen durak, durak verilmezse her yönde güzergahın orta noktasıdır.
+    Güzergah koordinatları gerektirir.
+
+    Args:
+        line_id (int): Hat numarası (ID'si).
+        durak_id (int, optional): Geçişlerin ölçüleceği durağın ID'si.
+        dakika (int): Geriye doğru bakılacak süre, dakika cinsinden.
+
+    Returns:
+        Yön başına geçiş saatlerini, aralıkları (dakika), ortalama aralığı ve aralıkların
+        değişkenlik katsayısını içeren bir sözlük.
+    """
+    if not 1 <= dakika <= KONUM_GECMISI_DK:
+        return {"hata": f"dakika 1 ile {KONUM_GECMISI_DK} arasında olmalıdır."}
+    motor = _varis_tahmin_motoru
+    if motor is None or not motor.guzergahlar.parcalar(line_id):
+        return {"hata": f"'{line_id}' numaralı hattın güzergah bilgisi bulunamadı."}
+    durak_satiri = None
+    if durak_id is not None:
+        durak_satiri = motor.durak_hatlari.durak_satiri(durak_id)
+        if durak_satiri is None:
+            return {"hata": f"'{durak_id}' ID'li durak bulunamadı."}
+    pencere, hata = _konum_penceresi(line_id, dakika)
+    if hata:
+        return hata
+
+    g, gecerli = _ardisik_gozlemler(pencere)
+    gecerli &= (g['parca'][1:] == g['parca'][:-1]) & (g['parca'][1:] >= 0)
+    tz = ZoneInfo("Europe/Istanbul")
+    yonler = []
+    for yon, bas, bit in motor.guzergahlar.parcalar(line_id):
+        if durak_satiri is not None:
+            satirlar, durak_km = motor._duraklari_izdus(line_id, bas, bit)
+            eslesen = np.flatnonzero(satirlar == durak_satiri)
+            if len(eslesen) == 0:
+                continue
+            referans = float(durak_km[eslesen[0]])
+        else:
+            referans = float(motor.guzergahlar.kumulatif_km[bit - 1]) / 2
+
+        km0, km1 = g['km'][:-1].astype(float), g['km'][1:].astype(float)
+        gecis = gecerli & (g['parca'][:-1] == bas) & (km0 < referans) & (km1 >= referans)
+        oran = (referans - km0[gecis]) / (km1[gecis] - km0[gecis])
+        zamanlar = g['zaman'][:-1][gecis] + oran * np.diff(g['zaman'])[gecis]
+        sira = np.argsort(zamanlar)
+        zamanlar, otobusler = zamanlar[sira], g['otobus'][:-1][gecis][sira]
+        araliklar = np.diff(zamanlar) / 60
+        yonler.append({
+            "yon": _sayiya_cevir(yon),
+            "referans_km": round(referans, 3),
+            "gecisler": [{"otobus_id": int(o), "saat": datetime.fromtimestamp(float(t), tz).strftime("%H:%M:%S")}
+                         for o, t in zip(otobusler, zamanlar)],
+            "araliklar_dk": np.round(araliklar, 1).tolist(),
+            "ortalama_aralik_dk": round(float(araliklar.mean()), 1) if len(araliklar) else None,
+            "degiskenlik_katsayisi": round(float(araliklar.std() / araliklar.mean()), 2) if len(araliklar) > 1 and araliklar.mean() > 0 else None
+        })
+    return {"hat_no": line_id, "durak_id": durak_id, "pencere_dk": dakika, "yonler": yonler}
+
+# --- Tool 46: Birden Çok Durağa Yaklaşan Otobüsler ---
+# Süren durak isteklerinin görevleri; süresi dolanlar da tamamlanıp önbelleği doldurur.
+_suren_durak_istekleri: set = set()
+
+def _durak_adi(durak_id: int) -> Optional[str]:
+    indeks = _durak_hat_indeksi
+    satir = indeks.durak_satiri(durak_id) if indeks is not None else None
+    return indeks.durak_adi(satir) if satir is not None else None
+
+@mcp.tool()
+async def duraklara_yaklasan_otobusleri_getir(
+    stop_ids: List[int],
+    max_es_zamanli: int = COKLU_DURAK_ES_ZAMANLI_ISTEK,
+    zaman_asimi_s: float = COKLU_DURAK_ZAMAN_ASIMI_S
+) -> Dict[str, Any]:
+    """
+    Birden çok durağa (ör. bir aktarma merkezinin çevresindeki tüm duraklar) yaklaşan
+    otobüsleri eş zamanlı isteklerle getirir ve tek bir pano halinde birleştirir. Pano,
+    otobüslerin durağa kalan durak sayısına göre (en yakın gelen önce) sıralanır.
+    Süresinde yanıt vermeyen veya hata veren duraklar atlanır ve ayrıca listelenir;
+    diğer durakların sonuçları yine döndürülür.
+
+    Args:
+        stop_ids (List[int]): Durak ID'leri (en fazla 30).
+        max_es_zamanli (int): Aynı anda gönderilecek en fazla istek sayısı.
+        zaman_asimi_s (float): Sıradaki bekleme dahil, her durak için beklenecek en uzun süre
+            (saniye); aracın toplam süresini de sınırlar.
+
+    Returns:
+        'pano' (birleştirilmiş otobüs listesi), 'duraklar' (durak başına durum ve otobüs
+        sayısı) ve 'eksik_duraklar' (zaman aşımı veya hata nedeniyle alınamayanlar)
+        alanlarını içeren bir sözlük.
+    """
+    durak_idleri = list(dict.fromkeys(stop_ids))
+    if not durak_idleri:
+        return {"hata": "En az bir durak ID'si verilmelidir."}
+    if len(durak_idleri) > COKLU_DURAK_MAX_DURAK:
+        return {"hata": f"En fazla {COKLU_DURAK_MAX_DURAK} durak sorgulanabilir."}
+    if not 1 <= max_es_zamanli <= 2 * COKLU_DURAK_ES_ZAMANLI_ISTEK:
+        return {"hata": f"max_es_zamanli 1 ile {2 * COKLU_DURAK_ES_ZAMANLI_ISTEK} arasında olmalıdır."}
+    if not 0 < zaman_asimi_s <= 30:
+        return {"hata": "zaman_asimi_s 0 ile 30 saniye arasında olmalıdır."}
+
+    sinir = asyncio.Semaphore(max_es_zamanli)
+
+    def gorev_bitti(gorev: asyncio.Task) -> None:
+        _suren_durak_istekleri.discard(gorev)
+        if not gorev.cancelled():
+            gorev.exception()
+
+    async def durak_getir(durak_id: int) -> Tuple[str, Any]:
+        # Süre durak sıraya girdiği anda başlar; böylece aracın toplam süresi de sınırlı kalır.
+        try:
+            async with asyncio.timeout(zaman_asimi_s):
+                async with sinir:
+                    gorev = asyncio.create_task(_duraga_yaklasan_otobusler(durak_id))
+                    _suren_durak_istekleri.add(gorev)
+                    gorev.add_done_callback(gorev_bitti)
+                    # Süresi dolan istek arka planda tamamlanıp önbelleği doldurur, sıradaki
+                    # durağın yeri ise hemen boşalır.
+                    otobusler = await asyncio.shield(gorev)
+        except TimeoutError:
+            return "zaman_asimi", None
+        except Exception as e:
+            # Tek bir durağın beklenmedik hatası diğer durakların sonuçlarını düşürmemelidir.
+            return "hata", str(e) or type(e).__name__
+        if not isinstance(otobusler, list):
+            return "hata", f"Beklenmeyen yanıt biçimi: {type(otobusler).__name__}"
+        return "tamam", [otobus for otobus in otobusler if isinstance(otobus, dict)]
+
+    sonuclar = await asyncio.gather(*(durak_getir(durak_id) for durak_id in durak_idleri))
+
+    pano = []
+    duraklar = []
+    for sira, (durak_id, (durum, veri)) in enumerate(zip(durak_idleri, sonuclar)):
+        durak_adi = _durak_adi(durak_id)
+        ozet = {"durak_id": durak_id, "durak_adi": durak_adi, "durum": durum}
+        if durum == "tamam":
+            ozet["otobus_sayisi"] = len(veri)
+            for otobus in veri:
+                kalan = _ondalik_sayi(_alan(otobus, 'KalanDurakSayisi'))
+                pano.append((np.inf if np.isnan(kalan) else kalan, sira,
+                             {"durak_id": durak_id, "durak_adi": durak_adi, **otobus}))
+        elif durum == "hata":
+            ozet["hata"] = veri
+        duraklar.append(ozet)
+    pano.sort(key=lambda kayit: kayit[:2])
+
+    eksik = [d["durak_id"] for d in duraklar if d["durum"] != "tamam"]
+    if eksik:
+        logger.warning(f"{len(eksik)}/{len(durak_idleri)} durağın yaklaşan otobüsleri alınamadı: {eksik}")
+    return {
+        "tamamlandi": not eksik,
+        "pano": [kayit for _, _, kayit in pano],
+        "duraklar": duraklar,
+        "eksik_duraklar": eksik
+    }
+
+veri_setlerini_baslat(os.environ.get("IZMIR_ULASIM_VERI_YUKLEME_MODU", VERI_YUKLEME_MODU))
 
 if __name__ == "__main__":
+    izban_ucret_tablosu_olusturmayi_baslat()
     mcp.run(transport="stdio")
\ No newline at end of file